@@ -6,6 +6,7 @@ from flask_cors import CORS
 from flask_socketio import SocketIO
 from app.config import Config
 import os
+import time
 
 db = SQLAlchemy()
 migrate = Migrate()
@@ -38,6 +39,7 @@ def create_app(config_class=Config):
     from app.mail.routes import mail_bp
     from app.gmail.routes import gmail_bp
     from app.whiteboards.routes import whiteboards_bp
+    from app.search.routes import search_bp
 
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(tasks_bp, url_prefix='/api/tasks')
@@ -52,6 +54,7 @@ def create_app(config_class=Config):
     app.register_blueprint(mail_bp, url_prefix='/api/mail')
     app.register_blueprint(gmail_bp, url_prefix='/api/gmail')
     app.register_blueprint(whiteboards_bp, url_prefix='/api/whiteboards')
+    app.register_blueprint(search_bp, url_prefix='/api/search')
 
     # Create tables
     with app.app_context():
@@ -82,5 +85,130 @@ def create_app(config_class=Config):
                         conn.commit()
                 except Exception:
                     pass
+        # Add tasks recurrence instance columns if missing
+        for col, sql_type in [('recurrence_source_id', 'INTEGER'), ('occurrence_at', 'TIMESTAMP')]:
+            try:
+                with db.engine.connect() as conn:
+                    conn.execute(text(f"SELECT {col} FROM tasks LIMIT 1"))
+                    conn.commit()
+            except Exception:
+                try:
+                    with db.engine.connect() as conn:
+                        conn.execute(text(f"ALTER TABLE tasks ADD COLUMN {col} {sql_type}"))
+                        conn.commit()
+                except Exception:
+                    pass
+        # Add task_activities.workspace_id if missing, backfilled from each activity's task
+        try:
+            with db.engine.connect() as conn:
+                conn.execute(text("SELECT workspace_id FROM task_activities LIMIT 1"))
+                conn.commit()
+        except Exception:
+            try:
+                with db.engine.connect() as conn:
+                    conn.execute(text("ALTER TABLE task_activities ADD COLUMN workspace_id INTEGER"))
+                    conn.execute(text(
+                        "UPDATE task_activities SET workspace_id = "
+                        "(SELECT tasks.workspace_id FROM tasks WHERE tasks.id = task_activities.task_id)"
+                    ))
+                    conn.commit()
+            except Exception:
+                pass
+        # Add users.timezone if missing
+        try:
+            with db.engine.connect() as conn:
+                conn.execute(text("SELECT timezone FROM users LIMIT 1"))
+                conn.commit()
+        except Exception:
+            try:
+                with db.engine.connect() as conn:
+                    conn.execute(text("ALTER TABLE users ADD COLUMN timezone VARCHAR(64)"))
+                    conn.commit()
+            except Exception:
+                pass
+        # Add users.notification_digest if missing
+        try:
+            with db.engine.connect() as conn:
+                conn.execute(text("SELECT notification_digest FROM users LIMIT 1"))
+                conn.commit()
+        except Exception:
+            try:
+                with db.engine.connect() as conn:
+                    conn.execute(text("ALTER TABLE users ADD COLUMN notification_digest VARCHAR(10) DEFAULT 'immediate'"))
+                    conn.commit()
+            except Exception:
+                pass
+        # Add notification_outbox.digest if missing
+        try:
+            with db.engine.connect() as conn:
+                conn.execute(text("SELECT digest FROM notification_outbox LIMIT 1"))
+                conn.commit()
+        except Exception:
+            try:
+                with db.engine.connect() as conn:
+                    conn.execute(text("ALTER TABLE notification_outbox ADD COLUMN digest VARCHAR(10)"))
+                    conn.commit()
+            except Exception:
+                pass
+        # create_all() skips tables that already exist, so add any indexes declared on the
+        # models (see __table_args__ in models.py) that an older database is missing.
+        # Unique indexes back ON CONFLICT targets and invariants, so failing to build one
+        # (e.g. duplicate rows already exist) stops startup instead of being skipped.
+        for table in db.metadata.tables.values():
+            for index in table.indexes:
+                try:
+                    index.create(bind=db.engine, checkfirst=True)
+                except Exception as e:
+                    if index.unique:
+                        raise RuntimeError(f"Could not create unique index {index.name}: {e}") from e
+                    app.logger.warning("Could not create index %s: %s", index.name, e)
+        # Full-text search index (FTS5 on SQLite, tsvector + GIN on PostgreSQL)
+        from app.search.index import ensure_schema
+        ensure_schema()
+        # Per-workspace task status counters (built once for databases that predate them)
+        from app.tasks.counters import ensure_counters
+        ensure_counters()
+
+    # Recurring task materialization (`flask materialize-recurring` does one pass for cron)
+    from app.tasks.recurrence import register_recurrence
+    register_recurrence(app)
+
+    # Archival of closed tasks (`flask archive-tasks`, for cron)
+    from app.tasks.archive import register_archival
+    register_archival(app)
+
+    # `flask reconcile-task-counters` rebuilds the task status counters from the tasks table
+    from app.tasks.counters import register_counters
+    register_counters(app)
+
+    # Notification outbox (`flask dispatch-notifications` drains it once, for cron)
+    from app.notifications.outbox import register_outbox
+    register_outbox(app)
+
+    @app.cli.command('run-workers')
+    def run_workers_command():
+        """Run the notification outbox workers and recurring task scheduler until interrupted."""
+        start_background_workers(app)
+        while True:
+            time.sleep(3600)
+
+    if app.config.get('BACKGROUND_WORKERS_ENABLED') and not app.testing:
+        start_background_workers(app)
 
     return app
+
+
+def start_background_workers(app):
+    """
+    Start the notification outbox dispatch threads and, if enabled, the recurring task scheduler.
+    Only serving processes call this (run.py, create_app() under BACKGROUND_WORKERS_ENABLED, or a
+    dedicated `flask run-workers` process), so other CLI commands and scripts do not spawn them.
+    Calling it again for the same app does nothing.
+    """
+    if app.extensions.get('background_workers'):
+        return
+    app.extensions['background_workers'] = True
+    from app.notifications.outbox import start_outbox_workers
+    from app.tasks.recurrence import start_recurrence_scheduler
+    start_outbox_workers(app)
+    start_recurrence_scheduler(app)
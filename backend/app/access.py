@@ -0,0 +1,132 @@
+"""
+Task access checks.
+
+A user's role on a task is 'creator', 'assignee', 'collaborator' or None, answered by
+one query (task columns plus an EXISTS on task_collaborators), or by no query at all
+when the caller already holds the Task and the user is its creator or assignee.
+
+Answers are memoized on flask.g for the rest of the request and, when
+TASK_ACCESS_CACHE_TTL is set, in a small per-process cache for that many seconds.
+Both are dropped for a task as soon as a flush changes its assignee, creator or
+collaborators, or deletes it, and the process cache is dropped again once that
+transaction commits or rolls back, since a concurrent request may have cached the
+old committed role in between; other processes see the change within the TTL.
+"""
+import threading
+import time
+
+from flask import g, current_app, has_app_context
+from sqlalchemy import event, inspect, select, case, exists, and_
+
+from app import db
+from app.models import Task, TaskCollaborator
+
+# Roles allowed at each access level
+LEVELS = {
+    'read': ('creator', 'assignee', 'collaborator'),
+    'write': ('creator', 'assignee', 'collaborator'),  # e.g. attachments
+    'manage': ('creator', 'assignee'),  # collaborators, status/deletion from voice
+}
+
+_MISSING = object()
+_cache = {}  # task_id -> {user_id: (role, expires_at)}
+_cache_lock = threading.Lock()
+_CACHE_MAX_TASKS = 10000
+
+
+def _memo():
+    if '_task_roles' not in g:
+        g._task_roles = {}
+    return g._task_roles
+
+
+def _cache_get(task_id, user_id):
+    with _cache_lock:
+        entry = _cache.get(task_id, {}).get(user_id)
+    if entry and entry[1] > time.monotonic():
+        return entry[0]
+    return _MISSING
+
+
+def _cache_put(task_id, user_id, role, ttl):
+    with _cache_lock:
+        if len(_cache) >= _CACHE_MAX_TASKS and task_id not in _cache:
+            _cache.clear()
+        _cache.setdefault(task_id, {})[user_id] = (role, time.monotonic() + ttl)
+
+
+def _query_role(user_id, task_id):
+    is_collaborator = exists().where(and_(TaskCollaborator.task_id == Task.id, TaskCollaborator.user_id == user_id))
+    stmt = select(case(
+        (Task.created_by_id == user_id, 'creator'),
+        (Task.assignee_id == user_id, 'assignee'),
+        (is_collaborator, 'collaborator'),
+        else_=None,
+    )).where(Task.id == task_id)
+    return db.session.execute(stmt).scalar()
+
+
+def task_role(user_id, task):
+    """The user's role on task (a Task or a task id), or None if they have none or the task does not exist."""
+    if isinstance(task, Task):
+        if task.created_by_id == user_id:
+            return 'creator'
+        if task.assignee_id == user_id:
+            return 'assignee'
+        task_id = task.id
+    else:
+        task_id = task
+    memo = _memo()
+    key = (task_id, user_id)
+    if key in memo:
+        return memo[key]
+    ttl = current_app.config.get('TASK_ACCESS_CACHE_TTL', 0)
+    role = _cache_get(task_id, user_id) if ttl else _MISSING
+    if role is _MISSING:
+        role = _query_role(user_id, task_id)
+        if ttl:
+            _cache_put(task_id, user_id, role, ttl)
+    memo[key] = role
+    return role
+
+
+def can_access_task(user_id, task, level='read'):
+    return task_role(user_id, task) in LEVELS[level]
+
+
+def invalidate_task(task_id):
+    """Drop cached roles for task_id now, and from the process cache again when the transaction ends."""
+    with _cache_lock:
+        _cache.pop(task_id, None)
+    if has_app_context():
+        db.session.info.setdefault('task_access_changed', set()).add(task_id)
+        if '_task_roles' in g:
+            g._task_roles = {key: role for key, role in g._task_roles.items() if key[0] != task_id}
+
+
+@event.listens_for(db.session, 'after_commit')
+@event.listens_for(db.session, 'after_rollback')
+def _invalidate_after_transaction(session):
+    changed = session.info.pop('task_access_changed', None)
+    if changed:
+        with _cache_lock:
+            for task_id in changed:
+                _cache.pop(task_id, None)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _invalidate_on_access_change(session, flush_context):
+    changed = set()
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, TaskCollaborator):
+            changed.add(obj.task_id)
+    for obj in session.deleted:
+        if isinstance(obj, Task):
+            changed.add(obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, Task):
+            state = inspect(obj)
+            if state.attrs.assignee_id.history.has_changes() or state.attrs.created_by_id.history.has_changes():
+                changed.add(obj.id)
+    for task_id in changed:
+        invalidate_task(task_id)
@@ -4,6 +4,8 @@ from app.models import User
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from app.notifications.coalesce import DIGEST_MODES
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -88,6 +90,8 @@ def get_current_user():
         'email': user.email,
         'name': user.name,
         'phone': user.phone,
+        'timezone': user.timezone,
+        'notification_digest': user.notification_digest or 'immediate',
         'created_at': user.created_at.isoformat()
     }), 200
 
@@ -107,3 +111,48 @@ def update_fcm_token():
     db.session.commit()
     
     return jsonify({'message': 'FCM token updated successfully'}), 200
+
+
+@auth_bp.route('/update-timezone', methods=['POST'])
+@jwt_required()
+def update_timezone():
+    user_id = int(get_jwt_identity())
+    user = User.query.get(user_id)
+    
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+    
+    data = request.get_json() or {}
+    tz_name = data.get('timezone')
+    if tz_name:
+        try:
+            ZoneInfo(tz_name)
+        except (ZoneInfoNotFoundError, ValueError):
+            return jsonify({'error': 'Unknown timezone'}), 400
+    user.timezone = tz_name or None
+    user.updated_at = datetime.utcnow()
+    
+    db.session.commit()
+    
+    return jsonify({'message': 'Timezone updated successfully', 'timezone': user.timezone}), 200
+
+
+@auth_bp.route('/update-notification-digest', methods=['POST'])
+@jwt_required()
+def update_notification_digest():
+    user_id = int(get_jwt_identity())
+    user = User.query.get(user_id)
+    
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+    
+    data = request.get_json() or {}
+    mode = data.get('notification_digest') or 'immediate'
+    if mode not in DIGEST_MODES:
+        return jsonify({'error': f"notification_digest must be one of: {', '.join(DIGEST_MODES)}"}), 400
+    user.notification_digest = mode
+    user.updated_at = datetime.utcnow()
+    
+    db.session.commit()
+    
+    return jsonify({'message': 'Notification digest updated successfully', 'notification_digest': user.notification_digest}), 200
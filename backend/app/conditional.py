@@ -0,0 +1,47 @@
+"""
+Conditional GET (ETag / Last-Modified) for polled endpoints.
+
+Routes compute a cheap watermark for what they are about to return, typically
+max(updated_at) and row counts from a single aggregate query, and call
+not_modified() before building the payload. Clients that send a matching
+If-None-Match get an empty 304 without the list or detail view ever being
+loaded or serialized. Last-Modified is sent for information only.
+"""
+import hashlib
+from datetime import datetime
+
+from flask import request, make_response
+
+from app import db
+
+
+def watermark(*aggregates):
+    """Evaluate scalar aggregate selects (e.g. select(func.max(...))) in one round trip."""
+    return tuple(db.session.query(*[a.scalar_subquery() for a in aggregates]).one())
+
+
+def make_etag(*parts):
+    """Weak ETag over the watermark plus whatever scopes the response (user, query string)."""
+    raw = '|'.join(p.isoformat() if isinstance(p, datetime) else str(p) for p in parts)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def not_modified(etag, last_modified=None):
+    """
+    Return a 304 response when If-None-Match still matches, else None.
+    If-Modified-Since is deliberately not honoured: deleting a row lowers the
+    count in the ETag but does not move max(updated_at).
+    """
+    if not request.if_none_match or not request.if_none_match.contains_weak(etag):
+        return None
+    return with_validators(make_response('', 304), etag, last_modified)
+
+
+def with_validators(response, etag, last_modified=None):
+    """Attach ETag/Last-Modified and make clients revalidate instead of reusing blindly."""
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
@@ -33,9 +33,21 @@ class Config:
     TWILIO_ACCOUNT_SID = os.environ.get('TWILIO_ACCOUNT_SID')
     TWILIO_AUTH_TOKEN = os.environ.get('TWILIO_AUTH_TOKEN')
     TWILIO_PHONE_NUMBER = os.environ.get('TWILIO_PHONE_NUMBER')
+    # SMS pacing: messages per second the sender number may send (Twilio long codes: 1) and
+    # burst size, longest an outbox worker waits for the rate before requeueing, seconds
+    # within which the same text to the same number is dropped, and HTTP timeout
+    SMS_RATE_PER_SECOND = float(os.environ.get('SMS_RATE_PER_SECOND', 1))
+    SMS_BURST = int(os.environ.get('SMS_BURST', 1))
+    SMS_MAX_WAIT_SECONDS = float(os.environ.get('SMS_MAX_WAIT_SECONDS', 10))
+    SMS_DEDUP_SECONDS = int(os.environ.get('SMS_DEDUP_SECONDS', 300))
+    SMS_TIMEOUT = float(os.environ.get('SMS_TIMEOUT', 10))
     
     # Firebase
     FIREBASE_CREDENTIALS_PATH = os.environ.get('FIREBASE_CREDENTIALS_PATH')
+    # Push batching: messages per FCM send_each call (at most 500), and how long the first
+    # message waits for others to share its call
+    PUSH_BATCH_SIZE = int(os.environ.get('PUSH_BATCH_SIZE', 500))
+    PUSH_BATCH_LINGER_MS = int(os.environ.get('PUSH_BATCH_LINGER_MS', 50))
     
     # Google Calendar
     GOOGLE_CLIENT_ID = os.environ.get('GOOGLE_CLIENT_ID')
@@ -56,11 +68,70 @@ class Config:
     MAIL_TIMEOUT = int(os.environ.get('MAIL_TIMEOUT', 30))
     MAIL_DEBUG = os.environ.get('MAIL_DEBUG', 'false').lower() == 'true'
     MAIL_SUPPRESS_SEND = os.environ.get('MAIL_SUPPRESS_SEND', 'false').lower() == 'true'
+    # SMTP connection pool: sessions per process, messages sent before a session is replaced,
+    # and seconds a session may sit unused before it is closed rather than reused
+    MAIL_POOL_SIZE = int(os.environ.get('MAIL_POOL_SIZE', 4))
+    MAIL_MAX_MESSAGES_PER_SESSION = int(os.environ.get('MAIL_MAX_MESSAGES_PER_SESSION', 100))
+    MAIL_POOL_IDLE_SECONDS = int(os.environ.get('MAIL_POOL_IDLE_SECONDS', 60))
     
     # File store (uploads directory, relative to app root)
     UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER') or os.path.join(os.path.dirname(os.path.dirname(__file__)), 'uploads')
     MAX_CONTENT_LENGTH = int(os.environ.get('MAX_UPLOAD_MB', 16)) * 1024 * 1024  # 16 MB default
     
+    # List endpoints (keyset pagination): default and maximum page size
+    PAGE_SIZE_DEFAULT = int(os.environ.get('PAGE_SIZE_DEFAULT', 50))
+    PAGE_SIZE_MAX = int(os.environ.get('PAGE_SIZE_MAX', 200))
+    
+    # POST /api/tasks/bulk: maximum operations per request
+    BULK_MAX_ITEMS = int(os.environ.get('BULK_MAX_ITEMS', 500))
+    
+    # GET /api/tasks/changes: seconds a change must be old before readers move past it, which
+    # must exceed the longest write transaction so out-of-order commits are not skipped
+    TASK_CHANGES_LAG_SECONDS = int(os.environ.get('TASK_CHANGES_LAG_SECONDS', 5))
+    
+    # Recurring tasks: in-process scheduler (off by default; cron can run `flask materialize-recurring`),
+    # seconds between passes, series claimed per batch, and most missed occurrences created after downtime
+    RECURRING_SCHEDULER_ENABLED = os.environ.get('RECURRING_SCHEDULER_ENABLED', 'false').lower() == 'true'
+    RECURRING_INTERVAL_SECONDS = int(os.environ.get('RECURRING_INTERVAL_SECONDS', 60))
+    RECURRING_BATCH_SIZE = int(os.environ.get('RECURRING_BATCH_SIZE', 100))
+    RECURRING_MAX_CATCHUP = int(os.environ.get('RECURRING_MAX_CATCHUP', 30))
+
+    # Public shared-task links: per-process LRU entries and seconds they stay fresh (0 disables),
+    # and the Cache-Control max-age sent to browsers/CDNs (also how long a revoked link may linger there)
+    SHARED_TASK_CACHE_SIZE = int(os.environ.get('SHARED_TASK_CACHE_SIZE', 1024))
+    SHARED_TASK_CACHE_TTL = int(os.environ.get('SHARED_TASK_CACHE_TTL', 30))
+    SHARED_TASK_MAX_AGE = int(os.environ.get('SHARED_TASK_MAX_AGE', 30))
+
+    # Start the outbox workers and recurring scheduler inside every app process that serves
+    # requests (gunicorn.conf.py turns this on for gunicorn; leave it off when a separate
+    # `flask run-workers` process runs them)
+    BACKGROUND_WORKERS_ENABLED = os.environ.get('BACKGROUND_WORKERS_ENABLED', 'false').lower() == 'true'
+    # Notification outbox (notifications/outbox.py): dispatch threads per worker process
+    # (0 = only `flask dispatch-notifications`), messages claimed per batch, delivery attempts before a
+    # message is marked failed, first retry delay (doubling per attempt), seconds a claim is held,
+    # idle poll interval, days sent messages are kept, and how overdue pending messages may get
+    # before a process without dispatch threads warns that nothing is delivering them
+    OUTBOX_WORKERS = int(os.environ.get('OUTBOX_WORKERS', 2))
+    OUTBOX_BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE', 50))
+    OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', 6))
+    OUTBOX_BACKOFF_SECONDS = int(os.environ.get('OUTBOX_BACKOFF_SECONDS', 30))
+    OUTBOX_LEASE_SECONDS = int(os.environ.get('OUTBOX_LEASE_SECONDS', 300))
+    OUTBOX_POLL_SECONDS = int(os.environ.get('OUTBOX_POLL_SECONDS', 5))
+    OUTBOX_RETENTION_DAYS = int(os.environ.get('OUTBOX_RETENTION_DAYS', 7))
+    OUTBOX_STALE_SECONDS = int(os.environ.get('OUTBOX_STALE_SECONDS', 300))
+    # Notification coalescing: seconds a message is held so others to the same recipient can
+    # be merged into it, and the local hour (0-23) daily email digests go out
+    NOTIFY_COALESCE_SECONDS = int(os.environ.get('NOTIFY_COALESCE_SECONDS', 30))
+    NOTIFY_DIGEST_HOUR = int(os.environ.get('NOTIFY_DIGEST_HOUR', 8))
+
+    # Task archival (`flask archive-tasks`, see tasks/archive.py): days a closed task stays hot,
+    # and top-level tasks (with their subtasks) moved per batch
+    ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', 90))
+    ARCHIVE_BATCH_SIZE = int(os.environ.get('ARCHIVE_BATCH_SIZE', 500))
+
+    # Task access checks (app/access.py): seconds to cache a user's role on a task across requests (0 = per request only)
+    TASK_ACCESS_CACHE_TTL = int(os.environ.get('TASK_ACCESS_CACHE_TTL', 0))
+
     # CORS
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS', '*').split(',')
     
@@ -0,0 +1,62 @@
+"""
+Calendar windows ("today", "this week") in a user's own timezone.
+
+Datetimes are stored as naive UTC, so every window is returned as naive-UTC
+half-open [start, end) bounds. Filtering with column >= start AND column < end
+keeps the predicate sargable, unlike func.date(column) == today.
+"""
+from datetime import datetime, date, time, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import and_
+
+
+def stored_timezone(name):
+    """tzinfo for a saved IANA name (validated when saved); UTC when unset or no longer known."""
+    if name:
+        try:
+            return ZoneInfo(name)
+        except (ZoneInfoNotFoundError, ValueError):
+            pass
+    return timezone.utc
+
+
+def user_timezone(user=None, override=None):
+    """
+    Resolve a tzinfo from an explicit override (e.g. ?tz=) or user.timezone, else UTC.
+    Raises ValueError for an unknown override, so callers can reject it instead of guessing.
+    """
+    if override:
+        try:
+            return ZoneInfo(override)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise ValueError('Unknown timezone')
+    return stored_timezone(getattr(user, 'timezone', None))
+
+
+def _local_today(tz, now=None):
+    now = now or datetime.now(timezone.utc)
+    return now.astimezone(tz).date()
+
+
+def _utc_bound(day: date, tz):
+    """Local midnight at the start of day, as naive UTC."""
+    return datetime.combine(day, time(), tzinfo=tz).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def day_window(tz, days_ahead=0, now=None):
+    """[start, end) of the local day days_ahead from today."""
+    day = _local_today(tz, now) + timedelta(days=days_ahead)
+    return _utc_bound(day, tz), _utc_bound(day + timedelta(days=1), tz)
+
+
+def week_window(tz, now=None):
+    """[start, end) of the local Monday-to-Sunday week containing today."""
+    today = _local_today(tz, now)
+    monday = today - timedelta(days=today.weekday())
+    return _utc_bound(monday, tz), _utc_bound(monday + timedelta(days=7), tz)
+
+
+def in_window(column, window):
+    start, end = window
+    return and_(column >= start, column < end)
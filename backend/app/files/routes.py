@@ -6,6 +6,7 @@ import os
 import uuid
 from werkzeug.utils import secure_filename
 from app.notifications.email_service import send_email
+from app.pagination import page_args, keyset_page
 
 files_bp = Blueprint('files', __name__)
 
@@ -21,14 +22,25 @@ def get_upload_folder():
 @jwt_required()
 def list_files():
     user_id = int(get_jwt_identity())
-    files = StoredFile.query.filter_by(user_id=user_id).order_by(StoredFile.created_at.desc()).all()
-    return jsonify([{
+    query = StoredFile.query.filter_by(user_id=user_id)
+    page = page_args()
+    if page is None:
+        files, next_cursor = query.order_by(StoredFile.created_at.desc()).all(), None
+    else:
+        try:
+            files, next_cursor = keyset_page(query, StoredFile.created_at, StoredFile.id, *page)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+    items = [{
         'id': f.id,
         'original_filename': f.original_filename,
         'content_type': f.content_type,
         'file_size': f.file_size,
         'created_at': f.created_at.isoformat(),
-    } for f in files]), 200
+    } for f in files]
+    if page is None:
+        return jsonify(items), 200
+    return jsonify({'items': items, 'next_cursor': next_cursor}), 200
 
 
 @files_bp.route('', methods=['POST'])
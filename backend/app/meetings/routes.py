@@ -1,4 +1,4 @@
-from flask import Blueprint, request, jsonify, redirect
+from flask import Blueprint, request, jsonify, redirect, make_response
 from app import db
 from app.models import Meeting, Task, User
 from flask_jwt_extended import jwt_required, get_jwt_identity
@@ -7,6 +7,9 @@ import requests
 import base64
 import json
 from app.config import Config
+from app.pagination import page_args, keyset_page
+from app.conditional import watermark, make_etag, not_modified, with_validators
+from sqlalchemy import func
 
 meetings_bp = Blueprint('meetings', __name__)
 
@@ -185,7 +188,26 @@ def get_meetings():
     if task_id:
         query = query.filter_by(task_id=task_id)
     
-    meetings = query.order_by(Meeting.start_time.desc()).all()
+    # Local meetings are only created or deleted; Zoom results are live, so they are never 304'd
+    etag = None
+    if not include_zoom:
+        etag = make_etag(user_id, request.query_string, *watermark(
+            query.with_entities(func.max(Meeting.id)),
+            query.with_entities(func.count(Meeting.id)),
+        ))
+        cached = not_modified(etag)
+        if cached:
+            return cached
+    
+    page = page_args()
+    next_cursor = None
+    if page is None:
+        meetings = query.order_by(Meeting.start_time.desc()).all()
+    else:
+        try:
+            meetings, next_cursor = keyset_page(query, Meeting.start_time, Meeting.id, *page)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
     result = [{
         'id': meeting.id,
         'task_id': meeting.task_id,
@@ -197,8 +219,8 @@ def get_meetings():
         'source': 'local'
     } for meeting in meetings]
     
-    # Fetch Zoom meetings if requested and connected
-    if include_zoom:
+    # Fetch Zoom meetings if requested and connected (first page only when paginating)
+    if include_zoom and (page is None or not page[0]):
         access_token = get_zoom_access_token(user_id)
         if access_token:
             try:
@@ -221,7 +243,11 @@ def get_meetings():
             except:
                 pass
     
-    return jsonify(result), 200
+    body = result if page is None else {'items': result, 'next_cursor': next_cursor}
+    response = make_response(jsonify(body), 200)
+    if etag:
+        with_validators(response, etag)
+    return response
 
 @meetings_bp.route('', methods=['POST'])
 @jwt_required()
@@ -281,14 +307,14 @@ def create_meeting():
     )
     
     db.session.add(meeting)
-    db.session.commit()
     
-    # If linked to a task, notify assignee
+    # If linked to a task, notify assignee (outbox rows commit with the meeting)
     if meeting.task_id:
         task = Task.query.get(meeting.task_id)
         if task:
             from app.notifications.service import NotificationService
             NotificationService.create_meeting_scheduled_notification(meeting, task.assignee_id)
+    db.session.commit()
     
     return jsonify({
         'id': meeting.id,
@@ -397,11 +423,11 @@ def create_task_meeting(task_id):
     )
     
     db.session.add(meeting)
-    db.session.commit()
     
-    # Notify assignee
+    # Notify assignee (outbox rows commit with the meeting)
     from app.notifications.service import NotificationService
     NotificationService.create_meeting_scheduled_notification(meeting, task.assignee_id)
+    db.session.commit()
     
     return jsonify({
         'id': meeting.id,
@@ -82,6 +82,8 @@ class User(db.Model):
     outlook_calendar_token = db.Column(db.Text)
     zoom_token = db.Column(db.Text)
     gmail_token = db.Column(db.Text)
+    timezone = db.Column(db.String(64), nullable=True)  # IANA name, e.g. "Africa/Nairobi"; UTC when unset
+    notification_digest = db.Column(db.String(10), nullable=True, default='immediate')  # immediate, hourly, daily (email)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -102,7 +104,8 @@ class Task(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
-    description = db.Column(db.Text)
+    # Large text columns are deferred: list queries only load them when asked (see tasks/fields.py)
+    description = db.deferred(db.Column(db.Text), group='text')
     assignee_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     created_by_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     workspace_id = db.Column(db.Integer, db.ForeignKey('workspaces.id'), nullable=True)
@@ -118,18 +121,36 @@ class Task(db.Model):
     recurrence_type = db.Column(db.Enum(RecurrenceType), nullable=True)
     recurrence_config = db.Column(db.Text)  # JSON config for recurrence
     next_occurrence = db.Column(db.DateTime, nullable=True)
+    # Set on instances generated from a recurring task (see tasks/recurrence.py). No FK, so the
+    # subtasks relationship keeps a single self-referencing foreign key and instances outlive the series.
+    recurrence_source_id = db.Column(db.Integer, nullable=True)
+    occurrence_at = db.Column(db.DateTime, nullable=True)
     estimated_hours = db.Column(db.Float, nullable=True)
     actual_hours = db.Column(db.Float, default=0.0)
-    notes = db.Column(db.Text, nullable=True)  # Free-form notes on the task
+    notes = db.deferred(db.Column(db.Text, nullable=True), group='text')  # Free-form notes on the task
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Indexes follow the hot predicates: list views filter on assignee/creator/workspace and sort
+    # by created_at; counts and reports filter assignee + status; /due-today ranges due_date per assignee.
+    __table_args__ = (
+        db.Index('ix_tasks_assignee_status', 'assignee_id', 'status'),
+        db.Index('ix_tasks_assignee_due_date', 'assignee_id', 'due_date'),
+        db.Index('ix_tasks_created_by_created_at', 'created_by_id', 'created_at'),
+        db.Index('ix_tasks_workspace_created_at', 'workspace_id', 'created_at'),
+        db.Index('ix_tasks_parent_task_id', 'parent_task_id'),
+        db.Index('ix_tasks_next_occurrence', 'next_occurrence'),
+        db.Index('ix_tasks_status_updated_at', 'status', 'updated_at'),  # Archival candidates
+        # One instance per series per occurrence, however many schedulers race to create it
+        db.Index('ux_tasks_recurrence_occurrence', 'recurrence_source_id', 'occurrence_at', unique=True),
+    )
+    
     # Relationships
     comments = db.relationship('Comment', backref='task', lazy='dynamic', cascade='all, delete-orphan', order_by='Comment.created_at')
     meetings = db.relationship('Meeting', backref='task', lazy='dynamic', cascade='all, delete-orphan')
-    activities = db.relationship('TaskActivity', backref='task', lazy='dynamic', order_by='TaskActivity.created_at.desc()')
-    dependencies = db.relationship('TaskDependency', foreign_keys='TaskDependency.task_id', backref='task', lazy='dynamic')
-    dependents = db.relationship('TaskDependency', foreign_keys='TaskDependency.depends_on_id', backref='depends_on_task', lazy='dynamic')
+    activities = db.relationship('TaskActivity', backref='task', lazy='dynamic', cascade='all, delete-orphan', order_by='TaskActivity.created_at.desc()')
+    dependencies = db.relationship('TaskDependency', foreign_keys='TaskDependency.task_id', backref='task', lazy='dynamic', cascade='all, delete-orphan')
+    dependents = db.relationship('TaskDependency', foreign_keys='TaskDependency.depends_on_id', backref='depends_on_task', lazy='dynamic', cascade='all, delete-orphan')
     subtasks = db.relationship('Task', remote_side=[id], backref='parent_task', lazy='select')
     
     def __repr__(self):
@@ -175,11 +196,54 @@ class TaskActivity(db.Model):
     activity_type = db.Column(db.String(50), nullable=False)  # created, updated, status_changed, commented, etc.
     description = db.Column(db.Text, nullable=False)
     activity_metadata = db.Column(db.Text)  # JSON for additional data (renamed from metadata - reserved keyword)
+    workspace_id = db.Column(db.Integer, db.ForeignKey('workspaces.id'), nullable=True)  # Copied from the task for the workspace feed
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_task_activities_task_created_at', 'task_id', 'created_at'),
+        db.Index('ix_task_activities_workspace_feed', 'workspace_id', 'created_at', 'id'),
+        db.Index('ix_task_activities_workspace_type_feed', 'workspace_id', 'activity_type', 'created_at', 'id'),
+    )
+    
     def __repr__(self):
         return f'<TaskActivity {self.activity_type}>'
 
+class TaskChange(db.Model):
+    """Append-only change log behind GET /api/tasks/changes; id is the sync sequence."""
+    __tablename__ = 'task_changes'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    task_id = db.Column(db.Integer, nullable=False)  # No FK: tombstones outlive the task row
+    workspace_id = db.Column(db.Integer, nullable=True)
+    assignee_id = db.Column(db.Integer, nullable=True)
+    previous_assignee_id = db.Column(db.Integer, nullable=True)  # Set on reassignment so the old assignee sees the task leave
+    created_by_id = db.Column(db.Integer, nullable=True)
+    deleted = db.Column(db.Boolean, default=False, nullable=False)
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_task_changes_assignee_id', 'assignee_id', 'id'),
+        db.Index('ix_task_changes_previous_assignee_id', 'previous_assignee_id', 'id'),
+        db.Index('ix_task_changes_created_by_id', 'created_by_id', 'id'),
+    )
+    
+    def __repr__(self):
+        return f'<TaskChange {self.id} task={self.task_id}>'
+
+class TaskCounter(db.Model):
+    """Live task count per (workspace, assignee, status), kept by tasks/counters.py; workspace_id 0 = no workspace."""
+    __tablename__ = 'task_counters'
+    
+    workspace_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    assignee_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    status = db.Column(db.Enum(TaskStatus), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    
+    __table_args__ = (db.Index('ix_task_counters_assignee_id', 'assignee_id'),)
+    
+    def __repr__(self):
+        return f'<TaskCounter {self.workspace_id}/{self.assignee_id}/{self.status} = {self.count}>'
+
 class Comment(db.Model):
     __tablename__ = 'comments'
     
@@ -192,6 +256,11 @@ class Comment(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_comments_task_created_at', 'task_id', 'created_at'),
+        db.Index('ix_comments_parent_comment_id', 'parent_comment_id'),
+    )
+    
     # Relationships
     replies = db.relationship('Comment', backref=db.backref('parent_comment', remote_side=[id]), lazy='dynamic')
     
@@ -213,6 +282,8 @@ class Meeting(db.Model):
     source = db.Column(db.String(50), nullable=True)  # 'Local', 'Zoom', 'Google Calendar'
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (db.Index('ix_meetings_user_start_time', 'user_id', 'start_time'),)
+    
     def __repr__(self):
         return f'<Meeting {self.topic}>'
 
@@ -227,10 +298,38 @@ class Notification(db.Model):
     read = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (db.Index('ix_notifications_user_read_created_at', 'user_id', 'read', 'created_at'),)
+    
     def __repr__(self):
         return f'<Notification {self.title}>'
 
 
+class NotificationOutbox(db.Model):
+    """Email/push/SMS waiting to be delivered by the outbox workers (see notifications/outbox.py)."""
+    __tablename__ = 'notification_outbox'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    channel = db.Column(db.String(10), nullable=False)  # email, push, sms
+    recipient = db.Column(db.String(255), nullable=False)  # Email address, FCM token or phone number
+    subject = db.Column(db.String(255))  # Email subject / push title
+    body = db.Column(db.Text, nullable=False)
+    data = db.Column(db.Text)  # JSON push data
+    digest = db.Column(db.String(10), nullable=True)  # hourly/daily when held for the recipient's digest
+    status = db.Column(db.String(10), nullable=False, default='pending')  # pending, sending, sent, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    claimed_by = db.Column(db.String(32), nullable=True)
+    lease_until = db.Column(db.DateTime, nullable=True)  # A crashed worker's claim lapses after this
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+    
+    __table_args__ = (db.Index('ix_notification_outbox_status_next_attempt_at', 'status', 'next_attempt_at'),)
+    
+    def __repr__(self):
+        return f'<NotificationOutbox {self.channel} {self.status}>'
+
+
 class TaskAttachment(db.Model):
     __tablename__ = 'task_attachments'
     
@@ -240,6 +339,8 @@ class TaskAttachment(db.Model):
     uploaded_by_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (db.Index('ix_task_attachments_task_id', 'task_id'),)
+    
     task = db.relationship('Task', backref=db.backref('attachments', lazy='dynamic', cascade='all, delete-orphan'))
     stored_file = db.relationship('StoredFile', backref=db.backref('task_attachments', lazy='dynamic'))
     uploaded_by = db.relationship('User', backref=db.backref('task_uploads', lazy='dynamic'))
@@ -315,3 +416,25 @@ class WhiteboardDocument(db.Model):
     
     def __repr__(self):
         return f'<WhiteboardDocument whiteboard={self.whiteboard_id} file={self.stored_file_id}>'
+
+
+def _archive_table(model, *index_columns):
+    """
+    Cold copy of a task table for archived tasks (see tasks/archive.py): the same columns
+    without foreign keys, defaults or unique constraints, so rows move back unchanged.
+    """
+    source = model.__table__
+    name = f'archived_{source.name}'
+    columns = [db.Column(c.name, c.type.copy(), primary_key=c.primary_key, nullable=c.nullable) for c in source.columns]
+    if model is Task:
+        columns.append(db.Column('archived_at', db.DateTime, nullable=False))
+    indexes = [db.Index(f'ix_{name}_{"_".join(cols)}', *cols) for cols in index_columns]
+    return db.Table(name, db.metadata, *columns, *indexes)
+
+
+archived_tasks = _archive_table(Task, ('assignee_id', 'archived_at'), ('created_by_id', 'archived_at'), ('parent_task_id',))
+archived_comments = _archive_table(Comment, ('task_id',))
+archived_task_activities = _archive_table(TaskActivity, ('task_id',))
+archived_task_attachments = _archive_table(TaskAttachment, ('task_id',))
+archived_task_collaborators = _archive_table(TaskCollaborator, ('task_id',), ('user_id',))
+archived_task_dependencies = _archive_table(TaskDependency, ('task_id',), ('depends_on_id',))
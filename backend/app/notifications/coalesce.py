@@ -0,0 +1,92 @@
+"""
+Coalescing and digests for outbox messages.
+
+A single task update can stage several messages for the same person (notes, assignee,
+due date and status each have their own email). Instead of going out at once, staged
+messages are held for NOTIFY_COALESCE_SECONDS; when the first one for a recipient falls
+due, the dispatcher claims every other fresh message held for that recipient on the same
+channel and sends them as one (see outbox._claim / _deliver).
+
+Users who chose an hourly or daily digest (users.notification_digest) have their email
+held until the top of the next hour, or until NOTIFY_DIGEST_HOUR in their own timezone,
+and get everything since as one email. Push and SMS are only coalesced, never digested.
+"""
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+from sqlalchemy import select
+
+from app.dates import stored_timezone
+from app.models import User
+from app.notifications import email_templates
+
+DIGEST_MODES = ('immediate', 'hourly', 'daily')
+
+# Longest push body and SMS text a merged message is cut to
+PUSH_BODY_MAX = 240
+SMS_BODY_MAX = 1600
+
+
+def digest_release(mode, tz, now):
+    """When a digest started now goes out (naive UTC): the next top of the hour, or the next local digest hour."""
+    if mode == 'hourly':
+        return now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    hour = current_app.config.get('NOTIFY_DIGEST_HOUR', 8)
+    local = now.replace(tzinfo=timezone.utc).astimezone(tz)
+    release = local.replace(hour=hour, minute=0, second=0, microsecond=0)
+    if release <= local:
+        release += timedelta(days=1)
+    return release.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def schedule(session, rows, now):
+    """Set next_attempt_at (and digest) on staged outbox rows, with one user lookup for all of their emails."""
+    window = timedelta(seconds=current_app.config.get('NOTIFY_COALESCE_SECONDS', 30))
+    for row in rows:
+        row['next_attempt_at'] = now + window
+    emails = {row['recipient'] for row in rows if row['channel'] == 'email'}
+    if not emails:
+        return
+    preferences = {
+        email: (mode, tz_name)
+        for email, mode, tz_name in session.execute(
+            select(User.email, User.notification_digest, User.timezone)
+            .where(User.email.in_(emails), User.notification_digest.in_(('hourly', 'daily')))
+        )
+    }
+    for row in rows:
+        if row['channel'] == 'email' and row['recipient'] in preferences:
+            mode, tz_name = preferences[row['recipient']]
+            row['digest'] = mode
+            row['next_attempt_at'] = digest_release(mode, stored_timezone(tz_name), now)
+
+
+class Merged:
+    """Several outbox rows for one recipient, shaped like a single row for the deliverers."""
+    __slots__ = ('recipient', 'subject', 'body', 'data')
+
+    def __init__(self, recipient, subject, body, data=None):
+        self.recipient = recipient
+        self.subject = subject
+        self.body = body
+        self.data = data
+
+
+def merge(channel, rows):
+    """One Merged message carrying every row (oldest first) for the same channel and recipient."""
+    rows = sorted(rows, key=lambda row: row.id)
+    recipient = rows[0].recipient
+    if channel == 'email':
+        digest = next((row.digest for row in rows if row.digest), None)
+        subject, body = email_templates.coalesced_updates([(row.subject, row.body) for row in rows], digest)
+        return Merged(recipient, subject, body)
+    if channel == 'push':
+        body = '; '.join(row.subject or row.body for row in rows)
+        if len(body) > PUSH_BODY_MAX:
+            body = body[:PUSH_BODY_MAX - 1] + '…'
+        data = {row.data for row in rows}
+        return Merged(recipient, f'{len(rows)} updates', body, data.pop() if len(data) == 1 else None)
+    body = '\n'.join(row.body for row in rows)
+    if len(body) > SMS_BODY_MAX:
+        body = body[:SMS_BODY_MAX - 1] + '…'
+    return Merged(recipient, None, body)
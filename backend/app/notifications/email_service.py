@@ -1,5 +1,15 @@
-"""Send emails via SMTP. Configure MAIL_* in .env. Supports Gmail, SendGrid, etc."""
+"""
+Send emails via SMTP. Configure MAIL_* in .env. Supports Gmail, SendGrid, etc.
+
+Connections are pooled per process: a session is opened (and STARTTLS/login done) once
+and reused by later sends from any thread, up to MAIL_POOL_SIZE sessions at a time.
+A session is retired after MAIL_MAX_MESSAGES_PER_SESSION messages (providers cap this)
+or MAIL_POOL_IDLE_SECONDS unused (servers drop idle clients); one found dropped mid-send
+is replaced and the message retried once. send_many() sends a batch over one session.
+"""
 import smtplib
+import threading
+import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
@@ -8,30 +18,25 @@ from email import encoders
 from app.config import Config
 
 
-def send_email(to_email: str, subject: str, body: str, attachments=None):
-    """
-    Send an email. attachments: list of (filename, bytes, content_type).
-    Returns (True, None) on success, (False, error_message) on failure.
-    """
-    if Config.MAIL_SUPPRESS_SEND:
-        if Config.MAIL_DEBUG:
-            print(f"[MAIL_SUPPRESS_SEND] Would send to {to_email}: {subject}")
-        return True, None
-    if not Config.MAIL_USERNAME or not Config.MAIL_PASSWORD:
-        return False, "Email is not configured. Set MAIL_USERNAME and MAIL_PASSWORD in .env"
-    attachments = attachments or []
-    try:
-        msg = MIMEMultipart()
-        msg["From"] = Config.MAIL_DEFAULT_SENDER or Config.MAIL_USERNAME
-        msg["To"] = to_email
-        msg["Subject"] = subject
-        msg.attach(MIMEText(body, "plain"))
-        for filename, data, ctype in attachments:
-            part = MIMEBase("application", "octet-stream")
-            part.set_payload(data)
-            encoders.encode_base64(part)
-            part.add_header("Content-Disposition", "attachment", filename=filename)
-            msg.attach(part)
+def _build_message(to_email, subject, body, attachments=None):
+    msg = MIMEMultipart()
+    msg["From"] = Config.MAIL_DEFAULT_SENDER or Config.MAIL_USERNAME
+    msg["To"] = to_email
+    msg["Subject"] = subject
+    msg.attach(MIMEText(body, "plain"))
+    for filename, data, ctype in attachments or []:
+        part = MIMEBase("application", "octet-stream")
+        part.set_payload(data)
+        encoders.encode_base64(part)
+        part.add_header("Content-Disposition", "attachment", filename=filename)
+        msg.attach(part)
+    return msg
+
+
+class _Session:
+    __slots__ = ('server', 'sent', 'last_used')
+
+    def __init__(self):
         if Config.MAIL_USE_SSL:
             server = smtplib.SMTP_SSL(Config.MAIL_SERVER, Config.MAIL_PORT, timeout=Config.MAIL_TIMEOUT)
         else:
@@ -40,9 +45,145 @@ def send_email(to_email: str, subject: str, body: str, attachments=None):
             if Config.MAIL_USE_TLS and not Config.MAIL_USE_SSL:
                 server.starttls()
             server.login(Config.MAIL_USERNAME, Config.MAIL_PASSWORD)
-            server.send_message(msg)
+        except Exception:
+            server.close()
+            raise
+        self.server = server
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+    def close(self):
+        try:
+            self.server.quit()
+        except Exception:
+            self.server.close()
+
+
+class SMTPPool:
+    """Authenticated SMTP sessions shared by every thread in the process."""
+
+    def __init__(self):
+        self._idle = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max(Config.MAIL_POOL_SIZE, 1))
+
+    def _acquire(self):
+        """An open session (reused when fresh, else new); the caller holds a pool slot."""
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                session = self._idle.pop() if self._idle else None
+            if session is None:
+                return _Session()
+            if now - session.last_used < Config.MAIL_POOL_IDLE_SECONDS:
+                return session
+            session.close()
+
+    def _release(self, session):
+        if session.sent >= Config.MAIL_MAX_MESSAGES_PER_SESSION:
+            session.close()
+            return
+        session.last_used = time.monotonic()
+        with self._lock:
+            self._idle.append(session)
+
+    def send_many(self, messages):
+        """Send MIME messages over one pooled session. Returns one (ok, error) per message, in order."""
+        messages = list(messages)
+        results = []
+        self._slots.acquire()
+        session = None
+        retried = False
+        try:
+            while len(results) < len(messages):
+                msg = messages[len(results)]
+                if session is not None and session.sent >= Config.MAIL_MAX_MESSAGES_PER_SESSION:
+                    session.close()
+                    session = None
+                if session is None:
+                    try:
+                        session = self._acquire()
+                    except Exception as e:
+                        # Cannot connect or log in: nothing else in the batch will get through either
+                        results += [(False, str(e))] * (len(messages) - len(results))
+                        break
+                dropped = None
+                # SMTPException subclasses OSError, so the order of these clauses matters
+                try:
+                    session.server.send_message(msg)
+                except smtplib.SMTPServerDisconnected as e:
+                    dropped = e
+                except smtplib.SMTPException as e:
+                    # Refused by the server (e.g. a bad recipient); the session itself is still usable
+                    results.append((False, str(e)))
+                except OSError as e:
+                    dropped = e
+                else:
+                    session.sent += 1
+                    results.append((True, None))
+                if dropped is not None:
+                    # The connection is gone: retry the message once on another session
+                    session.server.close()
+                    session = None
+                    if not retried:
+                        retried = True
+                        continue
+                    results.append((False, str(dropped)))
+                retried = False
         finally:
-            server.quit()
+            if session is not None:
+                self._release(session)
+            self._slots.release()
+        return results
+
+    def close_all(self):
+        """Close every idle session (e.g. on shutdown)."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for session in idle:
+            session.close()
+
+
+_pool = SMTPPool()
+
+
+def _unavailable():
+    """(ok, error) when mail is suppressed or not configured, else None."""
+    if Config.MAIL_SUPPRESS_SEND:
         return True, None
-    except Exception as e:
-        return False, str(e)
+    if not Config.MAIL_USERNAME or not Config.MAIL_PASSWORD:
+        return False, "Email is not configured. Set MAIL_USERNAME and MAIL_PASSWORD in .env"
+    return None
+
+
+def send_many(messages):
+    """
+    Send several emails over one SMTP session. messages: iterable of
+    (to_email, subject, body) or (to_email, subject, body, attachments).
+    Returns one (ok, error) per message, in order.
+    """
+    messages = list(messages)
+    skipped = _unavailable()
+    if skipped is not None:
+        if Config.MAIL_SUPPRESS_SEND and Config.MAIL_DEBUG:
+            for message in messages:
+                print(f"[MAIL_SUPPRESS_SEND] Would send to {message[0]}: {message[1]}")
+        return [skipped] * len(messages)
+    results = [None] * len(messages)
+    built = []
+    for i, message in enumerate(messages):
+        try:
+            built.append((i, _build_message(*message)))
+        except Exception as e:
+            results[i] = (False, str(e))
+    for (i, _), result in zip(built, _pool.send_many([msg for _, msg in built])):
+        results[i] = result
+    return results
+
+
+def send_email(to_email: str, subject: str, body: str, attachments=None):
+    """
+    Send an email. attachments: list of (filename, bytes, content_type).
+    Returns (True, None) on success, (False, error_message) on failure.
+    """
+    return send_many([(to_email, subject, body, attachments)])[0]
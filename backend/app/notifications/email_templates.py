@@ -11,6 +11,9 @@ Where mail is sent (all via send_email in email_service.py):
   • Comment added       → service.send_comment_added_emails       (assignee + creator, excl. commenter)
   • Mention in comment  → service.send_mention_email              (mentioned user)
   • Meeting scheduled   → service.send_meeting_scheduled_email     (attendee)
+  • Bulk task changes   → service.send_bulk_task_notifications     (one summary per affected user)
+  • Several of the above for one person close together, or a digest → coalesced_updates
+    (merged by the outbox dispatcher, see coalesce.py)
   • User composes mail → app/mail/routes.py, app/files/routes.py  (no templates)
 """
 
@@ -223,3 +226,35 @@ def meeting_scheduled(attendee_name: str, meeting_topic: str, start_time_str: st
         body += f"\nJoin: {join_url}\n"
     body += "\nAdd it to your calendar in HSEA Assistant."
     return subject, body
+
+
+# ---- Bulk task changes (POST /api/tasks/bulk) ----
+def bulk_task_changes(recipient_name: str, updated_by_name: str, lines):
+    count = len(lines)
+    subject = f"{count} task update{'s' if count != 1 else ''} from {updated_by_name}"
+    body = (
+        f"Hi {recipient_name},\n\n"
+        f"{updated_by_name} made these changes to your tasks:\n\n"
+        + "\n".join(f"  • {line}" for line in lines)
+        + "\n\nView them in your HSEA Assistant dashboard."
+    )
+    return subject, body
+
+
+# ---- Coalesced updates and digests (notifications/coalesce.py) ----
+def coalesced_updates(messages, digest=None):
+    """messages: [(subject, body), ...] oldest first, all to one person; digest: 'hourly', 'daily' or None."""
+    count = len(messages)
+    greeting = None
+    sections = []
+    for subject, body in messages:
+        first, _, rest = body.partition("\n\n")
+        if first.startswith("Hi ") and rest:
+            greeting = greeting or first
+            body = rest
+        sections.append(f"— {subject} —\n{body}")
+    updates = f"{count} update{'s' if count != 1 else ''}"
+    subject = f"Your {digest} digest: {updates}" if digest else f"{updates}: {messages[0][0]}" + (" and more" if count > 1 else "")
+    intro = f"Here is your {digest} digest of {updates}." if digest else f"You have {updates}."
+    body = (f"{greeting}\n\n" if greeting else "") + intro + "\n\n" + "\n\n".join(sections)
+    return subject, body
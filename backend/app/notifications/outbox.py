@@ -0,0 +1,325 @@
+"""
+Notification outbox.
+
+NotificationService never talks to SMTP, FCM or Twilio inside a request: enqueue_email(),
+enqueue_push() and enqueue_sms() stage messages on the session, and the next commit
+writes them all with one multi-row INSERT in the same transaction as the change that
+caused them (a rollback discards them). Rows are held briefly, or until the recipient's
+digest is due, so bursts can be merged (see coalesce.py). Dispatch workers drain the
+table in three steps:
+
+- claim: up to OUTBOX_BATCH_SIZE due rows, plus every fresh row held for the same
+  recipients and channels, are stamped with a claim id and a lease by one conditional
+  UPDATE (candidates read with FOR UPDATE SKIP LOCKED on PostgreSQL), so each row goes to
+  one worker; rows held by a worker that died are picked up once the lease lapses.
+- deliver: rows for the same recipient and channel are merged into one message, and each
+  channel's deliverer gets that channel's messages and returns an (ok, error) per message.
+  Nothing is sent inside a transaction.
+- settle: delivered rows are marked sent; failures are retried with exponential backoff
+  and jitter, and marked failed with their last error after OUTBOX_MAX_ATTEMPTS (at once
+  when the deliverer reports the recipient as permanently invalid).
+
+Each serving process (run.py, or gunicorn workers via BACKGROUND_WORKERS_ENABLED; or one
+`flask run-workers` process beside them) runs OUTBOX_WORKERS daemon threads, woken as soon
+as a commit in the same process adds outbox rows and otherwise polling every
+OUTBOX_POLL_SECONDS. `flask dispatch-notifications` drains the outbox once (e.g. with
+OUTBOX_WORKERS=0 and cron). A process without dispatch threads that adds rows logs a
+warning, at most once a minute, while due messages have waited past OUTBOX_STALE_SECONDS.
+"""
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from sqlalchemy import event, select, insert, update, delete, or_, and_, bindparam, tuple_
+
+from app import db
+from app.config import Config
+from app.models import NotificationOutbox
+from app.notifications.coalesce import schedule, merge
+from app.notifications.email_service import send_many as send_emails
+from app.notifications.push_service import send_push_many
+from app.notifications.sms_service import send_sms_many
+
+_wakeup = threading.Event()
+_local_workers = 0
+_last_stale_check = 0.0
+
+
+def _channel_enabled(channel):
+    """Whether a channel is configured at all; messages for unconfigured channels are dropped, as before."""
+    if channel == 'email':
+        return Config.MAIL_SUPPRESS_SEND or bool(Config.MAIL_USERNAME and Config.MAIL_PASSWORD)
+    if channel == 'push':
+        return bool(Config.FIREBASE_CREDENTIALS_PATH and os.path.exists(Config.FIREBASE_CREDENTIALS_PATH))
+    if channel == 'sms':
+        return bool(Config.TWILIO_ACCOUNT_SID and Config.TWILIO_AUTH_TOKEN and Config.TWILIO_PHONE_NUMBER)
+    return False
+
+
+def enqueue(channel, recipient, body, subject=None, data=None):
+    """Stage one message for the current transaction (the caller commits). Returns False if it was dropped."""
+    if not recipient or not _channel_enabled(channel):
+        return False
+    now = datetime.utcnow()
+    db.session.info.setdefault('outbox', []).append({
+        'channel': channel,
+        'recipient': recipient,
+        'subject': subject,
+        'body': body,
+        'data': json.dumps(data) if data else None,
+        'digest': None,
+        'status': 'pending',
+        'attempts': 0,
+        'next_attempt_at': now,
+        'created_at': now,
+    })
+    return True
+
+
+def enqueue_email(to_email: str, subject: str, body: str):
+    return enqueue('email', to_email, body, subject=subject)
+
+
+def enqueue_push(fcm_token: str, title: str, body: str, data: dict = None):
+    return enqueue('push', fcm_token, body, subject=title, data=data)
+
+
+def enqueue_sms(to_phone: str, message: str):
+    return enqueue('sms', to_phone, message)
+
+
+@event.listens_for(db.session, 'before_commit')
+def _write_staged(session):
+    rows = session.info.pop('outbox', None)
+    if rows:
+        schedule(session, rows, datetime.utcnow())
+        session.execute(insert(NotificationOutbox), rows)
+        session.info['outbox_written'] = True
+
+
+@event.listens_for(db.session, 'after_commit')
+def _wake_workers(session):
+    if session.info.pop('outbox_written', False):
+        _wakeup.set()
+        if not _local_workers:
+            _warn_if_undelivered()
+
+
+def _warn_if_undelivered():
+    """Nothing in this process delivers outbox rows; warn if nothing anywhere else seems to either."""
+    global _last_stale_check
+    if time.monotonic() - _last_stale_check < 60:
+        return
+    _last_stale_check = time.monotonic()
+    stale = current_app.config.get('OUTBOX_STALE_SECONDS', 300)
+    try:
+        # The session is committed and cannot emit SQL here, so ask on a connection of its own
+        with db.engine.connect() as conn:
+            oldest = conn.execute(
+                select(NotificationOutbox.next_attempt_at)
+                .where(NotificationOutbox.status == 'pending')
+                .order_by(NotificationOutbox.next_attempt_at)
+                .limit(1)
+            ).scalar()
+    except Exception as e:
+        current_app.logger.warning("Could not check the notification outbox: %s", e)
+        return
+    if oldest is not None and oldest < datetime.utcnow() - timedelta(seconds=stale):
+        current_app.logger.warning(
+            "Notification outbox has messages due since %s but no dispatch worker is delivering them; "
+            "set BACKGROUND_WORKERS_ENABLED=true or run `flask run-workers`", oldest.isoformat())
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_staged(session):
+    session.info.pop('outbox', None)
+    session.info.pop('outbox_written', None)
+
+
+def _deliver_email(rows):
+    return send_emails((row.recipient, row.subject or '', row.body) for row in rows)
+
+
+def _deliver_push(rows):
+    return send_push_many((row.recipient, row.subject or '', row.body, json.loads(row.data) if row.data else None) for row in rows)
+
+
+def _deliver_sms(rows):
+    return send_sms_many((row.recipient, row.body) for row in rows)
+
+
+# channel -> deliverer(rows) returning one (ok, error) per row, in order; ok None means
+# the message can never be delivered (e.g. a dead push token), so it fails without retries,
+# and (False, error, retry_after) puts it back for retry_after seconds without using an attempt
+DELIVERERS = {
+    'email': _deliver_email,
+    'push': _deliver_push,
+    'sms': _deliver_sms,
+}
+
+
+def _claim(batch_size, lease_seconds):
+    """Claim up to batch_size due rows for this worker and commit the claim. Returns (claim_id, rows)."""
+    table = NotificationOutbox.__table__
+    now = datetime.utcnow()
+    claim_id = uuid.uuid4().hex
+    due = or_(
+        and_(table.c.status == 'pending', table.c.next_attempt_at <= now),
+        and_(table.c.status == 'sending', table.c.lease_until < now),
+    )
+    candidates = (
+        select(table.c.id, table.c.channel, table.c.recipient).where(due)
+        .order_by(table.c.next_attempt_at, table.c.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    found = db.session.execute(candidates).all()
+    ids = [row.id for row in found]
+    rows = []
+    if ids:
+        # Pull in messages still being held for the same recipients, so they go out merged
+        held = and_(table.c.status == 'pending', table.c.attempts == 0)
+        ids += [row.id for row in db.session.execute(
+            select(table.c.id).where(
+                held,
+                tuple_(table.c.channel, table.c.recipient).in_(list({(row.channel, row.recipient) for row in found})),
+                table.c.id.not_in(ids),
+            ).with_for_update(skip_locked=True)
+        )]
+        # Re-checking `due` makes the UPDATE the arbiter when two workers picked the same candidates
+        db.session.execute(
+            update(table).where(table.c.id.in_(ids), or_(due, held)).values(
+                status='sending', claimed_by=claim_id, lease_until=now + timedelta(seconds=lease_seconds),
+                attempts=table.c.attempts + 1,
+            )
+        )
+        rows = db.session.execute(select(table).where(table.c.claimed_by == claim_id)).all()
+    db.session.commit()
+    return claim_id, rows
+
+
+def _deliver(rows):
+    """{row id: (ok, error)} for rows, merged per recipient and grouped by channel."""
+    groups = {}
+    for row in rows:
+        groups.setdefault((row.channel, row.recipient), []).append(row)
+    by_channel = {}
+    for (channel, _), group in groups.items():
+        message = group[0] if len(group) == 1 else merge(channel, group)
+        by_channel.setdefault(channel, []).append((message, group))
+    results = {}
+    for channel, messages in by_channel.items():
+        deliverer = DELIVERERS.get(channel)
+        try:
+            if deliverer is None:
+                raise ValueError(f'Unknown channel {channel!r}')
+            outcomes = deliverer([message for message, _ in messages])
+        except Exception as e:
+            outcomes = [(False, str(e))] * len(messages)
+        for (_, group), outcome in zip(messages, outcomes):
+            for row in group:
+                results[row.id] = outcome
+    return results
+
+
+def _retry_delay(attempts, base_seconds):
+    """Exponential backoff (base, 2x base, 4x base ...) capped at an hour, with +/-20% jitter."""
+    return min(base_seconds * 2 ** (attempts - 1), 3600) * random.uniform(0.8, 1.2)
+
+
+def _settle(claim_id, rows, results):
+    table = NotificationOutbox.__table__
+    now = datetime.utcnow()
+    max_attempts = current_app.config.get('OUTBOX_MAX_ATTEMPTS', 6)
+    backoff = current_app.config.get('OUTBOX_BACKOFF_SECONDS', 30)
+    sent, retry, failed = [], [], []
+    for row in rows:
+        ok, error, *deferred = results.get(row.id, (False, 'Not delivered'))
+        if ok:
+            sent.append({'b_id': row.id})
+        elif deferred:
+            retry.append({'b_id': row.id, 'b_error': error, 'b_next': now + timedelta(seconds=deferred[0]), 'b_used': 0})
+        elif ok is None or row.attempts >= max_attempts:
+            failed.append({'b_id': row.id, 'b_error': error})
+        else:
+            retry.append({'b_id': row.id, 'b_error': error, 'b_next': now + timedelta(seconds=_retry_delay(row.attempts, backoff)), 'b_used': 1})
+    # Only settle rows this worker still holds
+    mine = and_(table.c.id == bindparam('b_id'), table.c.claimed_by == claim_id)
+    if sent:
+        db.session.execute(update(table).where(mine).values(status='sent', sent_at=now, lease_until=None, last_error=None), sent)
+    if retry:
+        # A deferred row gives back the attempt its claim counted
+        db.session.execute(update(table).where(mine).values(
+            status='pending', next_attempt_at=bindparam('b_next'), lease_until=None, last_error=bindparam('b_error'),
+            attempts=table.c.attempts - 1 + bindparam('b_used')), retry)
+    if failed:
+        db.session.execute(update(table).where(mine).values(status='failed', lease_until=None, last_error=bindparam('b_error')), failed)
+    db.session.commit()
+    return len(sent), len(retry), len(failed)
+
+
+def dispatch_once(batch_size=None):
+    """Claim, deliver and settle one batch. Returns the number of messages handled."""
+    batch_size = batch_size or current_app.config.get('OUTBOX_BATCH_SIZE', 50)
+    lease = current_app.config.get('OUTBOX_LEASE_SECONDS', 300)
+    claim_id, rows = _claim(batch_size, lease)
+    if not rows:
+        return 0
+    _settle(claim_id, rows, _deliver(rows))
+    return len(rows)
+
+
+def purge_sent(older_than_days=None):
+    """Delete sent messages older than OUTBOX_RETENTION_DAYS. Returns the number deleted."""
+    days = older_than_days if older_than_days is not None else current_app.config.get('OUTBOX_RETENTION_DAYS', 7)
+    table = NotificationOutbox.__table__
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    deleted = db.session.execute(delete(table).where(table.c.status == 'sent', table.c.sent_at < cutoff)).rowcount
+    db.session.commit()
+    return deleted
+
+
+def _run_worker(app):
+    poll = app.config.get('OUTBOX_POLL_SECONDS', 5)
+    last_purge = 0.0
+    while True:
+        with app.app_context():
+            try:
+                handled = dispatch_once()
+                if time.monotonic() - last_purge > 3600:
+                    purge_sent()
+                    last_purge = time.monotonic()
+            except Exception as e:
+                db.session.rollback()
+                handled = 0
+                print(f"[Outbox] Dispatch failed: {e}")
+        if not handled:
+            _wakeup.wait(poll)
+            _wakeup.clear()
+
+
+def register_outbox(app):
+    @app.cli.command('dispatch-notifications')
+    def dispatch_notifications_command():
+        """Deliver every due outbox message once, then purge old sent ones (for cron)."""
+        total = 0
+        while True:
+            handled = dispatch_once()
+            if not handled:
+                break
+            total += handled
+        click.echo(f"Dispatched {total} message(s), purged {purge_sent()}")
+
+
+def start_outbox_workers(app):
+    """Start OUTBOX_WORKERS dispatch threads; claims make it safe for several processes to run them."""
+    global _local_workers
+    _local_workers += app.config.get('OUTBOX_WORKERS', 2)
+    for i in range(app.config.get('OUTBOX_WORKERS', 2)):
+        threading.Thread(target=_run_worker, args=(app,), daemon=True, name=f'notification-outbox-{i}').start()
@@ -1,8 +1,26 @@
+"""
+Push notifications via Firebase Cloud Messaging.
+
+send_push_many() sends through messaging.send_each in chunks of up to 500 (FCM's limit),
+and a process-wide PushBatcher merges concurrent callers (e.g. several outbox workers)
+into the same send_each call: a batch goes out once PUSH_BATCH_SIZE messages are waiting
+or the first has waited PUSH_BATCH_LINGER_MS. Tokens FCM reports as unregistered or
+belonging to another sender are cleared from users.fcm_token so they are not sent to again.
+"""
+import threading
+
 import firebase_admin
 from firebase_admin import credentials, messaging
+from sqlalchemy import update
+
+from app import db
 from app.config import Config
+from app.models import User
 import os
 
+# FCM accepts at most this many messages per send_each call
+FCM_MAX_BATCH = 500
+
 # Initialize Firebase Admin SDK
 firebase_initialized = False
 
@@ -10,7 +28,7 @@ def initialize_firebase():
     global firebase_initialized
     if firebase_initialized:
         return
-    
+
     if Config.FIREBASE_CREDENTIALS_PATH and os.path.exists(Config.FIREBASE_CREDENTIALS_PATH):
         cred = credentials.Certificate(Config.FIREBASE_CREDENTIALS_PATH)
         firebase_admin.initialize_app(cred)
@@ -18,27 +36,139 @@ def initialize_firebase():
     else:
         print("Firebase credentials not found. Push notifications disabled.")
 
-def send_push_notification(fcm_token: str, title: str, body: str, data: dict = None):
-    """Send push notification using FCM"""
+
+def _is_invalid_token(error):
+    return isinstance(error, (messaging.UnregisteredError, messaging.SenderIdMismatchError))
+
+
+def prune_tokens(tokens):
+    """Clear fcm_token for users holding any of tokens, and commit."""
+    if not tokens:
+        return 0
+    pruned = db.session.execute(update(User).where(User.fcm_token.in_(tokens)).values(fcm_token=None)).rowcount
+    db.session.commit()
+    if pruned:
+        print(f"[Push] Pruned {pruned} invalid FCM token(s)")
+    return pruned
+
+
+def _send_batch(items):
+    """
+    items: list of (fcm_token, title, body, data). One (ok, error) per item, where ok is
+    None for a token FCM will never accept (it has been pruned, so do not retry).
+    """
+    results = []
+    invalid = set()
+    for start in range(0, len(items), FCM_MAX_BATCH):
+        chunk = items[start:start + FCM_MAX_BATCH]
+        messages = [
+            messaging.Message(
+                notification=messaging.Notification(title=title, body=body),
+                data={str(k): str(v) for k, v in (data or {}).items()},
+                token=token,
+            )
+            for token, title, body, data in chunk
+        ]
+        try:
+            batch = messaging.send_each(messages)
+        except Exception as e:
+            results += [(False, str(e))] * len(chunk)
+            continue
+        for (token, _, _, _), response in zip(chunk, batch.responses):
+            if response.success:
+                results.append((True, None))
+            elif _is_invalid_token(response.exception):
+                invalid.add(token)
+                results.append((None, str(response.exception)))
+            else:
+                results.append((False, str(response.exception)))
+    if invalid:
+        try:
+            prune_tokens(invalid)
+        except Exception as e:
+            db.session.rollback()
+            print(f"[Push] Failed to prune invalid tokens: {e}")
+    return results
+
+
+class _Waiter:
+    __slots__ = ('items', 'results', 'done')
+
+    def __init__(self, items):
+        self.items = items
+        self.results = None
+        self.done = threading.Event()
+
+
+class PushBatcher:
+    """
+    Merges concurrent submit() calls into shared batches. The first caller to find the
+    buffer empty waits up to `linger` seconds (less if max_batch messages arrive), then
+    sends everything buffered; the others block until their messages have been sent.
+    """
+
+    def __init__(self, send, max_batch, linger):
+        self._send = send
+        self._max_batch = max_batch
+        self._linger = linger
+        self._cond = threading.Condition()
+        self._waiting = []
+        self._count = 0
+        self._leader = False
+
+    def submit(self, items):
+        waiter = _Waiter(list(items))
+        with self._cond:
+            self._waiting.append(waiter)
+            self._count += len(waiter.items)
+            lead = not self._leader
+            if lead:
+                self._leader = True
+            elif self._count >= self._max_batch:
+                self._cond.notify_all()
+        if not lead:
+            waiter.done.wait()
+            return waiter.results
+        with self._cond:
+            self._cond.wait_for(lambda: self._count >= self._max_batch, timeout=self._linger)
+            batch, self._waiting, self._count, self._leader = self._waiting, [], 0, False
+        try:
+            results = self._send([item for w in batch for item in w.items])
+        except Exception as e:
+            results = [(False, str(e))] * sum(len(w.items) for w in batch)
+        offset = 0
+        for w in batch:
+            w.results = results[offset:offset + len(w.items)]
+            offset += len(w.items)
+            w.done.set()
+        return waiter.results
+
+
+_batcher = PushBatcher(
+    _send_batch,
+    max_batch=min(max(Config.PUSH_BATCH_SIZE, 1), FCM_MAX_BATCH),
+    linger=Config.PUSH_BATCH_LINGER_MS / 1000.0,
+)
+
+
+def send_push_many(items):
+    """
+    Send several push notifications. items: iterable of (fcm_token, title, body, data).
+    Returns one (ok, error) per item, in order; ok is None for a token FCM rejected as
+    invalid (cleared from its user, not worth retrying).
+    """
+    items = list(items)
     initialize_firebase()
-    
     if not firebase_initialized:
-        print("Firebase not initialized. Push notification not sent.")
-        return False
-    
-    try:
-        message = messaging.Message(
-            notification=messaging.Notification(
-                title=title,
-                body=body
-            ),
-            data=data or {},
-            token=fcm_token
-        )
-        
-        response = messaging.send(message)
-        print(f"Successfully sent push notification: {response}")
-        return True
-    except Exception as e:
-        print(f"Failed to send push notification: {e}")
-        return False
+        return [(False, 'Firebase not initialized')] * len(items)
+    if not items:
+        return []
+    return _batcher.submit(items)
+
+
+def send_push_notification(fcm_token: str, title: str, body: str, data: dict = None):
+    """Send push notification using FCM"""
+    ok, error = send_push_many([(fcm_token, title, body, data)])[0]
+    if not ok:
+        print(f"Failed to send push notification: {error}")
+    return bool(ok)
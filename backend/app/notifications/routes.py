@@ -1,7 +1,10 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, make_response
 from app import db
 from app.models import Notification
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.pagination import page_args, keyset_page
+from app.conditional import watermark, make_etag, not_modified, with_validators
+from sqlalchemy import func
 
 notifications_bp = Blueprint('notifications', __name__)
 
@@ -15,16 +18,36 @@ def get_notifications():
     if unread_only:
         query = query.filter_by(read=False)
     
-    notifications = query.order_by(Notification.created_at.desc()).limit(50).all()
+    # Notifications are only inserted or marked read, so newest id, row count and unread count cover every change
+    etag = make_etag(user_id, request.query_string, *watermark(
+        query.with_entities(func.max(Notification.id)),
+        query.with_entities(func.count(Notification.id)),
+        query.filter_by(read=False).with_entities(func.count(Notification.id)),
+    ))
+    cached = not_modified(etag)
+    if cached:
+        return cached
     
-    return jsonify([{
+    page = page_args()
+    if page is None:
+        notifications, next_cursor = query.order_by(Notification.created_at.desc()).limit(50).all(), None
+    else:
+        try:
+            notifications, next_cursor = keyset_page(query, Notification.created_at, Notification.id, *page)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+    
+    items = [{
         'id': notif.id,
         'type': notif.type.value,
         'title': notif.title,
         'message': notif.message,
         'read': notif.read,
         'created_at': notif.created_at.isoformat()
-    } for notif in notifications]), 200
+    } for notif in notifications]
+    
+    body = items if page is None else {'items': items, 'next_cursor': next_cursor}
+    return with_validators(make_response(jsonify(body), 200), etag)
 
 @notifications_bp.route('/<int:notification_id>/read', methods=['PUT'])
 @jwt_required()
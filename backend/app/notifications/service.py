@@ -1,19 +1,23 @@
+from sqlalchemy import insert
 from app import db
 from app.models import Notification, NotificationType, Task, Meeting, User
-from app.notifications.sms_service import send_sms
-from app.notifications.push_service import send_push_notification
-from app.notifications.email_service import send_email
+from app.notifications.outbox import enqueue_email, enqueue_push, enqueue_sms
 from app.notifications import email_templates
 
 class NotificationService:
+    """
+    Stages in-app notifications and outbox messages (email, push, SMS) in the current
+    session; the caller's commit writes them together with the change that caused them,
+    and the outbox workers deliver them (see notifications/outbox.py).
+    """
     @staticmethod
     def send_task_created_emails(task: Task):
         """Send email to assignee and creator when a task is created."""
         subj, body = email_templates.task_created_assignee(task)
-        send_email(task.assignee.email, subj, body)
+        enqueue_email(task.assignee.email, subj, body)
         if task.created_by_id != task.assignee_id:
             subj, body = email_templates.task_created_creator(task)
-            send_email(task.creator.email, subj, body)
+            enqueue_email(task.creator.email, subj, body)
 
     @staticmethod
     def create_task_assigned_notification(task: Task):
@@ -25,14 +29,13 @@ class NotificationService:
             message=f'You have been assigned a new task: {task.title}'
         )
         db.session.add(notification)
-        db.session.commit()
         
         # Send email to assignee and creator
         NotificationService.send_task_created_emails(task)
         
         # Send push notification
         if task.assignee.fcm_token:
-            send_push_notification(
+            enqueue_push(
                 task.assignee.fcm_token,
                 'New Task Assigned',
                 f'You have been assigned: {task.title}'
@@ -40,7 +43,7 @@ class NotificationService:
         
         # Send SMS if phone number exists
         if task.assignee.phone:
-            send_sms(
+            enqueue_sms(
                 task.assignee.phone,
                 f'New task assigned: {task.title}. Check your HSEA Assistant app for details.'
             )
@@ -55,10 +58,9 @@ class NotificationService:
             message=f'Task "{task.title}" has been updated. Status: {task.status.value}'
         )
         db.session.add(notification)
-        db.session.commit()
         
         if task.assignee.fcm_token:
-            send_push_notification(
+            enqueue_push(
                 task.assignee.fcm_token,
                 'Task Updated',
                 f'{task.title} - Status: {task.status.value}'
@@ -67,26 +69,26 @@ class NotificationService:
     @staticmethod
     def send_task_status_changed_email(task: Task, old_status: str, new_status: str, updated_by_name: str):
         subj, body = email_templates.task_status_changed_assignee(task, old_status, new_status, updated_by_name)
-        send_email(task.assignee.email, subj, body)
+        enqueue_email(task.assignee.email, subj, body)
 
     @staticmethod
     def send_assignee_changed_emails(task: Task, old_assignee, new_assignee_name: str):
         """old_assignee is the User who was previously assigned (before commit)."""
         subj, body = email_templates.assignee_changed_new_assignee(task, old_assignee.name)
-        send_email(task.assignee.email, subj, body)
+        enqueue_email(task.assignee.email, subj, body)
         subj, body = email_templates.assignee_changed_previous_assignee(task, new_assignee_name)
-        send_email(old_assignee.email, subj, body)
+        enqueue_email(old_assignee.email, subj, body)
         if task.created_by_id != task.assignee_id and task.created_by_id != old_assignee.id:
             subj, body = email_templates.assignee_changed_creator(task, old_assignee.name, new_assignee_name)
-            send_email(task.creator.email, subj, body)
+            enqueue_email(task.creator.email, subj, body)
 
     @staticmethod
     def send_due_date_changed_emails(task: Task, old_due_str: str, new_due_str: str, updated_by_name: str):
         subj, body = email_templates.due_date_changed_assignee(task, old_due_str, new_due_str, updated_by_name)
-        send_email(task.assignee.email, subj, body)
+        enqueue_email(task.assignee.email, subj, body)
         if task.created_by_id != task.assignee_id:
             subj, body = email_templates.due_date_changed_creator(task, old_due_str, new_due_str)
-            send_email(task.creator.email, subj, body)
+            enqueue_email(task.creator.email, subj, body)
 
     @staticmethod
     def send_comment_added_emails(task: Task, comment_author_name: str, comment_snippet: str, exclude_user_ids=None):
@@ -95,40 +97,40 @@ class NotificationService:
         snippet = (comment_snippet or "")[:500]
         if task.assignee_id not in exclude_user_ids:
             subj, body = email_templates.comment_added_assignee(task, comment_author_name, snippet)
-            send_email(task.assignee.email, subj, body)
+            enqueue_email(task.assignee.email, subj, body)
         if task.created_by_id != task.assignee_id and task.created_by_id not in exclude_user_ids:
             subj, body = email_templates.comment_added_creator(task, comment_author_name, snippet)
-            send_email(task.creator.email, subj, body)
+            enqueue_email(task.creator.email, subj, body)
 
     @staticmethod
     def send_mention_email(mentioned_user, task: Task, comment_author_name: str, comment_snippet: str):
         subj, body = email_templates.mention_in_comment(mentioned_user.name, task, comment_author_name, (comment_snippet or "")[:500])
-        send_email(mentioned_user.email, subj, body)
+        enqueue_email(mentioned_user.email, subj, body)
 
     @staticmethod
     def send_meeting_scheduled_email(attendee_email: str, attendee_name: str, meeting: Meeting):
         start_str = meeting.start_time.strftime("%Y-%m-%d %H:%M") if meeting.start_time else ""
         join_url = getattr(meeting, "join_url", None) or ""
         subj, body = email_templates.meeting_scheduled(attendee_name, meeting.topic or "Meeting", start_str, join_url)
-        send_email(attendee_email, subj, body)
+        enqueue_email(attendee_email, subj, body)
     
     @staticmethod
     def send_task_notes_updated_emails(task: Task, updated_by_name: str, new_notes: str):
         """Send email to assignee and creator when task notes are updated."""
         subj, body = email_templates.notes_updated_assignee(task, updated_by_name, new_notes)
-        send_email(task.assignee.email, subj, body)
+        enqueue_email(task.assignee.email, subj, body)
         if task.created_by_id != task.assignee_id:
             subj, body = email_templates.notes_updated_creator(task, updated_by_name, new_notes)
-            send_email(task.creator.email, subj, body)
+            enqueue_email(task.creator.email, subj, body)
 
     @staticmethod
     def send_task_completed_emails(task: Task):
         """Send creative completion emails to assignee and creator."""
         subj, body = email_templates.task_completed_assignee(task)
-        send_email(task.assignee.email, subj, body)
+        enqueue_email(task.assignee.email, subj, body)
         if task.created_by_id != task.assignee_id:
             subj, body = email_templates.task_completed_creator(task)
-            send_email(task.creator.email, subj, body)
+            enqueue_email(task.creator.email, subj, body)
 
     @staticmethod
     def create_task_completed_notification(task: Task):
@@ -140,16 +142,50 @@ class NotificationService:
             message=f'Task "{task.title}" has been completed by {task.assignee.name}'
         )
         db.session.add(notification)
-        db.session.commit()
         NotificationService.send_task_completed_emails(task)
         creator = task.creator
         if creator.fcm_token:
-            send_push_notification(
+            enqueue_push(
                 creator.fcm_token,
                 'Task Completed',
                 f'{task.assignee.name} completed: {task.title}'
             )
     
+    @staticmethod
+    def send_bulk_task_notifications(summaries, updated_by_name: str):
+        """
+        One in-app notification, email and push per recipient for a whole bulk batch.
+        summaries maps user_id -> (lines, assigned) where assigned means at least one task
+        was newly assigned to them (those users also get a single SMS, as single assignment does).
+        """
+        if not summaries:
+            return
+        db.session.execute(insert(Notification), [{
+            'user_id': uid,
+            'type': NotificationType.TASK_ASSIGNED if assigned else NotificationType.TASK_UPDATED,
+            'title': 'Tasks Updated',
+            'message': f'{updated_by_name} changed {len(lines)} of your tasks: ' + '; '.join(lines)[:450],
+        } for uid, (lines, assigned) in summaries.items()])
+        
+        users = {u.id: u for u in User.query.filter(User.id.in_(list(summaries)))}
+        for uid, (lines, assigned) in summaries.items():
+            user = users.get(uid)
+            if not user:
+                continue
+            subj, body = email_templates.bulk_task_changes(user.name, updated_by_name, lines)
+            enqueue_email(user.email, subj, body)
+            if user.fcm_token:
+                enqueue_push(
+                    user.fcm_token,
+                    'Tasks Updated',
+                    f'{updated_by_name} changed {len(lines)} of your tasks'
+                )
+            if assigned and user.phone:
+                enqueue_sms(
+                    user.phone,
+                    f'{updated_by_name} updated {len(lines)} of your tasks. Check your HSEA Assistant app for details.'
+                )
+    
     @staticmethod
     def create_meeting_scheduled_notification(meeting: Meeting, user_id: int):
         """Create notification and email when meeting is scheduled"""
@@ -160,24 +196,45 @@ class NotificationService:
             message=f'Meeting "{meeting.topic}" scheduled for {meeting.start_time.strftime("%Y-%m-%d %H:%M")}'
         )
         db.session.add(notification)
-        db.session.commit()
         
         user = User.query.get(user_id)
         if user:
             NotificationService.send_meeting_scheduled_email(user.email, user.name, meeting)
         if user and user.fcm_token:
-            send_push_notification(
+            enqueue_push(
                 user.fcm_token,
                 'Meeting Scheduled',
                 f'{meeting.topic} at {meeting.start_time.strftime("%Y-%m-%d %H:%M")}'
             )
         
         if user and user.phone:
-            send_sms(
+            enqueue_sms(
                 user.phone,
                 f'Meeting scheduled: {meeting.topic} at {meeting.start_time.strftime("%Y-%m-%d %H:%M")}. Join: {meeting.join_url}'
             )
     
+    @staticmethod
+    def create_mention_notifications(user_ids, task: Task, comment_author_name: str, comment_snippet: str):
+        """In-app notifications (one multi-row insert), email and push for every user mentioned in a comment."""
+        if not user_ids:
+            return
+        db.session.execute(insert(Notification), [{
+            'user_id': uid,
+            'type': NotificationType.MENTION,
+            'title': 'You were mentioned',
+            'message': f'{comment_author_name} mentioned you in a comment on task "{task.title}"',
+        } for uid in user_ids])
+        
+        users = User.query.filter(User.id.in_(list(user_ids))).all()
+        for user in users:
+            NotificationService.send_mention_email(user, task, comment_author_name, comment_snippet)
+            if user.fcm_token:
+                enqueue_push(
+                    user.fcm_token,
+                    'You were mentioned',
+                    f'{comment_author_name} mentioned you in task "{task.title}"'
+                )
+    
     @staticmethod
     def create_mention_notification(user_id: int, task_id: int, comment_id: int):
         """Create notification when user is mentioned in a comment"""
@@ -196,10 +253,9 @@ class NotificationService:
             message=f'{comment.user.name} mentioned you in a comment on task "{task.title}"'
         )
         db.session.add(notification)
-        db.session.commit()
         
         if user.fcm_token:
-            send_push_notification(
+            enqueue_push(
                 user.fcm_token,
                 'You were mentioned',
                 f'{comment.user.name} mentioned you in task "{task.title}"'
@@ -1,20 +1,159 @@
+"""
+SMS via Twilio.
+
+One Client (with its pooled HTTP session) is built per process and reused. Sends are
+paced by a token bucket at the sender number's rate (SMS_RATE_PER_SECOND, bursting to
+SMS_BURST); once a batch has waited SMS_MAX_WAIT_SECONDS for the rate in total, the rest
+is handed back with the delay to wait instead, so the outbox requeues it rather than
+tying up a worker. The same text to the same number within SMS_DEDUP_SECONDS is dropped. Requests
+never call this directly: NotificationService queues SMS in the outbox.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from twilio.base.exceptions import TwilioRestException
+from twilio.http.http_client import TwilioHttpClient
 from twilio.rest import Client
+
 from app.config import Config
 
+# Twilio error codes for a recipient that can never receive SMS from us
+# (invalid number, unsubscribed via STOP, landline, unreachable destination)
+PERMANENT_ERROR_CODES = {21211, 21610, 21614, 21408, 21612}
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def _configured():
+    return bool(Config.TWILIO_ACCOUNT_SID and Config.TWILIO_AUTH_TOKEN and Config.TWILIO_PHONE_NUMBER)
+
+
+def get_client():
+    """The process-wide Twilio client."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                http_client = TwilioHttpClient(pool_connections=True, timeout=Config.SMS_TIMEOUT)
+                _client = Client(Config.TWILIO_ACCOUNT_SID, Config.TWILIO_AUTH_TOKEN, http_client=http_client)
+    return _client
+
+
+class TokenBucket:
+    """`rate` tokens a second, holding up to `burst`. Callers reserve a token and sleep the returned delay."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait):
+        """Seconds until the caller may send, or None (nothing reserved) if that exceeds max_wait."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = max(0.0, (1 - self._tokens) / self.rate)
+            if wait > max_wait:
+                return None
+            self._tokens -= 1
+            return wait
+
+    def delay(self):
+        """Seconds until the next token is free."""
+        with self._lock:
+            tokens = min(self.burst, self._tokens + (time.monotonic() - self._updated) * self.rate)
+            return max(0.0, (1 - tokens) / self.rate)
+
+
+class _RecentMessages:
+    """(number, text) pairs sent in the last `window` seconds."""
+
+    def __init__(self, window, max_size=10000):
+        self.window = window
+        self.max_size = max_size
+        self._sent = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(to_phone, message):
+        return to_phone, hashlib.sha1(message.encode('utf-8')).digest()
+
+    def claim(self, to_phone, message):
+        """Record the pair as sent now; False if it already was within the window."""
+        key = self._key(to_phone, message)
+        with self._lock:
+            now = time.monotonic()
+            while self._sent and next(iter(self._sent.values())) < now - self.window:
+                self._sent.popitem(last=False)
+            if key in self._sent:
+                return False
+            self._sent[key] = now
+            while len(self._sent) > self.max_size:
+                self._sent.popitem(last=False)
+            return True
+
+    def forget(self, to_phone, message):
+        with self._lock:
+            self._sent.pop(self._key(to_phone, message), None)
+
+
+_bucket = TokenBucket(max(Config.SMS_RATE_PER_SECOND, 0.01), max(Config.SMS_BURST, 1))
+_recent = _RecentMessages(Config.SMS_DEDUP_SECONDS)
+
+
+def _send_one(to_phone, message):
+    """(ok, error), with ok None when the number can never receive SMS."""
+    try:
+        get_client().messages.create(body=message, from_=Config.TWILIO_PHONE_NUMBER, to=to_phone)
+        return True, None
+    except TwilioRestException as e:
+        return (None if e.code in PERMANENT_ERROR_CODES else False), str(e)
+    except Exception as e:
+        return False, str(e)
+
+
+def send_sms_many(items, max_wait=None):
+    """
+    Send (to_phone, message) items at the sender rate. Returns one result per item, in
+    order: (ok, error), ok None for a number that can never receive SMS, or
+    (False, error, retry_after) for one not sent because pacing the batch would have
+    taken longer than max_wait seconds.
+    """
+    items = list(items)
+    if not _configured():
+        return [(False, 'Twilio not configured')] * len(items)
+    max_wait = Config.SMS_MAX_WAIT_SECONDS if max_wait is None else max_wait
+    deadline = time.monotonic() + max_wait
+    dedup = Config.SMS_DEDUP_SECONDS > 0
+    results = []
+    for to_phone, message in items:
+        if dedup and not _recent.claim(to_phone, message):
+            results.append((True, None))
+            continue
+        wait = _bucket.reserve(max(0.0, deadline - time.monotonic()))
+        if wait is None:
+            results.append((False, 'Deferred by the SMS sender rate limit', _bucket.delay()))
+        else:
+            if wait:
+                time.sleep(wait)
+            results.append(_send_one(to_phone, message))
+        if dedup and not results[-1][0]:
+            _recent.forget(to_phone, message)
+    return results
+
+
 def send_sms(to_phone: str, message: str):
     """Send SMS using Twilio"""
-    if not Config.TWILIO_ACCOUNT_SID or not Config.TWILIO_AUTH_TOKEN or not Config.TWILIO_PHONE_NUMBER:
+    if not _configured():
         print("Twilio not configured. SMS not sent.")
         return False
-    
-    try:
-        client = Client(Config.TWILIO_ACCOUNT_SID, Config.TWILIO_AUTH_TOKEN)
-        message = client.messages.create(
-            body=message,
-            from_=Config.TWILIO_PHONE_NUMBER,
-            to=to_phone
-        )
-        return True
-    except Exception as e:
-        print(f"Failed to send SMS: {e}")
-        return False
+    result = send_sms_many([(to_phone, message)])[0]
+    if not result[0]:
+        print(f"Failed to send SMS: {result[1]}")
+    return bool(result[0])
@@ -0,0 +1,69 @@
+"""
+Keyset (cursor) pagination for list endpoints.
+
+Pages are ordered newest first on (sort column, id) and the cursor is an opaque
+token holding the last row's key, so fetching page N costs the same as page 1.
+Paging is opt-in so installed clients keep getting the bare JSON array they expect:
+a request with ?cursor=, ?limit= or ?paginate=true gets {'items': [...], 'next_cursor': ...}.
+"""
+import base64
+import json
+from datetime import datetime
+
+from flask import request, current_app
+from sqlalchemy import or_, and_
+
+
+def encode_cursor(sort_value, row_id):
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps([sort_value, row_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Returns (sort_value, id). Raises ValueError for anything that is not a cursor we issued."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        sort_value, row_id = json.loads(raw)
+        return datetime.fromisoformat(sort_value), int(row_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def page_args():
+    """
+    Read ?cursor=, ?limit= and ?paginate= from the request.
+    Returns (cursor, limit), or None for the legacy unpaginated list (no paging parameters,
+    or ?paginate=false).
+    """
+    paginate = request.args.get('paginate')
+    if paginate is None:
+        if 'cursor' not in request.args and 'limit' not in request.args:
+            return None
+    elif paginate.lower() == 'false':
+        return None
+    max_size = current_app.config.get('PAGE_SIZE_MAX', 200)
+    limit = request.args.get('limit', type=int) or current_app.config.get('PAGE_SIZE_DEFAULT', 50)
+    return request.args.get('cursor'), max(1, min(limit, max_size))
+
+
+def keyset_page(query, sort_column, id_column, cursor, limit, entity=None):
+    """
+    Apply the cursor predicate and ordering to query and fetch one page.
+    entity maps a result row to the model instance carrying the key, for queries
+    that return tuples (e.g. task_list_query). Returns (rows, next_cursor).
+    """
+    if cursor:
+        sort_value, last_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            sort_column < sort_value,
+            and_(sort_column == sort_value, id_column < last_id),
+        ))
+    rows = query.order_by(sort_column.desc(), id_column.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = entity(rows[-1]) if entity else rows[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+    return rows, next_cursor
@@ -1,8 +1,10 @@
 from flask import Blueprint, request, jsonify, make_response
 from app import db
 from app.models import Task, User, TaskStatus, Notification
+from app.tasks.counters import counts_by_assignee
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, timedelta
+from sqlalchemy.orm import undefer
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
@@ -92,16 +94,15 @@ def task_assignment_report():
     """Report on task assignments by user"""
     user_id = int(get_jwt_identity())
     
-    # Get all users
+    # Get all users; their counts come from the task counters in one query
     users = User.query.all()
+    counts = counts_by_assignee()
     
     report_data = []
     for user in users:
-        assigned_count = Task.query.filter_by(assignee_id=user.id).count()
-        completed_count = Task.query.filter_by(
-            assignee_id=user.id,
-            status=TaskStatus.COMPLETED
-        ).count()
+        user_counts = counts.get(user.id, {})
+        assigned_count = user_counts.get('total', 0)
+        completed_count = user_counts.get(TaskStatus.COMPLETED.value, 0)
         
         report_data.append({
             'user_id': user.id,
@@ -121,7 +122,7 @@ def task_assignment_report():
 def export_tasks_csv():
     user_id = int(get_jwt_identity())
     
-    tasks = Task.query.filter(
+    tasks = Task.query.options(undefer(Task.description)).filter(
         (Task.assignee_id == user_id) | (Task.created_by_id == user_id)
     ).all()
     
@@ -0,0 +1,251 @@
+"""
+Full-text index over task title, description, notes and comment content.
+
+SQLite uses an FTS5 table keyed by task id (rowid); PostgreSQL uses a task_search
+table holding a weighted tsvector with a GIN index. Either way the index is kept in
+sync from a session after_flush hook, so every write path (tasks API, voice,
+templates) updates it in the same transaction without having to remember to.
+New comments are appended to their task's row and task edits keep the comment
+part as it is, so only comment edits and deletes re-read all of a task's comments.
+If neither backend is available the matchers fall back to LIKE on the tasks table.
+"""
+import re
+
+from sqlalchemy import event, text, bindparam, false, Integer, Float, inspect
+
+from app import db
+from app.models import Task, Comment
+
+# 'fts5', 'tsvector' or None (LIKE fallback); set by ensure_schema() at startup
+_backend = None
+
+# Relative weight of title > description > notes > comments
+_FTS5_WEIGHTS = '10.0, 4.0, 2.0, 1.0'
+
+_INDEXED_TASK_FIELDS = ('title', 'description', 'notes')
+
+
+def _create_sqlite_schema(conn):
+    conn.execute(text(
+        "CREATE VIRTUAL TABLE task_search USING fts5("
+        "title, description, notes, comments, tokenize='porter unicode61')"
+    ))
+
+
+def _create_postgres_schema(conn):
+    conn.execute(text(
+        "CREATE TABLE task_search ("
+        "task_id INTEGER PRIMARY KEY REFERENCES tasks(id) ON DELETE CASCADE, "
+        "document TSVECTOR NOT NULL)"
+    ))
+    conn.execute(text("CREATE INDEX ix_task_search_document ON task_search USING GIN (document)"))
+
+
+def ensure_schema():
+    """Create the index for the current database if missing and backfill it from existing tasks."""
+    global _backend
+    dialect = db.engine.dialect.name
+    if dialect not in ('sqlite', 'postgresql'):
+        _backend = None
+        return
+    try:
+        with db.engine.begin() as conn:
+            if not inspect(conn).has_table('task_search'):
+                if dialect == 'sqlite':
+                    _create_sqlite_schema(conn)
+                else:
+                    _create_postgres_schema(conn)
+                _backend = 'fts5' if dialect == 'sqlite' else 'tsvector'
+                _reindex(conn, None)
+            else:
+                _backend = 'fts5' if dialect == 'sqlite' else 'tsvector'
+    except Exception as e:
+        print(f"Full-text search unavailable, falling back to LIKE: {e}")
+        _backend = None
+
+
+def _reindex(conn, task_ids):
+    """Rebuild index rows for task_ids (all tasks when None)."""
+    if _backend is None or task_ids == []:
+        return
+    where = '' if task_ids is None else 'WHERE t.id IN :ids'
+    params = {} if task_ids is None else {'ids': list(task_ids)}
+    if _backend == 'fts5':
+        if task_ids is None:
+            conn.execute(text("DELETE FROM task_search"))
+        else:
+            conn.execute(text("DELETE FROM task_search WHERE rowid IN :ids").bindparams(_expanding('ids')), params)
+        stmt = text(
+            "INSERT INTO task_search (rowid, title, description, notes, comments) "
+            "SELECT t.id, t.title, coalesce(t.description, ''), coalesce(t.notes, ''), "
+            "coalesce((SELECT group_concat(c.content, ' ') FROM comments c WHERE c.task_id = t.id), '') "
+            f"FROM tasks t {where}"
+        )
+    else:
+        stmt = text(
+            "INSERT INTO task_search (task_id, document) "
+            "SELECT t.id, "
+            "setweight(to_tsvector('english', coalesce(t.title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(t.description, '')), 'B') || "
+            "setweight(to_tsvector('english', coalesce(t.notes, '')), 'C') || "
+            "setweight(to_tsvector('english', coalesce("
+            "(SELECT string_agg(c.content, ' ') FROM comments c WHERE c.task_id = t.id), '')), 'D') "
+            f"FROM tasks t {where} "
+            "ON CONFLICT (task_id) DO UPDATE SET document = EXCLUDED.document"
+        )
+    if task_ids is not None:
+        stmt = stmt.bindparams(_expanding('ids'))
+    conn.execute(stmt, params)
+
+
+def _refresh_fields(conn, task_ids):
+    """Re-index the title, description and notes of task_ids, keeping their indexed comments."""
+    if _backend is None or not task_ids:
+        return
+    if _backend == 'fts5':
+        stmt = text(
+            "UPDATE task_search SET (title, description, notes) = "
+            "(SELECT t.title, coalesce(t.description, ''), coalesce(t.notes, '') FROM tasks t WHERE t.id = task_search.rowid) "
+            "WHERE rowid IN :ids"
+        )
+    else:
+        stmt = text(
+            "UPDATE task_search s SET document = "
+            "setweight(to_tsvector('english', coalesce(t.title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(t.description, '')), 'B') || "
+            "setweight(to_tsvector('english', coalesce(t.notes, '')), 'C') || "
+            "ts_filter(s.document, '{d}') "
+            "FROM tasks t WHERE t.id = s.task_id AND s.task_id IN :ids"
+        )
+    conn.execute(stmt.bindparams(_expanding('ids')), {'ids': list(task_ids)})
+
+
+def _append_comments(conn, comments):
+    """Add new comment text to the index rows of their tasks; comments maps task_id -> [content]."""
+    if _backend is None or not comments:
+        return
+    if _backend == 'fts5':
+        stmt = text("UPDATE task_search SET comments = ltrim(comments || ' ' || :content) WHERE rowid = :task_id")
+    else:
+        stmt = text(
+            "UPDATE task_search SET document = document || setweight(to_tsvector('english', :content), 'D') "
+            "WHERE task_id = :task_id"
+        )
+    conn.execute(stmt, [
+        {'task_id': task_id, 'content': ' '.join(contents)} for task_id, contents in comments.items()
+    ])
+
+
+def _remove(conn, task_ids):
+    if _backend is None or not task_ids:
+        return
+    column = 'rowid' if _backend == 'fts5' else 'task_id'
+    conn.execute(
+        text(f"DELETE FROM task_search WHERE {column} IN :ids").bindparams(_expanding('ids')),
+        {'ids': list(task_ids)},
+    )
+
+
+def reindex_tasks(conn, task_ids):
+    """Index rows for tasks written outside the unit of work (e.g. batched recurring inserts)."""
+    _reindex(conn, list(task_ids))
+
+
+def remove_tasks(conn, task_ids):
+    """Drop index rows for tasks deleted outside the unit of work (e.g. set-based bulk deletes)."""
+    _remove(conn, task_ids)
+
+
+def _expanding(name):
+    return bindparam(name, expanding=True)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _sync_search_index(session, flush_context):
+    if _backend is None:
+        return
+    rebuilt, refreshed, removed = set(), set(), set()
+    appended = {}  # task_id -> [content] of new comments
+    for obj in session.new:
+        if isinstance(obj, Task):
+            rebuilt.add(obj.id)
+        elif isinstance(obj, Comment) and obj.content:
+            appended.setdefault(obj.task_id, []).append(obj.content)
+    for obj in session.dirty:
+        if isinstance(obj, Task):
+            state = inspect(obj)
+            if any(state.attrs[f].history.has_changes() for f in _INDEXED_TASK_FIELDS):
+                refreshed.add(obj.id)
+        elif isinstance(obj, Comment) and session.is_modified(obj):
+            rebuilt.add(obj.task_id)
+    for obj in session.deleted:
+        if isinstance(obj, Task):
+            removed.add(obj.id)
+        elif isinstance(obj, Comment):
+            rebuilt.add(obj.task_id)
+    rebuilt -= removed
+    rebuilt.discard(None)
+    refreshed -= rebuilt | removed
+    appended = {task_id: contents for task_id, contents in appended.items()
+                if task_id is not None and task_id not in rebuilt and task_id not in removed}
+    conn = session.connection()
+    _remove(conn, removed)
+    _reindex(conn, sorted(rebuilt))
+    _refresh_fields(conn, sorted(refreshed))
+    _append_comments(conn, appended)
+
+
+def _terms(query_text):
+    return re.findall(r'\w+', query_text or '')[:16]
+
+
+def matching_tasks(query_text, title_only=False):
+    """
+    Subquery of (task_id, rank) for tasks matching every term in query_text (prefix match),
+    in any indexed field or, with title_only, in the title. Lower rank is a better match.
+    Returns None if query_text has no searchable terms.
+    """
+    terms = _terms(query_text)
+    if not terms:
+        return None
+    if _backend == 'fts5':
+        column = 'title : ' if title_only else ''
+        match = ' '.join(f'{column}"{t}"*' for t in terms)
+        stmt = text(
+            f"SELECT rowid AS task_id, bm25(task_search, {_FTS5_WEIGHTS}) AS rank "
+            "FROM task_search WHERE task_search MATCH :q"
+        ).bindparams(q=match)
+    elif _backend == 'tsvector':
+        # Title lexemes carry weight A
+        tsquery = ' & '.join(f'{t}:*A' if title_only else f'{t}:*' for t in terms)
+        stmt = text(
+            "SELECT task_id, -ts_rank(document, to_tsquery('english', :q)) AS rank "
+            "FROM task_search WHERE document @@ to_tsquery('english', :q)"
+        ).bindparams(q=tsquery)
+    else:
+        like = '%' + '%'.join(terms) + '%'
+        where = "lower(title) LIKE lower(:q)"
+        if not title_only:
+            where += " OR lower(description) LIKE lower(:q) OR lower(notes) LIKE lower(:q)"
+        stmt = text(f"SELECT id AS task_id, 0.0 AS rank FROM tasks WHERE {where}").bindparams(q=like)
+    return stmt.columns(task_id=Integer, rank=Float).subquery('task_matches')
+
+
+def filter_matching(query, query_text):
+    """Restrict a Task query to search matches, keeping the caller's ordering."""
+    matches = matching_tasks(query_text)
+    if matches is None:
+        return query.filter(false())
+    return query.filter(Task.id.in_(db.session.query(matches.c.task_id)))
+
+
+def rank_matching(query, query_text, title_only=False):
+    """
+    Restrict a Task query to search matches, best match first. Use title_only when the
+    match picks a task to act on (e.g. voice "delete task X"), so text in notes or
+    comments cannot select it.
+    """
+    matches = matching_tasks(query_text, title_only)
+    if matches is None:
+        return query.filter(false())
+    return query.join(matches, matches.c.task_id == Task.id).order_by(matches.c.rank, Task.id.desc())
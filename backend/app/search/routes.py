@@ -0,0 +1,44 @@
+from flask import Blueprint, request, jsonify, current_app
+from app import db
+from app.models import Task, TaskCollaborator
+from app.search.index import rank_matching
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import or_
+from sqlalchemy.orm import joinedload
+
+search_bp = Blueprint('search', __name__)
+
+
+@search_bp.route('', methods=['GET'])
+@jwt_required()
+def search_tasks():
+    """Ranked search over title, description, notes and comments of tasks visible to the user."""
+    user_id = int(get_jwt_identity())
+    q = (request.args.get('q') or '').strip()
+    if not q:
+        return jsonify({'error': 'q is required'}), 400
+    workspace_id = request.args.get('workspace_id', type=int)
+    limit = request.args.get('limit', type=int) or 20
+    limit = max(1, min(limit, current_app.config.get('PAGE_SIZE_MAX', 200)))
+
+    is_collaborator = db.session.query(TaskCollaborator.id).filter(
+        TaskCollaborator.task_id == Task.id,
+        TaskCollaborator.user_id == user_id,
+    ).exists()
+    query = Task.query.options(joinedload(Task.assignee)).filter(
+        or_(Task.assignee_id == user_id, Task.created_by_id == user_id, is_collaborator)
+    )
+    if workspace_id:
+        query = query.filter(Task.workspace_id == workspace_id)
+    tasks = rank_matching(query, q).limit(limit).all()
+
+    return jsonify([{
+        'id': task.id,
+        'title': task.title,
+        'status': task.status.value,
+        'priority': task.priority.value,
+        'due_date': task.due_date.isoformat() if task.due_date else None,
+        'workspace_id': task.workspace_id,
+        'assignee': {'id': task.assignee.id, 'name': task.assignee.name},
+        'updated_at': task.updated_at.isoformat(),
+    } for task in tasks]), 200
@@ -0,0 +1,100 @@
+"""
+Task activity feeds.
+
+task_activities carries its task's workspace_id (tasks never change workspace), so the
+workspace feed is a range scan on (workspace_id, created_at, id) that stops after one
+page, however many rows the workspace has. A ?type= filter uses (workspace_id,
+activity_type, created_at, id): each type is scanned on its own and the per-type pages
+are merged by one UNION ALL, so several types still never sort more than a page each.
+Authors are loaded in one batch per page.
+"""
+import json
+
+from sqlalchemy import select, or_, and_, union_all
+
+from app import db
+from app.models import Task, TaskActivity, User
+from app.pagination import encode_cursor, decode_cursor
+
+# More types than this in one ?type= filter are rejected
+MAX_TYPE_FILTERS = 10
+
+_COLUMNS = (TaskActivity.id, TaskActivity.task_id, TaskActivity.user_id, TaskActivity.activity_type,
+            TaskActivity.description, TaskActivity.activity_metadata, TaskActivity.created_at)
+
+
+def parse_types(value):
+    """?type=commented,status_changed -> ['commented', 'status_changed'] (None when absent)."""
+    types = list(dict.fromkeys(t.strip() for t in (value or '').split(',') if t.strip()))
+    if len(types) > MAX_TYPE_FILTERS:
+        raise ValueError(f'At most {MAX_TYPE_FILTERS} activity types can be filtered on')
+    return types or None
+
+
+def _page_select(workspace_id, cursor_key, limit, activity_type=None):
+    stmt = select(*_COLUMNS).where(TaskActivity.workspace_id == workspace_id)
+    if activity_type is not None:
+        stmt = stmt.where(TaskActivity.activity_type == activity_type)
+    if cursor_key:
+        created_at, last_id = cursor_key
+        stmt = stmt.where(or_(
+            TaskActivity.created_at < created_at,
+            and_(TaskActivity.created_at == created_at, TaskActivity.id < last_id),
+        ))
+    return stmt.order_by(TaskActivity.created_at.desc(), TaskActivity.id.desc()).limit(limit)
+
+
+def serialize_activities(rows):
+    """Activity dicts for rows of _COLUMNS, with every author and task title loaded in one query each."""
+    rows = list(rows)
+    user_ids = {row.user_id for row in rows}
+    task_ids = {row.task_id for row in rows}
+    users = {u.id: u for u in User.query.filter(User.id.in_(user_ids))} if user_ids else {}
+    titles = dict(db.session.execute(select(Task.id, Task.title).where(Task.id.in_(task_ids))).all()) if task_ids else {}
+    items = []
+    for row in rows:
+        user = users.get(row.user_id)
+        items.append({
+            'id': row.id,
+            'task': {'id': row.task_id, 'title': titles.get(row.task_id)},
+            'activity_type': row.activity_type,
+            'description': row.description,
+            'user': {
+                'id': row.user_id,
+                'name': user.name if user else None,
+                'email': user.email if user else None
+            },
+            'metadata': json.loads(row.activity_metadata) if row.activity_metadata else None,
+            'created_at': row.created_at.isoformat() if row.created_at else None
+        })
+    return items
+
+
+def task_activity_rows(task_id, limit):
+    """The task's newest activity rows (for serialize_activities)."""
+    stmt = (
+        select(*_COLUMNS).where(TaskActivity.task_id == task_id)
+        .order_by(TaskActivity.created_at.desc(), TaskActivity.id.desc()).limit(limit)
+    )
+    return db.session.execute(stmt).all()
+
+
+def workspace_activity(workspace_id, cursor, limit, types=None):
+    """(items, next_cursor) for one page of the workspace feed, newest first. Raises ValueError for a bad cursor."""
+    cursor_key = decode_cursor(cursor) if cursor else None
+    if not types:
+        stmt = _page_select(workspace_id, cursor_key, limit + 1)
+    elif len(types) == 1:
+        stmt = _page_select(workspace_id, cursor_key, limit + 1, types[0])
+    else:
+        # Wrap each branch so its own ORDER BY/LIMIT is kept (SQLite rejects them on compound members)
+        branches = [select(page) for page in (
+            _page_select(workspace_id, cursor_key, limit + 1, t).subquery() for t in types)]
+        merged = union_all(*branches).subquery('activity_feed')
+        stmt = select(merged).order_by(merged.c.created_at.desc(), merged.c.id.desc()).limit(limit + 1)
+    rows = db.session.execute(stmt).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return serialize_activities(rows), next_cursor
@@ -0,0 +1,289 @@
+"""
+Archival of closed tasks.
+
+Completed and cancelled tasks that have not changed for ARCHIVE_AFTER_DAYS are moved,
+with their comments, activities, attachment links, collaborators and dependency edges,
+into the archived_* tables (same columns, no foreign keys; see models.py), so the hot
+tables only hold live work. Moves are set-based (INSERT ... SELECT then DELETE per table)
+and committed a batch at a time.
+
+A task is archived with its whole subtask tree, and only once every task in the tree is
+closed, so open work never loses its parent and a parent's rollups never lose closed
+children. Recurring series and tasks linked to meetings stay hot. On PostgreSQL candidate
+roots are claimed with FOR UPDATE SKIP LOCKED, so concurrent runs split the work.
+
+Restoring works on the same unit: the whole archived tree around the requested task comes
+back, and restored tasks get a fresh updated_at so the next archival run waits another
+ARCHIVE_AFTER_DAYS before taking them again.
+
+To the sync feed an archived task looks deleted and a restored one looks created; the
+search index is updated the same way.
+"""
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from sqlalchemy import select, insert, delete, literal, or_, and_, exists
+from sqlalchemy.orm import aliased
+
+from app import db
+from app.models import (
+    Task, Comment, TaskActivity, TaskAttachment, TaskCollaborator, TaskDependency, TaskStatus, Meeting, User,
+    archived_tasks, archived_comments, archived_task_activities, archived_task_attachments,
+    archived_task_collaborators, archived_task_dependencies,
+)
+from app.tasks.changes import record_deleted, record_inserted
+from app.tasks.counters import adjust as adjust_counters
+from app.tasks.graph import invalidate as invalidate_graphs
+from app.tasks.tree import MAX_TREE_DEPTH
+from app.search.index import remove_tasks, reindex_tasks
+from app.access import invalidate_task
+from app.tasks.sharing import invalidate_tasks as invalidate_shared, invalidate_tokens as invalidate_shared_tokens
+
+CLOSED_STATUSES = (TaskStatus.COMPLETED, TaskStatus.CANCELLED)
+
+# Per-task child tables and their archive copies, moved together with the task
+_CHILD_TABLES = (
+    (Comment.__table__, archived_comments),
+    (TaskActivity.__table__, archived_task_activities),
+    (TaskAttachment.__table__, archived_task_attachments),
+    (TaskCollaborator.__table__, archived_task_collaborators),
+)
+
+
+def _move(conn, source, target, where, extra=None):
+    """INSERT INTO target SELECT source columns WHERE where; then DELETE them from source."""
+    columns = list(source.columns)
+    names = [c.name for c in columns]
+    if extra:
+        names += list(extra)
+        columns += [literal(value).label(name) for name, value in extra.items()]
+    conn.execute(insert(target).from_select(names, select(*columns).where(where)))
+    conn.execute(delete(source).where(where))
+
+
+def _claim_roots(cutoff, after, batch_size):
+    """Top-level closed tasks untouched since cutoff, oldest first, after the (updated_at, id) key after."""
+    query = select(Task.id, Task.updated_at).where(
+        Task.status.in_(CLOSED_STATUSES),
+        Task.updated_at < cutoff,
+        Task.parent_task_id.is_(None),
+    )
+    if after:
+        query = query.where(or_(Task.updated_at > after[0], and_(Task.updated_at == after[0], Task.id > after[1])))
+    query = query.order_by(Task.updated_at, Task.id).limit(batch_size).with_for_update(skip_locked=True)
+    return db.session.execute(query).all()
+
+
+def _archivable_trees(root_ids):
+    """
+    Every task id in the trees under root_ids whose members are all closed, non-recurring
+    and not linked to a meeting, from one recursive query.
+    """
+    child = aliased(Task)
+    tree = select(Task.id.label('root'), Task.id, literal(0).label('depth')).where(Task.id.in_(root_ids)).cte('archive_tree', recursive=True)
+    tree = tree.union_all(
+        select(tree.c.root, child.id, tree.c.depth + 1)
+        .join(tree, child.parent_task_id == tree.c.id)
+        .where(tree.c.depth < MAX_TREE_DEPTH)
+    )
+    has_meeting = exists().where(Meeting.task_id == Task.id)
+    rows = db.session.execute(
+        select(tree.c.root, Task.id, Task.status, Task.is_recurring, has_meeting.label('has_meeting'))
+        .join(tree, tree.c.id == Task.id)
+    )
+    trees, blocked = {}, set()
+    for row in rows:
+        trees.setdefault(row.root, []).append(row.id)
+        if row.status not in CLOSED_STATUSES or row.is_recurring or row.has_meeting:
+            blocked.add(row.root)
+    return [task_id for root, ids in trees.items() if root not in blocked for task_id in ids]
+
+
+def archive_tasks(task_ids, now=None):
+    """Move task_ids and everything hanging off them to the archive tables (no commit)."""
+    now = now or datetime.utcnow()
+    conn = db.session.connection()
+    tasks = Task.__table__
+    in_batch = tasks.c.id.in_(task_ids)
+    snapshots = conn.execute(select(tasks.c.id, tasks.c.workspace_id, tasks.c.assignee_id, tasks.c.created_by_id, tasks.c.status)
+                             .where(in_batch)).all()
+    for source, target in _CHILD_TABLES:
+        _move(conn, source, target, source.c.task_id.in_(task_ids))
+    dependencies = TaskDependency.__table__
+    _move(conn, dependencies, archived_task_dependencies,
+          or_(dependencies.c.task_id.in_(task_ids), dependencies.c.depends_on_id.in_(task_ids)))
+    record_deleted(conn, snapshots)
+    adjust_counters(conn, snapshots, -1)
+    remove_tasks(conn, task_ids)
+    _move(conn, tasks, archived_tasks, in_batch, extra={'archived_at': now})
+    for task_id in task_ids:
+        invalidate_task(task_id)
+    invalidate_graphs()
+    invalidate_shared(task_ids)
+    return len(snapshots)
+
+
+def archive_closed(older_than_days=None, batch_size=None, now=None):
+    """Archive every eligible closed task tree. Returns the number of tasks archived."""
+    now = now or datetime.utcnow()
+    days = older_than_days if older_than_days is not None else current_app.config.get('ARCHIVE_AFTER_DAYS', 90)
+    batch_size = batch_size or current_app.config.get('ARCHIVE_BATCH_SIZE', 500)
+    cutoff = now - timedelta(days=days)
+    archived = 0
+    after = None
+    while True:
+        roots = _claim_roots(cutoff, after, batch_size)
+        if not roots:
+            break
+        after = (roots[-1].updated_at, roots[-1].id)
+        task_ids = _archivable_trees([root.id for root in roots])
+        if task_ids:
+            archived += archive_tasks(task_ids, now)
+        db.session.commit()
+    return archived
+
+
+def _archived_ancestors(task_ids):
+    """task_ids plus any archived ancestors, so a restored subtask never points at an archived parent."""
+    ids = set(task_ids)
+    frontier = set(task_ids)
+    for _ in range(MAX_TREE_DEPTH):
+        parents = {row.parent_task_id for row in db.session.execute(
+            select(archived_tasks.c.parent_task_id).where(archived_tasks.c.id.in_(frontier)))}
+        parents.discard(None)
+        archived_parents = {row.id for row in db.session.execute(
+            select(archived_tasks.c.id).where(archived_tasks.c.id.in_(parents - ids)))} if parents - ids else set()
+        if not archived_parents:
+            break
+        ids |= archived_parents
+        frontier = archived_parents
+    return ids
+
+
+def _archived_descendants(task_ids):
+    """task_ids plus every archived task below them, from one recursive query."""
+    child = aliased(archived_tasks)
+    tree = select(archived_tasks.c.id, literal(0).label('depth')).where(archived_tasks.c.id.in_(task_ids)).cte('restore_tree', recursive=True)
+    tree = tree.union_all(
+        select(child.c.id, tree.c.depth + 1)
+        .join(tree, child.c.parent_task_id == tree.c.id)
+        .where(tree.c.depth < MAX_TREE_DEPTH)
+    )
+    return set(task_ids) | {row.id for row in db.session.execute(select(tree.c.id))}
+
+
+def restore_tasks(task_ids, now=None):
+    """
+    Move archived task_ids back to the hot tables with their archived ancestors and subtasks,
+    i.e. the whole tree that was archived together (no commit). Dependency edges come back
+    once both of their tasks are hot. Returns the restored ids.
+    """
+    now = now or datetime.utcnow()
+    task_ids = sorted(_archived_descendants(_archived_ancestors(task_ids)))
+    conn = db.session.connection()
+    tasks = Task.__table__
+    names = [c.name for c in tasks.columns]
+    in_batch = archived_tasks.c.id.in_(task_ids)
+    # A fresh updated_at keeps the next archival run from taking the tree straight back
+    columns = [literal(now).label(name) if name == 'updated_at' else archived_tasks.c[name] for name in names]
+    conn.execute(insert(tasks).from_select(names, select(*columns).where(in_batch)))
+    conn.execute(delete(archived_tasks).where(in_batch))
+    for source, target in _CHILD_TABLES:
+        _move(conn, target, source, target.c.task_id.in_(task_ids))
+    edges = archived_task_dependencies
+    hot_task = select(tasks.c.id)
+    _move(conn, edges, TaskDependency.__table__, and_(
+        or_(edges.c.task_id.in_(task_ids), edges.c.depends_on_id.in_(task_ids)),
+        edges.c.task_id.in_(hot_task),
+        edges.c.depends_on_id.in_(hot_task),
+    ))
+    rows = conn.execute(select(tasks.c.id, tasks.c.workspace_id, tasks.c.assignee_id, tasks.c.created_by_id, tasks.c.status,
+                               tasks.c.share_token)
+                        .where(tasks.c.id.in_(task_ids))).mappings().all()
+    record_inserted(conn, rows)
+    adjust_counters(conn, rows, 1)
+    reindex_tasks(conn, task_ids)
+    for task_id in task_ids:
+        invalidate_task(task_id)
+    # Share links of restored tasks may have a cached "not found"
+    invalidate_shared_tokens(row['share_token'] for row in rows if row['share_token'])
+    invalidate_graphs()
+    return task_ids
+
+
+def archived_role(user_id, task_id):
+    """'creator', 'assignee', 'collaborator' or None for an archived task (None if it is not archived)."""
+    is_collaborator = exists().where(and_(
+        archived_task_collaborators.c.task_id == archived_tasks.c.id,
+        archived_task_collaborators.c.user_id == user_id,
+    ))
+    row = db.session.execute(
+        select(archived_tasks.c.created_by_id, archived_tasks.c.assignee_id, is_collaborator.label('collaborator'))
+        .where(archived_tasks.c.id == task_id)
+    ).first()
+    if row is None:
+        return None
+    if row.created_by_id == user_id:
+        return 'creator'
+    if row.assignee_id == user_id:
+        return 'assignee'
+    return 'collaborator' if row.collaborator else None
+
+
+def _user_dict(user):
+    return {'id': user.id, 'name': user.name, 'email': user.email} if user else None
+
+
+def archived_task_detail(task_id):
+    """An archived task in the shape of GET /api/tasks/<id>, with its comments; None if it is not archived."""
+    task = db.session.execute(select(archived_tasks).where(archived_tasks.c.id == task_id)).first()
+    if task is None:
+        return None
+    comments = db.session.execute(
+        select(archived_comments).where(archived_comments.c.task_id == task_id)
+        .order_by(archived_comments.c.created_at.desc(), archived_comments.c.id.desc())
+    ).all()
+    user_ids = {task.assignee_id, task.created_by_id} | {c.user_id for c in comments}
+    users = {u.id: u for u in User.query.filter(User.id.in_(user_ids))}
+    return {
+        'id': task.id,
+        'title': task.title,
+        'description': task.description,
+        'notes': task.notes,
+        'assignee': _user_dict(users.get(task.assignee_id)),
+        'created_by': _user_dict(users.get(task.created_by_id)),
+        'status': task.status.value,
+        'priority': task.priority.value,
+        'category': task.category,
+        'due_date': task.due_date.isoformat() if task.due_date else None,
+        'created_at': task.created_at.isoformat() if task.created_at else None,
+        'updated_at': task.updated_at.isoformat() if task.updated_at else None,
+        'archived': True,
+        'archived_at': task.archived_at.isoformat(),
+        'comments': [{
+            'id': c.id,
+            'parent_comment_id': c.parent_comment_id,
+            'content': c.content,
+            'user': _user_dict(users.get(c.user_id)),
+            'created_at': c.created_at.isoformat() if c.created_at else None
+        } for c in comments],
+    }
+
+
+def archived_list_query(user_id):
+    """Archived tasks the user created or was assigned, for keyset_page on archived_at."""
+    return db.session.query(
+        archived_tasks.c.id, archived_tasks.c.title, archived_tasks.c.status, archived_tasks.c.priority,
+        archived_tasks.c.workspace_id, archived_tasks.c.assignee_id, archived_tasks.c.created_by_id,
+        archived_tasks.c.parent_task_id, archived_tasks.c.due_date, archived_tasks.c.updated_at,
+        archived_tasks.c.archived_at,
+    ).filter(or_(archived_tasks.c.assignee_id == user_id, archived_tasks.c.created_by_id == user_id))
+
+
+def register_archival(app):
+    @app.cli.command('archive-tasks')
+    @click.option('--days', type=int, default=None, help='Archive tasks closed at least this many days ago.')
+    def archive_tasks_command(days):
+        """Move closed task trees to the archive tables (for cron)."""
+        click.echo(f"Archived {archive_closed(older_than_days=days)} task(s)")
@@ -0,0 +1,271 @@
+"""
+POST /api/tasks/bulk: many creates, updates and deletes in one transaction.
+
+Every task and user an operation refers to is loaded up front in two queries,
+activities are written with one multi-row insert, and notifications are folded
+into one summary per recipient (see NotificationService.send_bulk_task_notifications)
+instead of the several emails/pushes per task that PUT /api/tasks/<id> sends.
+"""
+import json
+from datetime import datetime
+
+from sqlalchemy import insert, delete, update, select, or_, and_
+from sqlalchemy.orm import undefer_group
+
+from app import db
+from app.models import (
+    Task, User, TaskActivity, TaskStatus, TaskPriority, Comment, Meeting, TaskDependency,
+    TaskAttachment, TaskCollaborator,
+)
+from app.tasks.changes import record_deleted, record_changed
+from app.tasks.counters import adjust as adjust_counters
+from app.tasks.sharing import invalidate_tasks as invalidate_shared
+from app.search.index import remove_tasks
+from app.access import can_access_task
+
+
+class BulkError(Exception):
+    """An operation that cannot be applied; reported in its result, the rest of the batch continues."""
+
+
+def _parse_due(value):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        raise BulkError('Invalid due_date')
+
+
+def _as_id(value):
+    """value as a row id, or None when it is missing or not an integer."""
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+def _enum(enum_cls, value, label):
+    try:
+        return enum_cls[str(value).upper()]
+    except KeyError:
+        raise BulkError(f'Invalid {label}')
+
+
+class BulkTaskBatch:
+    def __init__(self, user_id, operations):
+        self.user_id = user_id
+        self.operations = operations
+        self.results = []
+        self.activities = []
+        self.summaries = {}  # user_id -> (lines, assigned)
+        self.created = []  # (result, task)
+        self.deleted = []
+
+    def _notify(self, uid, line, assigned=False):
+        if uid is None or uid == self.user_id:
+            return
+        lines, was_assigned = self.summaries.get(uid, ([], False))
+        lines.append(line)
+        self.summaries[uid] = (lines, was_assigned or assigned)
+
+    def _preload(self):
+        # Malformed operations are skipped here and reported per item by apply()
+        ops = [op for op in self.operations if isinstance(op, dict)]
+        task_ids = {_as_id(op.get('id')) for op in ops if op.get('op') in ('update', 'delete')}
+        task_ids.update(_as_id(op.get('parent_task_id')) for op in ops if op.get('op') == 'create')
+        task_ids.discard(None)
+        self.tasks = {}
+        if task_ids:
+            query = Task.query.options(undefer_group('text')).filter(Task.id.in_(task_ids))
+            self.tasks = {t.id: t for t in query}
+        user_ids = {self.user_id}
+        user_ids.update(_as_id(op.get('assignee_id')) for op in ops)
+        user_ids.discard(None)
+        for task in self.tasks.values():
+            user_ids.update((task.assignee_id, task.created_by_id))
+        self.users = {u.id: u for u in User.query.filter(User.id.in_(user_ids))}
+
+    def _task_for(self, op):
+        task = self.tasks.get(_as_id(op.get('id')))
+        if task is None:
+            raise BulkError('Task not found')
+        if not can_access_task(self.user_id, task, 'manage'):
+            raise BulkError('You do not have permission to change this task')
+        return task
+
+    def _assignee(self, assignee_id):
+        assignee_id = _as_id(assignee_id)
+        if assignee_id not in self.users:
+            raise BulkError('Assignee not found')
+        return assignee_id
+
+    def _parent(self, parent_task_id):
+        parent = self.tasks.get(_as_id(parent_task_id))
+        if parent is None or parent in self.deleted:
+            raise BulkError('Parent task not found')
+        if not can_access_task(self.user_id, parent, 'write'):
+            raise BulkError('You do not have access to the parent task')
+        return parent
+
+    def _create(self, op):
+        if not op.get('title') or not op.get('assignee_id'):
+            raise BulkError('Missing required fields: title, assignee_id')
+        parent = self._parent(op['parent_task_id']) if op.get('parent_task_id') is not None else None
+        # Subtasks live in their parent's workspace unless one is given explicitly
+        workspace_id = op.get('workspace_id') or (
+            parent.workspace_id if parent else self.users[self.user_id].current_workspace_id)
+        task = Task(
+            title=op['title'],
+            description=op.get('description', ''),
+            assignee_id=self._assignee(op['assignee_id']),
+            created_by_id=self.user_id,
+            workspace_id=workspace_id,
+            parent_task_id=parent.id if parent else None,
+            priority=_enum(TaskPriority, op.get('priority', 'MEDIUM'), 'priority'),
+            category=op.get('category'),
+            due_date=_parse_due(op.get('due_date')),
+            estimated_hours=op.get('estimated_hours'),
+            notes=op.get('notes'),
+        )
+        db.session.add(task)
+        self._notify(task.assignee_id, f'Assigned to you: {task.title}', assigned=True)
+        return task
+
+    def _update(self, op):
+        task = self._task_for(op)
+        if task in self.deleted:
+            raise BulkError('Task is already deleted in this batch')
+        old_status = task.status
+        old_assignee_id = task.assignee_id
+        # Validate everything before touching the task so a bad field leaves it unchanged
+        status = _enum(TaskStatus, op['status'], 'status') if op.get('status') else None
+        priority = _enum(TaskPriority, op['priority'], 'priority') if op.get('priority') else None
+        assignee_id = self._assignee(op['assignee_id']) if op.get('assignee_id') else None
+        due_date = _parse_due(op['due_date']) if op.get('due_date') is not None else None
+
+        if op.get('title'):
+            task.title = op['title']
+        if op.get('description') is not None:
+            task.description = op['description']
+        if op.get('category') is not None:
+            task.category = op['category']
+        if op.get('notes') is not None:
+            task.notes = op['notes']
+        if op.get('actual_hours') is not None:
+            task.actual_hours = op['actual_hours']
+        if priority:
+            task.priority = priority
+        if op.get('due_date') is not None:
+            task.due_date = due_date
+        if assignee_id:
+            task.assignee_id = assignee_id
+        if status:
+            task.status = status
+        task.updated_at = datetime.utcnow()
+
+        if status and status != old_status:
+            self.activities.append({
+                'task_id': task.id,
+                'user_id': self.user_id,
+                'workspace_id': task.workspace_id,
+                'activity_type': 'status_changed',
+                'description': f'Status changed from {old_status.value} to {status.value}',
+                'activity_metadata': json.dumps({'old_status': old_status.value, 'new_status': status.value}),
+                'created_at': datetime.utcnow(),
+            })
+        if task.assignee_id != old_assignee_id:
+            self._notify(task.assignee_id, f'Assigned to you: {task.title}', assigned=True)
+            self._notify(old_assignee_id, f'Reassigned to {self.users[task.assignee_id].name}: {task.title}')
+        elif task.status != old_status:
+            self._notify(task.assignee_id, f'{task.title}: {old_status.value} → {task.status.value}')
+        else:
+            self._notify(task.assignee_id, f'Updated: {task.title}')
+        if task.status == TaskStatus.COMPLETED and old_status != TaskStatus.COMPLETED:
+            self._notify(task.created_by_id, f'Completed by {self.users[task.assignee_id].name}: {task.title}')
+        return task
+
+    def _delete(self, op):
+        task = self._task_for(op)
+        if task in self.deleted:
+            raise BulkError('Task is already deleted in this batch')
+        self._notify(task.assignee_id, f'Deleted: {task.title}')
+        if task.created_by_id != task.assignee_id:
+            self._notify(task.created_by_id, f'Deleted: {task.title}')
+        self.deleted.append(task)
+        return task
+
+    def _delete_all(self):
+        """
+        Set-based delete of self.deleted and everything that cascades from them. Deleting through
+        the session would lazy-load each task's comments, meetings, activities, dependencies,
+        attachments, collaborators and subtasks one task at a time.
+        """
+        ids = [task.id for task in self.deleted]
+        for model in (Comment, Meeting, TaskActivity, TaskAttachment, TaskCollaborator):
+            db.session.execute(delete(model).where(model.task_id.in_(ids)), execution_options={'synchronize_session': False})
+        db.session.execute(
+            delete(TaskDependency).where(or_(TaskDependency.task_id.in_(ids), TaskDependency.depends_on_id.in_(ids))),
+            execution_options={'synchronize_session': False},
+        )
+        # Orphaned subtasks are re-parented in SQL, so log them for sync like any other edit
+        orphaned = and_(Task.parent_task_id.in_(ids), Task.id.notin_(ids))
+        conn = db.session.connection()
+        children = conn.execute(
+            select(Task.id, Task.workspace_id, Task.assignee_id, Task.created_by_id).where(orphaned)
+        ).mappings().all()
+        db.session.execute(
+            update(Task).where(Task.parent_task_id.in_(ids)).values(parent_task_id=None),
+            execution_options={'synchronize_session': False},
+        )
+        record_changed(conn, children)
+        record_deleted(conn, self.deleted)
+        adjust_counters(conn, self.deleted, -1)
+        invalidate_shared(ids)
+        remove_tasks(conn, ids)
+        db.session.execute(delete(Task).where(Task.id.in_(ids)), execution_options={'synchronize_session': False})
+        for task in self.deleted:
+            db.session.expunge(task)
+        # Activities queued by earlier updates would point at rows that no longer exist
+        deleted_ids = set(ids)
+        self.activities = [a for a in self.activities if a['task_id'] not in deleted_ids]
+
+    def apply(self):
+        """Apply every operation and flush; the caller commits or rolls back."""
+        self._preload()
+        handlers = {'create': self._create, 'update': self._update, 'delete': self._delete}
+        for index, op in enumerate(self.operations):
+            result = {'index': index, 'op': op.get('op') if isinstance(op, dict) else None}
+            try:
+                if not isinstance(op, dict) or op.get('op') not in handlers:
+                    raise BulkError("op must be one of: create, update, delete")
+                task = handlers[op['op']](op)
+                result.update(status='ok', id=task.id)
+                if op['op'] == 'create':
+                    self.created.append((result, task))
+            except BulkError as e:
+                result.update(status='error', id=op.get('id') if isinstance(op, dict) else None, error=str(e))
+            self.results.append(result)
+
+        db.session.flush()
+        if self.deleted:
+            self._delete_all()
+        for result, task in self.created:
+            result['id'] = task.id
+            self.activities.append({
+                'task_id': task.id,
+                'user_id': self.user_id,
+                'workspace_id': task.workspace_id,
+                'activity_type': 'created',
+                'description': f'Task "{task.title}" was created',
+                'activity_metadata': None,
+                'created_at': datetime.utcnow(),
+            })
+        if self.activities:
+            db.session.execute(insert(TaskActivity), self.activities)
+
+    @property
+    def failed(self):
+        return sum(1 for r in self.results if r['status'] == 'error')
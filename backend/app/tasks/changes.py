@@ -0,0 +1,140 @@
+"""
+Task change sequence for incremental sync (GET /api/tasks/changes).
+
+Every flush that inserts, updates or deletes a task (or adds/removes one of its
+comments or subtasks, which changes the counts clients display) appends a
+TaskChange row. The row id is the sequence clients sync from, and deleted rows
+are kept as tombstones. Recording happens in a session after_flush hook, so the
+tasks API, the voice blueprint and templates are all covered without each write
+path having to remember to log.
+
+Ids are assigned at flush but become visible at commit, so under concurrent writers a
+lower id can appear after a higher one. Readers therefore only advance to the sync
+watermark: the newest id written at least TASK_CHANGES_LAG_SECONDS ago, below which
+every transaction is assumed to have committed.
+"""
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import event, inspect, or_
+from sqlalchemy.orm import load_only
+
+from app import db
+from app.models import Task, Comment, TaskChange
+
+
+def _snapshot(task, deleted=False):
+    row = {
+        'task_id': task.id,
+        'workspace_id': task.workspace_id,
+        'assignee_id': task.assignee_id,
+        'previous_assignee_id': None,
+        'created_by_id': task.created_by_id,
+        'deleted': deleted,
+    }
+    if not deleted:
+        history = inspect(task).attrs.assignee_id.history
+        if history.deleted and history.deleted[0] != task.assignee_id:
+            row['previous_assignee_id'] = history.deleted[0]
+    return row
+
+
+@event.listens_for(db.session, 'after_flush')
+def _record_task_changes(session, flush_context):
+    rows = {}
+    touched = set()  # Parents of changed comments/subtasks, which are not otherwise in the flush
+    for obj in session.new:
+        if isinstance(obj, Task):
+            rows[obj.id] = _snapshot(obj)
+            touched.add(obj.parent_task_id)
+        elif isinstance(obj, Comment):
+            touched.add(obj.task_id)
+    for obj in session.dirty:
+        if isinstance(obj, Task) and session.is_modified(obj, include_collections=False):
+            rows[obj.id] = _snapshot(obj)
+    for obj in session.deleted:
+        if isinstance(obj, Task):
+            rows[obj.id] = _snapshot(obj, deleted=True)
+            touched.add(obj.parent_task_id)
+        elif isinstance(obj, Comment):
+            touched.add(obj.task_id)
+
+    touched.discard(None)
+    touched.difference_update(rows)
+    if touched:
+        parents = session.query(Task).filter(Task.id.in_(touched)).options(
+            load_only(Task.workspace_id, Task.assignee_id, Task.created_by_id))
+        for task in parents:
+            rows[task.id] = _snapshot(task)
+    if rows:
+        session.connection().execute(TaskChange.__table__.insert(), list(rows.values()))
+
+
+def record_changed(conn, rows):
+    """Change rows for tasks inserted or updated outside the unit of work; rows are mappings of Task columns."""
+    if rows:
+        conn.execute(TaskChange.__table__.insert(), [{
+            'task_id': row['id'],
+            'workspace_id': row['workspace_id'],
+            'assignee_id': row['assignee_id'],
+            'previous_assignee_id': None,
+            'created_by_id': row['created_by_id'],
+            'deleted': False,
+        } for row in rows])
+
+
+record_inserted = record_changed
+
+
+def record_deleted(conn, tasks):
+    """Tombstones for tasks deleted outside the unit of work (e.g. set-based bulk deletes)."""
+    if tasks:
+        conn.execute(TaskChange.__table__.insert(), [_snapshot(task, deleted=True) for task in tasks])
+
+
+def current_sequence():
+    """The sync watermark: the highest change id a reader can safely move past."""
+    lag = current_app.config.get('TASK_CHANGES_LAG_SECONDS', 5)
+    cutoff = datetime.utcnow() - timedelta(seconds=lag)
+    # Walks the primary key down from the newest row, so it only skips the last few seconds of changes
+    head = (
+        db.session.query(TaskChange.id)
+        .filter(TaskChange.changed_at <= cutoff)
+        .order_by(TaskChange.id.desc())
+        .limit(1)
+        .scalar()
+    )
+    return head or 0
+
+
+def changes_since(user_id, since, limit, workspace_id=None):
+    """
+    Changes after sequence since, up to the watermark, that concern user_id (as assignee,
+    former assignee or creator). Newer changes are left for a later call. Returns (task_ids ordered by their last change, next_since, has_more). Reading a full
+    page of change rows and collapsing per task keeps each page bounded by limit.
+    """
+    head = current_sequence()
+    query = TaskChange.query.filter(
+        TaskChange.id > since,
+        TaskChange.id <= head,
+        or_(
+            TaskChange.assignee_id == user_id,
+            TaskChange.previous_assignee_id == user_id,
+            TaskChange.created_by_id == user_id,
+        ),
+    )
+    if workspace_id:
+        query = query.filter(TaskChange.workspace_id == workspace_id)
+    changes = query.with_entities(TaskChange.id, TaskChange.task_id).order_by(TaskChange.id).limit(limit + 1).all()
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    last_change = {}
+    for change_id, task_id in changes:
+        last_change[task_id] = change_id
+    task_ids = sorted(last_change, key=last_change.get)
+    next_since = changes[-1][0] if changes else since
+    if not has_more:
+        # Nothing else for this user up to the watermark, so skip other users' rows next time
+        next_since = max(next_since, head)
+    return task_ids, next_since, has_more
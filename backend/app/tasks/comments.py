@@ -0,0 +1,79 @@
+"""
+Threaded task comments.
+
+Top-level comments (parent_comment_id NULL) are paged newest first with keyset
+pagination, their authors joined into the same query. The reply trees under a page
+are then loaded in one statement: a recursive CTE walks parent_comment_id down from
+the page's comment ids and the authors are joined in, so a page costs two queries
+however many replies it has. Replies are returned oldest first under their parent.
+"""
+from sqlalchemy import select, literal
+from sqlalchemy.orm import aliased, joinedload
+
+from app import db
+from app.models import Comment, User
+from app.pagination import keyset_page
+
+# Replies nested deeper than this are not returned, which also stops a corrupt parent loop
+MAX_THREAD_DEPTH = 32
+
+
+def _comment_dict(comment_id, parent_comment_id, content, created_at, user_id, user_name, user_email):
+    return {
+        'id': comment_id,
+        'parent_comment_id': parent_comment_id,
+        'content': content,
+        'user': {
+            'id': user_id,
+            'name': user_name,
+            'email': user_email
+        },
+        'created_at': created_at.isoformat() if created_at else None,
+        'replies': [],
+    }
+
+
+def _reply_rows(root_ids):
+    """Every reply below root_ids with its author, parents before children."""
+    reply = aliased(Comment)
+    thread = select(Comment.id, literal(0).label('depth')).where(Comment.id.in_(root_ids)).cte('comment_thread', recursive=True)
+    thread = thread.union_all(
+        select(reply.id, thread.c.depth + 1)
+        .join(thread, reply.parent_comment_id == thread.c.id)
+        .where(thread.c.depth < MAX_THREAD_DEPTH)
+    )
+    stmt = (
+        select(Comment.id, Comment.parent_comment_id, Comment.content, Comment.created_at,
+               User.id.label('user_id'), User.name, User.email)
+        .join(thread, thread.c.id == Comment.id)
+        .join(User, User.id == Comment.user_id)
+        .where(thread.c.depth > 0)
+        .order_by(thread.c.depth, Comment.created_at, Comment.id)
+    )
+    return db.session.execute(stmt)
+
+
+def comment_threads(task_id, cursor, limit):
+    """
+    (threads, next_cursor): one page of the task's top-level comments, newest first, each
+    with its nested 'replies'. Raises ValueError for a bad cursor.
+    """
+    query = (
+        Comment.query.options(joinedload(Comment.user))
+        .filter(Comment.task_id == task_id, Comment.parent_comment_id.is_(None))
+    )
+    comments, next_cursor = keyset_page(query, Comment.created_at, Comment.id, cursor, limit)
+    nodes = {}
+    threads = []
+    for comment in comments:
+        node = _comment_dict(comment.id, None, comment.content, comment.created_at,
+                             comment.user.id, comment.user.name, comment.user.email)
+        nodes[comment.id] = node
+        threads.append(node)
+    if nodes:
+        for row in _reply_rows(list(nodes)):
+            node = _comment_dict(*row)
+            nodes[row.id] = node
+            if row.parent_comment_id in nodes:
+                nodes[row.parent_comment_id]['replies'].append(node)
+    return threads, next_cursor
@@ -0,0 +1,169 @@
+"""
+Per-workspace task status counters.
+
+task_counters holds how many tasks each (workspace, assignee, status) has, so "how many
+tasks" reads (GET /api/tasks/counts, the voice completion rate, the assignment report)
+sum a few counter rows instead of counting or loading tasks.
+
+Every flush that creates or deletes a task, or changes its workspace, assignee or status,
+applies its deltas in the same transaction from a session after_flush hook, so the tasks
+API, the voice blueprint and templates are all covered without each write path having to
+remember. Set-based writes that bypass the session (bulk deletes, recurring inserts,
+archival) call adjust() themselves. Deltas are upserts applied in key order, so concurrent
+writers never lose an increment or deadlock on each other.
+
+`flask reconcile-task-counters` rebuilds the table from tasks.
+"""
+from collections import Counter
+from collections.abc import Mapping
+
+import click
+from sqlalchemy import event, inspect, select, insert, update, delete, func, bindparam, text
+
+from app import db
+from app.models import Task, TaskCounter, TaskStatus
+
+_KEY_COLUMNS = ('workspace_id', 'assignee_id', 'status')
+
+
+def _key(workspace_id, assignee_id, status):
+    return (workspace_id or 0, assignee_id, status or TaskStatus.PENDING)
+
+
+def _value(row, name):
+    return row[name] if isinstance(row, Mapping) else getattr(row, name)
+
+
+def _committed_key(task):
+    """The key the task was counted under before this flush."""
+    state = inspect(task)
+    values = []
+    for name in _KEY_COLUMNS:
+        history = state.attrs[name].history
+        values.append(history.deleted[0] if history.deleted else getattr(task, name))
+    return _key(*values)
+
+
+def _upsert_statement(conn):
+    """Add :delta to a counter row, creating it if missing; None where the dialect has no upsert."""
+    table = TaskCounter.__table__
+    dialect = conn.dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return None
+    stmt = dialect_insert(table).values(
+        workspace_id=bindparam('workspace_id'), assignee_id=bindparam('assignee_id'),
+        status=bindparam('status'), count=bindparam('delta'),
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=list(_KEY_COLUMNS),
+        set_={'count': table.c.count + stmt.excluded.count},
+    )
+
+
+def _apply(conn, deltas):
+    rows = [
+        {'workspace_id': key[0], 'assignee_id': key[1], 'status': key[2], 'delta': delta}
+        for key, delta in sorted(deltas.items(), key=lambda item: (item[0][0], item[0][1], item[0][2].name))
+        if delta
+    ]
+    if not rows:
+        return
+    upsert = _upsert_statement(conn)
+    if upsert is not None:
+        conn.execute(upsert, rows)
+        return
+    table = TaskCounter.__table__
+    for row in rows:
+        where = [table.c[name] == row[name] for name in _KEY_COLUMNS]
+        if conn.execute(update(table).where(*where).values(count=table.c.count + row['delta'])).rowcount == 0:
+            conn.execute(insert(table).values(**{name: row[name] for name in _KEY_COLUMNS}, count=row['delta']))
+
+
+def adjust(conn, rows, delta):
+    """Count rows (tasks, or mappings with workspace_id, assignee_id and status) written outside the unit of work."""
+    deltas = Counter()
+    for row in rows:
+        deltas[_key(*(_value(row, name) for name in _KEY_COLUMNS))] += delta
+    _apply(conn, deltas)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _count_task_changes(session, flush_context):
+    deltas = Counter()
+    for obj in session.new:
+        if isinstance(obj, Task):
+            deltas[_key(obj.workspace_id, obj.assignee_id, obj.status)] += 1
+    for obj in session.deleted:
+        if isinstance(obj, Task):
+            deltas[_committed_key(obj)] -= 1
+    for obj in session.dirty:
+        if isinstance(obj, Task):
+            old, new = _committed_key(obj), _key(obj.workspace_id, obj.assignee_id, obj.status)
+            if old != new:
+                deltas[old] -= 1
+                deltas[new] += 1
+    if deltas:
+        _apply(session.connection(), deltas)
+
+
+def reconcile():
+    """Rebuild every counter from the tasks table (no commit). Returns the number of counter rows."""
+    conn = db.session.connection()
+    if conn.dialect.name == 'postgresql':
+        # Wait for in-flight writers and hold new ones until the rebuild commits, so no delta is lost or doubled
+        conn.execute(text('LOCK TABLE task_counters IN SHARE ROW EXCLUSIVE MODE'))
+    table = TaskCounter.__table__
+    conn.execute(delete(table))
+    workspace = func.coalesce(Task.workspace_id, 0)
+    counts = select(workspace, Task.assignee_id, Task.status, func.count()).group_by(workspace, Task.assignee_id, Task.status)
+    conn.execute(insert(table).from_select(['workspace_id', 'assignee_id', 'status', 'count'], counts))
+    return conn.execute(select(func.count()).select_from(table)).scalar()
+
+
+def ensure_counters():
+    """Build the counters once for a database that has tasks but no counters yet (e.g. after upgrading)."""
+    if db.session.query(TaskCounter).first() is None and db.session.query(Task.id).first() is not None:
+        reconcile()
+    db.session.commit()
+
+
+def task_counts(assignee_id=None, workspace_id=None):
+    """{status value: count, ..., 'total': n} over the counters matching the filters."""
+    query = select(TaskCounter.status, func.sum(TaskCounter.count)).group_by(TaskCounter.status)
+    if assignee_id is not None:
+        query = query.where(TaskCounter.assignee_id == assignee_id)
+    if workspace_id is not None:
+        query = query.where(TaskCounter.workspace_id == workspace_id)
+    counts = {status.value: 0 for status in TaskStatus}
+    for status, count in db.session.execute(query):
+        counts[status.value] = int(count or 0)
+    counts['total'] = sum(counts.values())
+    return counts
+
+
+def counts_by_assignee():
+    """{assignee_id: {status value: count, ..., 'total': n}} across all workspaces."""
+    query = (
+        select(TaskCounter.assignee_id, TaskCounter.status, func.sum(TaskCounter.count))
+        .group_by(TaskCounter.assignee_id, TaskCounter.status)
+    )
+    result = {}
+    for assignee_id, status, count in db.session.execute(query):
+        counts = result.setdefault(assignee_id, dict.fromkeys((s.value for s in TaskStatus), 0))
+        counts[status.value] = int(count or 0)
+    for counts in result.values():
+        counts['total'] = sum(counts.values())
+    return result
+
+
+def register_counters(app):
+    @app.cli.command('reconcile-task-counters')
+    def reconcile_task_counters_command():
+        """Rebuild task_counters from the tasks table."""
+        rows = reconcile()
+        db.session.commit()
+        click.echo(f"Rebuilt {rows} task counter row(s)")
@@ -0,0 +1,87 @@
+"""
+Sparse fieldsets for task list responses (?fields=a,b,c or ?view=summary).
+
+Each serializable key maps to the Task columns it needs, so the list query can
+load_only() those columns and skip the user joins and count subqueries when the
+caller does not ask for them.
+"""
+from app.models import Task
+
+
+def _user(u):
+    return {'id': u.id, 'name': u.name, 'email': u.email}
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+# key -> (columns to load, serializer(task, comments_count, subtasks_count))
+TASK_FIELDS = {
+    'id': ((), lambda t, c, s: t.id),
+    'title': ((Task.title,), lambda t, c, s: t.title),
+    'description': ((Task.description,), lambda t, c, s: t.description),
+    'notes': ((Task.notes,), lambda t, c, s: t.notes),
+    'assignee': ((Task.assignee_id,), lambda t, c, s: _user(t.assignee)),
+    'created_by': ((Task.created_by_id,), lambda t, c, s: _user(t.creator)),
+    'status': ((Task.status,), lambda t, c, s: t.status.value),
+    'priority': ((Task.priority,), lambda t, c, s: t.priority.value),
+    'category': ((Task.category,), lambda t, c, s: t.category),
+    'workspace_id': ((Task.workspace_id,), lambda t, c, s: t.workspace_id),
+    'parent_task_id': ((Task.parent_task_id,), lambda t, c, s: t.parent_task_id),
+    'due_date': ((Task.due_date,), lambda t, c, s: _iso(t.due_date)),
+    'created_at': ((Task.created_at,), lambda t, c, s: t.created_at.isoformat()),
+    'updated_at': ((Task.updated_at,), lambda t, c, s: t.updated_at.isoformat()),
+    'comments_count': ((), lambda t, c, s: c),
+    'subtasks_count': ((), lambda t, c, s: s),
+    # Rolled-up progress over all descendants; filled in per page by tasks/tree.py:task_rollups()
+    'rollup': ((), lambda t, c, s: None),
+}
+
+# What GET /api/tasks has always returned
+DEFAULT_LIST_FIELDS = (
+    'id', 'title', 'description', 'assignee', 'created_by', 'status', 'priority', 'category',
+    'due_date', 'created_at', 'updated_at', 'comments_count', 'subtasks_count',
+)
+
+# The change feed also carries the keys an offline store needs to place subtasks and workspaces
+SYNC_FIELDS = DEFAULT_LIST_FIELDS + ('workspace_id', 'parent_task_id')
+
+TASK_VIEWS = {
+    'full': DEFAULT_LIST_FIELDS,
+    'summary': ('id', 'title', 'status', 'priority', 'due_date'),
+}
+
+
+def parse_fields(fields_arg, view_arg, default=DEFAULT_LIST_FIELDS):
+    """
+    Resolve ?fields= / ?view= into an ordered tuple of keys ('id' is always included).
+    Raises ValueError naming any unknown field or view.
+    """
+    if fields_arg:
+        requested = [f.strip() for f in fields_arg.split(',') if f.strip()]
+        unknown = [f for f in requested if f not in TASK_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    elif view_arg:
+        if view_arg not in TASK_VIEWS:
+            raise ValueError(f"Unknown view: {view_arg}")
+        requested = list(TASK_VIEWS[view_arg])
+    else:
+        requested = list(default)
+    if 'id' not in requested:
+        requested.insert(0, 'id')
+    return tuple(dict.fromkeys(requested))
+
+
+def columns_for(fields):
+    """Task columns needed to serialize fields (created_at is always loaded for cursor pagination)."""
+    columns = {Task.created_at.key: Task.created_at}
+    for key in fields:
+        for column in TASK_FIELDS[key][0]:
+            columns.setdefault(column.key, column)
+    return list(columns.values())
+
+
+def serialize_task(task, fields, comments_count=None, subtasks_count=None):
+    return {key: TASK_FIELDS[key][1](task, comments_count, subtasks_count) for key in fields}
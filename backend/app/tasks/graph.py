@@ -0,0 +1,221 @@
+"""
+Task dependency graph for a workspace.
+
+A TaskDependency row (task_id, depends_on_id) is an edge from a task to one of its
+prerequisites. A workspace's edges are loaded in one query into a compact CSR-style
+adjacency (dense node indices, offset/target arrays in both directions) and cached
+per process. The cache is keyed on the workspace's edge watermark (count, max id,
+newest created_at; SQLite can reuse the highest id after a delete), so an edge added or
+removed by any process is picked up on the next request, and is dropped immediately in
+this process from a session after_flush hook. Cycle checks before inserting an edge
+read the edges fresh rather than trusting the watermark.
+
+All traversals are iterative and O(V + E).
+"""
+import threading
+from array import array
+from collections import deque
+
+from sqlalchemy import event, func, select
+
+from app import db
+from app.models import Task, TaskDependency, TaskStatus
+
+# Prerequisites in these states no longer block their dependents
+DONE_STATUSES = (TaskStatus.COMPLETED, TaskStatus.CANCELLED)
+
+_cache = {}  # workspace_id -> (watermark, DependencyGraph)
+_cache_lock = threading.Lock()
+
+
+class DependencyGraph:
+    def __init__(self, edges):
+        """edges: iterable of (task_id, depends_on_id)."""
+        edges = list(edges)
+        index = {}
+        for task_id, depends_on_id in edges:
+            index.setdefault(task_id, len(index))
+            index.setdefault(depends_on_id, len(index))
+        self.ids = array('l', [0]) * len(index)
+        for task_id, i in index.items():
+            self.ids[i] = task_id
+        self.index = index
+        pairs = [(index[t], index[d]) for t, d in edges]
+        # prerequisites of i: prereq_targets[prereq_offsets[i]:prereq_offsets[i + 1]]
+        self.prereq_offsets, self.prereq_targets = self._csr(len(index), pairs)
+        # dependents of i (reverse edges)
+        self.dependent_offsets, self.dependent_targets = self._csr(len(index), [(d, t) for t, d in pairs])
+
+    @staticmethod
+    def _csr(n, pairs):
+        offsets = array('l', [0]) * (n + 1)
+        for source, _ in pairs:
+            offsets[source + 1] += 1
+        for i in range(n):
+            offsets[i + 1] += offsets[i]
+        targets = array('l', [0]) * len(pairs)
+        cursor = array('l', offsets[:n])
+        for source, target in pairs:
+            targets[cursor[source]] = target
+            cursor[source] += 1
+        return offsets, targets
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def edge_count(self):
+        return len(self.prereq_targets)
+
+    def prerequisites(self, i):
+        return self.prereq_targets[self.prereq_offsets[i]:self.prereq_offsets[i + 1]]
+
+    def dependents(self, i):
+        return self.dependent_targets[self.dependent_offsets[i]:self.dependent_offsets[i + 1]]
+
+    def depends_on(self, task_id, other_id):
+        """True if task_id (transitively) depends on other_id, i.e. adding other -> task would close a cycle."""
+        start, goal = self.index.get(task_id), self.index.get(other_id)
+        if start is None or goal is None:
+            return False
+        seen = bytearray(len(self.ids))
+        seen[start] = 1
+        stack = [start]
+        while stack:
+            i = stack.pop()
+            if i == goal:
+                return True
+            for j in self.prerequisites(i):
+                if not seen[j]:
+                    seen[j] = 1
+                    stack.append(j)
+        return False
+
+    def topological_order(self):
+        """
+        (order, cyclic): node indices with every prerequisite before its dependents (Kahn's
+        algorithm), and the indices left over because they sit on or behind a cycle.
+        Cycles can only come from rows written before add_dependency checked for them.
+        """
+        n = len(self.ids)
+        pending = array('l', (self.prereq_offsets[i + 1] - self.prereq_offsets[i] for i in range(n)))
+        queue = deque(i for i in range(n) if pending[i] == 0)
+        order = []
+        while queue:
+            i = queue.popleft()
+            order.append(i)
+            for j in self.dependents(i):
+                pending[j] -= 1
+                if pending[j] == 0:
+                    queue.append(j)
+        cyclic = [i for i in range(n) if pending[i] > 0]
+        return order, cyclic
+
+    def blocking(self, done):
+        """{i: [prerequisite indices not yet done]} for every node that is not done itself and is blocked."""
+        blocked = {}
+        for i in range(len(self.ids)):
+            if done[i]:
+                continue
+            waiting = [j for j in self.prerequisites(i) if not done[j]]
+            if waiting:
+                blocked[i] = waiting
+        return blocked
+
+    def critical_path(self, hours, order):
+        """
+        Longest chain of prerequisites by remaining hours, over a topological order.
+        Returns (node indices from first prerequisite to last dependent, total hours).
+        """
+        n = len(self.ids)
+        if not order:
+            return [], 0.0
+        finish = [0.0] * n
+        previous = array('l', [-1]) * n
+        for i in order:
+            best, via = 0.0, -1
+            for j in self.prerequisites(i):
+                if finish[j] > best:
+                    best, via = finish[j], j
+            finish[i] = best + hours[i]
+            previous[i] = via
+        end = max(order, key=finish.__getitem__)
+        path = []
+        i = end
+        while i != -1:
+            path.append(i)
+            i = previous[i]
+        path.reverse()
+        return path, finish[end]
+
+
+def _edges_query(workspace_id):
+    return (
+        select(TaskDependency.task_id, TaskDependency.depends_on_id)
+        .join(Task, Task.id == TaskDependency.task_id)
+        .where(Task.workspace_id == workspace_id)
+    )
+
+
+def _watermark(workspace_id):
+    stmt = (
+        select(func.count(TaskDependency.id), func.max(TaskDependency.id), func.max(TaskDependency.created_at))
+        .join(Task, Task.id == TaskDependency.task_id)
+        .where(Task.workspace_id == workspace_id)
+    )
+    return tuple(db.session.execute(stmt).one())
+
+
+def workspace_graph(workspace_id, fresh=False):
+    """
+    The cached DependencyGraph for workspace_id, rebuilt from one query when its edges changed
+    (always, with fresh=True).
+    """
+    mark = _watermark(workspace_id)
+    with _cache_lock:
+        cached = _cache.get(workspace_id)
+    if cached and cached[0] == mark and not fresh:
+        return cached[1]
+    graph = DependencyGraph(db.session.execute(_edges_query(workspace_id)).all())
+    with _cache_lock:
+        _cache[workspace_id] = (mark, graph)
+    return graph
+
+
+def invalidate(workspace_id=None):
+    with _cache_lock:
+        if workspace_id is None:
+            _cache.clear()
+        else:
+            _cache.pop(workspace_id, None)
+
+
+def node_states(graph, workspace_id):
+    """(titles, done flags, remaining hours) per node index, from one query over the graph's tasks."""
+    n = len(graph)
+    titles, done, hours = [None] * n, bytearray(n), [0.0] * n
+    if not n:
+        return titles, done, hours
+    # Select nodes through the edge query rather than a 50k-element IN list
+    edges = _edges_query(workspace_id).subquery()
+    node_ids = select(edges.c.task_id).union(select(edges.c.depends_on_id))
+    rows = db.session.execute(
+        select(Task.id, Task.title, Task.status, Task.estimated_hours).where(Task.id.in_(node_ids))
+    )
+    for task_id, title, status, estimated_hours in rows:
+        i = graph.index.get(task_id)
+        if i is None:
+            continue
+        titles[i] = title
+        done[i] = status in DONE_STATUSES
+        hours[i] = 0.0 if done[i] else float(estimated_hours or 0.0)
+    return titles, done, hours
+
+
+@event.listens_for(db.session, 'after_flush')
+def _invalidate_on_edge_change(session, flush_context):
+    changed = [obj for obj in list(session.new) + list(session.deleted) if isinstance(obj, TaskDependency)]
+    if not changed:
+        return
+    # Edges are few per flush; clearing everything avoids loading each dependent task's workspace
+    invalidate()
@@ -0,0 +1,57 @@
+"""
+@mention resolution for comments.
+
+All handles in a comment are matched in one query against the task's workspace
+members (every user when the task has no workspace), then each handle picks its best
+candidate in memory: a whole word of the name, then a word prefix, then any substring,
+so "@ann" prefers "Ann Lee" over "Joanna Smith". Ties go to the lowest user id.
+The comment's author is never among the results, so mentioning yourself notifies no one.
+"""
+import re
+
+from sqlalchemy import or_, func
+
+from app.models import User, WorkspaceMember
+
+MENTION_PATTERN = re.compile(r'@(\w+)')
+
+# More distinct handles than this in one comment are ignored
+MAX_MENTIONS = 50
+
+
+def mention_handles(content):
+    """Distinct lowercased handles in order of first appearance."""
+    handles = dict.fromkeys(h.lower() for h in MENTION_PATTERN.findall(content or ''))
+    return list(handles)[:MAX_MENTIONS]
+
+
+def _score(handle, name):
+    words = name.lower().split()
+    if handle in words:
+        return 0
+    if any(w.startswith(handle) for w in words):
+        return 1
+    return 2
+
+
+def resolve_mentions(content, workspace_id=None, author_id=None):
+    """Users mentioned in content, in order of first mention, without duplicates or author_id."""
+    handles = mention_handles(content)
+    if not handles:
+        return []
+    lowered = func.lower(User.name)
+    query = User.query.filter(or_(*[lowered.contains(h, autoescape=True) for h in handles]))
+    if workspace_id:
+        query = query.join(WorkspaceMember, WorkspaceMember.user_id == User.id).filter(
+            WorkspaceMember.workspace_id == workspace_id
+        )
+    candidates = sorted(query.all(), key=lambda u: u.id)
+
+    users = {}
+    for handle in handles:
+        matches = [u for u in candidates if handle in (u.name or '').lower()]
+        if matches:
+            best = min(matches, key=lambda u: _score(handle, u.name))
+            if best.id != author_id:
+                users.setdefault(best.id, best)
+    return list(users.values())
@@ -0,0 +1,181 @@
+"""Query builders shared by the task routes. Kept out of routes.py so list views stay a fixed number of queries."""
+from flask import request
+from app import db
+from app.models import Task, Comment, TaskAttachment, TaskCollaborator
+from app.tasks.fields import DEFAULT_LIST_FIELDS, columns_for
+from app.conditional import watermark, make_etag
+from sqlalchemy import func, null, select
+from sqlalchemy.orm import joinedload, aliased, load_only, undefer, undefer_group
+
+# Sections of GET /api/tasks/<id> that ?include= can select
+DETAIL_SECTIONS = ('comments', 'subtasks', 'attachments', 'collaborators')
+
+
+def comment_counts_subquery():
+    """(task_id, n) for every task that has comments."""
+    return (
+        db.session.query(Comment.task_id.label('task_id'), func.count(Comment.id).label('n'))
+        .group_by(Comment.task_id)
+        .subquery()
+    )
+
+
+def subtask_counts_subquery():
+    """(parent_task_id, n) for every task that has subtasks."""
+    child = aliased(Task)
+    return (
+        db.session.query(child.parent_task_id.label('task_id'), func.count(child.id).label('n'))
+        .filter(child.parent_task_id.isnot(None))
+        .group_by(child.parent_task_id)
+        .subquery()
+    )
+
+
+def task_list_query(fields=DEFAULT_LIST_FIELDS):
+    """
+    Query yielding (task, comments_count, subtasks_count) rows.
+    Only the Task columns behind fields are loaded. Assignee and creator are eager-joined
+    and both counts come from grouped subqueries when requested (otherwise NULL), so
+    serializing the result never touches the database again.
+    Callers add their own filters and ordering on Task as usual.
+    """
+    columns = [Task]
+    if 'comments_count' in fields:
+        comments = comment_counts_subquery()
+        columns.append(func.coalesce(comments.c.n, 0).label('comments_count'))
+    else:
+        columns.append(null().label('comments_count'))
+    if 'subtasks_count' in fields:
+        subtasks = subtask_counts_subquery()
+        columns.append(func.coalesce(subtasks.c.n, 0).label('subtasks_count'))
+    else:
+        columns.append(null().label('subtasks_count'))
+
+    query = db.session.query(*columns).options(load_only(*columns_for(fields)))
+    if 'comments_count' in fields:
+        query = query.outerjoin(comments, comments.c.task_id == Task.id)
+    if 'subtasks_count' in fields:
+        query = query.outerjoin(subtasks, subtasks.c.task_id == Task.id)
+    if 'assignee' in fields:
+        query = query.options(joinedload(Task.assignee))
+    if 'created_by' in fields:
+        query = query.options(joinedload(Task.creator))
+    return query
+
+
+def task_list_etag(query, fields, user_id):
+    """
+    (etag, last_modified) for a filtered Task query, from max(updated_at) and row count.
+    Comment and subtask watermarks are folded in only when their counts are requested.
+    """
+    query = query.order_by(None)
+    task_ids = query.with_entities(Task.id)
+    aggregates = [
+        query.with_entities(func.max(Task.updated_at)),
+        query.with_entities(func.count(Task.id)),
+    ]
+    if 'comments_count' in fields:
+        aggregates += [
+            select(func.max(Comment.id)).where(Comment.task_id.in_(task_ids)),
+            select(func.count(Comment.id)).where(Comment.task_id.in_(task_ids)),
+        ]
+    if 'subtasks_count' in fields:
+        child = aliased(Task)
+        aggregates += [
+            select(func.max(child.updated_at)).where(child.parent_task_id.in_(task_ids)),
+            select(func.count(child.id)).where(child.parent_task_id.in_(task_ids)),
+        ]
+    if 'rollup' in fields:
+        # Any subtask change at any depth may move a rollup; cheap and conservative
+        aggregates += [
+            select(func.max(Task.updated_at)).where(Task.parent_task_id.isnot(None)),
+            select(func.count(Task.id)).where(Task.parent_task_id.isnot(None)),
+        ]
+    values = watermark(*aggregates)
+    return make_etag(user_id, request.query_string, *values), values[0]
+
+
+def task_detail_etag(task_id, include=DETAIL_SECTIONS):
+    """
+    (etag, last_modified) for one task's detail view, covering the task row and whichever of
+    its comments, subtasks, attachments and collaborators are included. last_modified is None
+    if the task does not exist.
+    """
+    aggregates = [select(Task.updated_at).where(Task.id == task_id)]
+    if 'comments' in include:
+        aggregates += [
+            select(func.max(Comment.updated_at)).where(Comment.task_id == task_id),
+            select(func.count(Comment.id)).where(Comment.task_id == task_id),
+        ]
+    if 'subtasks' in include:
+        child = aliased(Task)
+        aggregates += [
+            select(func.max(child.updated_at)).where(child.parent_task_id == task_id),
+            select(func.count(child.id)).where(child.parent_task_id == task_id),
+        ]
+    if 'attachments' in include:
+        aggregates += [
+            select(func.max(TaskAttachment.id)).where(TaskAttachment.task_id == task_id),
+            select(func.count(TaskAttachment.id)).where(TaskAttachment.task_id == task_id),
+        ]
+    if 'collaborators' in include:
+        aggregates += [
+            select(func.max(TaskCollaborator.id)).where(TaskCollaborator.task_id == task_id),
+            select(func.count(TaskCollaborator.id)).where(TaskCollaborator.task_id == task_id),
+        ]
+    values = watermark(*aggregates)
+    return make_etag(task_id, request.query_string, *values), values[0]
+
+
+def parse_include(include_arg):
+    """Resolve ?include=a,b into a tuple of DETAIL_SECTIONS (all when absent). Raises ValueError."""
+    if include_arg is None:
+        return DETAIL_SECTIONS
+    requested = [s.strip() for s in include_arg.split(',') if s.strip()]
+    unknown = [s for s in requested if s not in DETAIL_SECTIONS]
+    if unknown:
+        raise ValueError(f"Unknown include section(s): {', '.join(unknown)}")
+    return tuple(dict.fromkeys(requested))
+
+
+def load_task_detail(task_id, include=DETAIL_SECTIONS):
+    """
+    (task, sections) for the detail view, or (None, {}) if the task does not exist.
+    The task and each included section are one query apiece with their users eager-joined,
+    so the cost is at most five queries however many comments or attachments there are.
+    """
+    task = (
+        Task.query.options(undefer_group('text'), joinedload(Task.assignee), joinedload(Task.creator))
+        .filter(Task.id == task_id)
+        .first()
+    )
+    if task is None:
+        return None, {}
+    sections = {}
+    if 'comments' in include:
+        sections['comments'] = (
+            Comment.query.options(joinedload(Comment.user))
+            .filter(Comment.task_id == task_id)
+            .order_by(Comment.created_at.desc())
+            .all()
+        )
+    if 'subtasks' in include:
+        sections['subtasks'] = (
+            Task.query.options(undefer(Task.description), joinedload(Task.assignee))
+            .filter(Task.parent_task_id == task_id)
+            .order_by(Task.created_at.asc())
+            .all()
+        )
+    if 'attachments' in include:
+        sections['attachments'] = (
+            TaskAttachment.query.options(joinedload(TaskAttachment.stored_file), joinedload(TaskAttachment.uploaded_by))
+            .filter(TaskAttachment.task_id == task_id)
+            .all()
+        )
+    if 'collaborators' in include:
+        sections['collaborators'] = (
+            TaskCollaborator.query.options(joinedload(TaskCollaborator.user))
+            .filter(TaskCollaborator.task_id == task_id)
+            .all()
+        )
+    return task, sections
@@ -0,0 +1,243 @@
+"""
+Recurring task materialization.
+
+A task with is_recurring set is the series: it is the first occurrence itself, and
+next_occurrence is when the following one is due. materialize_due() claims series whose
+next_occurrence has passed (an indexed range scan), inserts the missed instances in one
+batched statement, advances next_occurrence and commits, a batch at a time.
+
+Safe with several workers or processes: on PostgreSQL the claim uses FOR UPDATE SKIP
+LOCKED so each series is handled by one worker, and on every backend instances are keyed
+by (recurrence_source_id, occurrence_at) under a unique index and inserted with
+ON CONFLICT DO NOTHING, so a race or a rerun never produces duplicates.
+
+Occurrence k of a series is anchor + k * step (anchor = the series' due date), not the
+previous occurrence plus a step, so monthly series on the 31st do not drift to the 28th.
+"""
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+
+import click
+from dateutil.relativedelta import relativedelta
+from flask import current_app
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.orm import undefer_group
+
+from app import db
+from app.models import Task, TaskActivity, TaskStatus, RecurrenceType
+from app.tasks.changes import record_inserted
+from app.tasks.counters import adjust as adjust_counters
+from app.search.index import reindex_tasks
+
+_UNITS = {
+    'days': lambda n: timedelta(days=n),
+    'weeks': lambda n: timedelta(weeks=n),
+    'months': lambda n: relativedelta(months=n),
+    'years': lambda n: relativedelta(years=n),
+}
+
+_TYPE_UNITS = {
+    RecurrenceType.DAILY: 'days',
+    RecurrenceType.WEEKLY: 'weeks',
+    RecurrenceType.MONTHLY: 'months',
+    RecurrenceType.YEARLY: 'years',
+}
+
+# Rough length of one unit, only used to jump close to the right occurrence index
+_APPROX_SECONDS = {'days': 86400, 'weeks': 7 * 86400, 'months': 30.44 * 86400, 'years': 365.25 * 86400}
+
+# Columns an instance copies from its series
+_COPIED = ('title', 'description', 'notes', 'assignee_id', 'created_by_id', 'workspace_id',
+           'priority', 'category', 'estimated_hours')
+
+
+def _naive(value):
+    return value.replace(tzinfo=None) if value is not None and value.tzinfo else value
+
+
+def _config(task):
+    try:
+        config = json.loads(task.recurrence_config or '{}')
+    except (TypeError, ValueError):
+        return {}
+    return config if isinstance(config, dict) else {}
+
+
+class Schedule:
+    """Occurrences anchor + k * interval units for k >= 1, optionally ending at until."""
+
+    def __init__(self, anchor, unit, interval=1, until=None):
+        self.anchor = _naive(anchor)
+        self.unit = unit
+        self.interval = interval
+        self.until = _naive(until)
+
+    @classmethod
+    def for_task(cls, task):
+        """The task's schedule, or None if it does not recur or its config is unusable."""
+        if not task.is_recurring or task.recurrence_type is None:
+            return None
+        config = _config(task)
+        unit = config.get('unit', 'days') if task.recurrence_type == RecurrenceType.CUSTOM else _TYPE_UNITS.get(task.recurrence_type)
+        if unit not in _UNITS:
+            return None
+        try:
+            interval = max(1, int(config.get('interval') or 1))
+            until = datetime.fromisoformat(str(config['until']).replace('Z', '+00:00')) if config.get('until') else None
+        except (TypeError, ValueError):
+            return None
+        return cls(task.due_date or task.created_at or datetime.utcnow(), unit, interval, until)
+
+    def occurrence(self, k):
+        return self.anchor + _UNITS[self.unit](self.interval * k)
+
+    def _index_at_or_before(self, when):
+        """Largest k >= 0 with occurrence(k) <= when (0 if when is before the first occurrence)."""
+        approx = _APPROX_SECONDS[self.unit] * self.interval
+        k = max(0, int((when - self.anchor).total_seconds() // approx))
+        while k > 0 and self.occurrence(k) > when:
+            k -= 1
+        while self.occurrence(k + 1) <= when:
+            k += 1
+        return k
+
+    def first(self):
+        """The second occurrence, i.e. the first one after the series task itself."""
+        first = self.occurrence(1)
+        return first if self.until is None or first <= self.until else None
+
+    def due(self, next_occurrence, now, limit):
+        """
+        (occurrences to create, new next_occurrence) for everything from next_occurrence up to now.
+        After long downtime only the most recent limit occurrences are created; older ones are skipped.
+        """
+        start = self._index_at_or_before(_naive(next_occurrence))
+        if self.occurrence(start) < _naive(next_occurrence):
+            start += 1
+        start = max(start, 1)  # Occurrence 0 is the series task itself
+        end = self._index_at_or_before(now)
+        occurrences = [self.occurrence(k) for k in range(max(start, end - limit + 1), end + 1)]
+        following = self.occurrence(max(end, start - 1) + 1)
+        if self.until is not None:
+            occurrences = [o for o in occurrences if o <= self.until]
+            if following > self.until:
+                following = None
+        return occurrences, following
+
+
+def initial_next_occurrence(task):
+    """next_occurrence for a newly created recurring task (None when it does not recur)."""
+    schedule = Schedule.for_task(task)
+    return schedule.first() if schedule else None
+
+
+def _claim(now, batch_size):
+    """Due series, locked for this transaction on backends that support SKIP LOCKED."""
+    return (
+        Task.query.options(undefer_group('text'))
+        .filter(Task.is_recurring.is_(True), Task.next_occurrence <= now)
+        .order_by(Task.next_occurrence, Task.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+
+
+def _insert_instances(conn, rows):
+    """Insert instance rows, skipping any occurrence that already exists. Returns the inserted rows."""
+    dialect = conn.dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        dialect_insert = None
+    table = Task.__table__
+    if dialect_insert is None:
+        stmt = insert(table)
+    else:
+        stmt = dialect_insert(table).on_conflict_do_nothing(index_elements=['recurrence_source_id', 'occurrence_at'])
+    stmt = stmt.returning(table.c.id, table.c.title, table.c.workspace_id, table.c.assignee_id, table.c.created_by_id, table.c.status)
+    return [row._mapping for row in conn.execute(stmt, rows)]
+
+
+def materialize_due(now=None, batch_size=None, max_catchup=None):
+    """Create every due occurrence across all series. Returns the number of instances created."""
+    now = now or datetime.utcnow()
+    batch_size = batch_size or current_app.config.get('RECURRING_BATCH_SIZE', 100)
+    max_catchup = max_catchup or current_app.config.get('RECURRING_MAX_CATCHUP', 30)
+    created = 0
+    while True:
+        series = _claim(now, batch_size)
+        if not series:
+            break
+        rows, advances = [], []
+        for task in series:
+            schedule = Schedule.for_task(task)
+            if schedule is None:
+                occurrences, following = [], None
+            else:
+                occurrences, following = schedule.due(task.next_occurrence, now, max_catchup)
+            for occurrence in occurrences:
+                row = {column: getattr(task, column) for column in _COPIED}
+                row.update(
+                    status=TaskStatus.PENDING,
+                    due_date=occurrence,
+                    is_recurring=False,
+                    recurrence_source_id=task.id,
+                    occurrence_at=occurrence,
+                )
+                rows.append(row)
+            advances.append({'b_id': task.id, 'b_next': following})
+
+        conn = db.session.connection()
+        inserted = _insert_instances(conn, rows) if rows else []
+        if inserted:
+            conn.execute(insert(TaskActivity.__table__), [{
+                'task_id': row['id'],
+                'user_id': row['created_by_id'],
+                'workspace_id': row['workspace_id'],
+                'activity_type': 'created',
+                'description': f'Recurring task "{row["title"]}" was created',
+                'created_at': now,
+            } for row in inserted])
+            record_inserted(conn, inserted)
+            adjust_counters(conn, inserted, 1)
+            reindex_tasks(conn, [row['id'] for row in inserted])
+        table = Task.__table__
+        conn.execute(
+            update(table).where(table.c.id == bindparam('b_id')).values(next_occurrence=bindparam('b_next')),
+            advances,
+        )
+        db.session.commit()
+        created += len(inserted)
+    return created
+
+
+def _run_scheduler(app):
+    interval = app.config.get('RECURRING_INTERVAL_SECONDS', 60)
+    while True:
+        with app.app_context():
+            try:
+                created = materialize_due()
+                if created:
+                    print(f"[Recurring] Created {created} task occurrence(s)")
+            except Exception as e:
+                db.session.rollback()
+                print(f"[Recurring] Materialization failed: {e}")
+        time.sleep(interval)
+
+
+def register_recurrence(app):
+    @app.cli.command('materialize-recurring')
+    def materialize_recurring_command():
+        """Create all due recurring task occurrences once (for cron)."""
+        click.echo(f"Created {materialize_due()} task occurrence(s)")
+
+
+def start_recurrence_scheduler(app):
+    """Start the scheduler thread if RECURRING_SCHEDULER_ENABLED; claiming makes it safe for several processes to run one."""
+    if app.config.get('RECURRING_SCHEDULER_ENABLED'):
+        threading.Thread(target=_run_scheduler, args=(app,), daemon=True, name='recurring-tasks').start()
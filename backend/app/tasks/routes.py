@@ -1,9 +1,28 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, make_response, current_app, abort
 from app import db
-from app.models import Task, User, Comment, TaskStatus, TaskPriority, TaskActivity, TaskDependency, TaskShareType, TaskAttachment, TaskCollaborator, StoredFile
+from app.models import Task, User, Comment, TaskStatus, TaskPriority, TaskActivity, TaskDependency, TaskShareType, TaskAttachment, TaskCollaborator, StoredFile, WorkspaceMember, RecurrenceType, archived_tasks
+from app.tasks.queries import task_list_query, task_list_etag, task_detail_etag, parse_include, load_task_detail
+from app.conditional import not_modified, with_validators
+from app.tasks.fields import parse_fields, serialize_task, SYNC_FIELDS
+from app.tasks.changes import changes_since, current_sequence
+from app.tasks.bulk import BulkTaskBatch
+from app.tasks.graph import workspace_graph, node_states
+from app.tasks.recurrence import initial_next_occurrence
+from app.tasks.tree import subtask_tree, attach_rollups
+from app.access import can_access_task
+from app.tasks.mentions import resolve_mentions
+from app.tasks.comments import comment_threads
+from app.tasks.activity import serialize_activities, task_activity_rows
+from app.tasks.archive import archived_task_detail, archived_role, archived_list_query, restore_tasks
+from app.tasks.counters import task_counts
+from app.tasks.sharing import shared_task
+from app.pagination import page_args, keyset_page
+from app.dates import user_timezone, day_window, in_window
+from app.search.index import filter_matching
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, timedelta
-from sqlalchemy import or_, func
+from sqlalchemy import or_
+from sqlalchemy.orm import joinedload
 import secrets
 import json
 
@@ -19,10 +38,15 @@ def get_tasks():
     workspace_filter = request.args.get('workspace_id')
     search = request.args.get('search')
     due_today = request.args.get('due_today', 'false').lower() == 'true'
+    try:
+        fields = parse_fields(request.args.get('fields'), request.args.get('view'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     query = Task.query
     
     # Filter by workspace if specified
+    user = None
     if workspace_filter:
         query = query.filter(Task.workspace_id == workspace_filter)
     else:
@@ -49,43 +73,44 @@ def get_tasks():
             pass
     
     if due_today:
-        today = datetime.utcnow().date()
-        query = query.filter(func.date(Task.due_date) == today)
+        try:
+            tz = user_timezone(user or User.query.get(user_id), request.args.get('tz'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        query = query.filter(in_window(Task.due_date, day_window(tz)))
     
     if search:
-        query = query.filter(or_(
-            Task.title.ilike(f'%{search}%'),
-            Task.description.ilike(f'%{search}%')
-        ))
+        query = filter_matching(query, search)
     
     # Exclude subtasks from main list (show only top-level tasks)
     query = query.filter(Task.parent_task_id.is_(None))
     
-    tasks = query.order_by(Task.created_at.desc()).all()
+    # Polling clients: answer 304 from the filtered set's watermark before loading any rows
+    etag, last_modified = task_list_etag(query, fields, user_id)
+    cached = not_modified(etag, last_modified)
+    if cached:
+        return cached
+    
+    # Only the requested columns, users and counts are loaded, in one round trip (see tasks/queries.py)
+    listing = task_list_query(fields).filter(query.whereclause)
+    page = page_args()
+    next_cursor = None
+    if page is None:
+        rows = listing.order_by(Task.created_at.desc()).all()
+    else:
+        cursor, limit = page
+        try:
+            rows, next_cursor = keyset_page(listing, Task.created_at, Task.id, cursor, limit, entity=lambda row: row[0])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
     
-    return jsonify([{
-        'id': task.id,
-        'title': task.title,
-        'description': task.description,
-        'assignee': {
-            'id': task.assignee.id,
-            'name': task.assignee.name,
-            'email': task.assignee.email
-        },
-        'created_by': {
-            'id': task.creator.id,
-            'name': task.creator.name,
-            'email': task.creator.email
-        },
-        'status': task.status.value,
-        'priority': task.priority.value,
-        'category': task.category,
-        'due_date': task.due_date.isoformat() if task.due_date else None,
-        'created_at': task.created_at.isoformat(),
-        'updated_at': task.updated_at.isoformat(),
-        'comments_count': task.comments.count(),
-        'subtasks_count': len(task.subtasks) if task.subtasks else 0,
-    } for task in tasks]), 200
+    items = [serialize_task(task, fields, comments_count, subtasks_count)
+             for task, comments_count, subtasks_count in rows]
+    if 'rollup' in fields:
+        attach_rollups(items)
+    
+    body = items if page is None else {'items': items, 'next_cursor': next_cursor}
+    return with_validators(make_response(jsonify(body), 200), etag, last_modified)
 
 @tasks_bp.route('', methods=['POST'])
 @jwt_required()
@@ -105,6 +130,13 @@ def create_task():
     except KeyError:
         priority = TaskPriority.MEDIUM
     
+    recurrence_type = None
+    if data.get('is_recurring') and data.get('recurrence_type'):
+        try:
+            recurrence_type = RecurrenceType[str(data['recurrence_type']).upper()]
+        except KeyError:
+            return jsonify({'error': 'Invalid recurrence_type'}), 400
+    
     # Get user's current workspace
     user = User.query.get(user_id)
     workspace_id = data.get('workspace_id') or (user.current_workspace_id if user else None)
@@ -127,12 +159,14 @@ def create_task():
         priority=priority,
         category=data.get('category'),
         due_date=datetime.fromisoformat(str(data['due_date']).replace('Z', '+00:00')) if data.get('due_date') else None,
-        is_recurring=data.get('is_recurring', False),
-        recurrence_type=data.get('recurrence_type'),
+        is_recurring=recurrence_type is not None,
+        recurrence_type=recurrence_type,
         recurrence_config=json.dumps(data.get('recurrence_config', {})) if data.get('recurrence_config') else None,
         estimated_hours=data.get('estimated_hours'),
         notes=data.get('notes'),
     )
+    task.created_at = datetime.utcnow()
+    task.next_occurrence = initial_next_occurrence(task)
     
     db.session.add(task)
     db.session.flush()
@@ -141,6 +175,7 @@ def create_task():
     activity = TaskActivity(
         task_id=task.id,
         user_id=user_id,
+        workspace_id=task.workspace_id,
         activity_type='created',
         description=f'Task "{task.title}" was created'
     )
@@ -152,11 +187,10 @@ def create_task():
         if uid != data['assignee_id'] and User.query.get(uid):
             db.session.add(TaskCollaborator(task_id=task.id, user_id=uid))
     
-    db.session.commit()
-    
-    # Create notification for assignee
+    # Create notification for assignee (outbox rows commit with the task)
     from app.notifications.service import NotificationService
     NotificationService.create_task_assigned_notification(task)
+    db.session.commit()
     
     return jsonify({
         'id': task.id,
@@ -179,56 +213,112 @@ def create_task():
         'created_at': task.created_at.isoformat()
     }), 201
 
-@tasks_bp.route('/<int:task_id>', methods=['GET'])
+@tasks_bp.route('/bulk', methods=['POST'])
 @jwt_required()
-def get_task(task_id):
-    task = Task.query.get_or_404(task_id)
-    
-    comments = [{
-        'id': comment.id,
-        'content': comment.content,
-        'user': {
-            'id': comment.user.id,
-            'name': comment.user.name,
-            'email': comment.user.email
-        },
-        'created_at': comment.created_at.isoformat()
-    } for comment in task.comments.order_by(Comment.created_at.desc()).all()]
-    
-    # Subtasks (tasks with this task as parent)
-    subtasks = Task.query.filter(Task.parent_task_id == task_id).order_by(Task.created_at.asc()).all()
-    subtask_list = [{
-        'id': st.id,
-        'title': st.title,
-        'description': st.description,
-        'status': st.status.value,
-        'priority': st.priority.value,
-        'due_date': st.due_date.isoformat() if st.due_date else None,
-        'assignee': {'id': st.assignee.id, 'name': st.assignee.name, 'email': st.assignee.email},
-        'created_at': st.created_at.isoformat(),
-    } for st in subtasks]
-    
-    # Attachments
-    attachments = []
-    for att in task.attachments.all():
-        sf = att.stored_file
-        attachments.append({
-            'id': att.id,
-            'file_id': sf.id,
-            'original_filename': sf.original_filename,
-            'content_type': sf.content_type,
-            'file_size': sf.file_size,
-            'uploaded_by': {'id': att.uploaded_by.id, 'name': att.uploaded_by.name},
-            'created_at': att.created_at.isoformat(),
-        })
+def bulk_tasks():
+    """
+    Apply {"operations": [{"op": "create"|"update"|"delete", ...}], "atomic": false} in one
+    transaction. Each operation takes the same fields as the single-task endpoints (plus "id"
+    for update/delete) and gets its own entry in results. With atomic=true any failure rolls
+    back the whole batch. Affected users get one coalesced notification for the batch.
+    """
+    user_id = int(get_jwt_identity())
+    data = request.get_json() or {}
+    operations = data.get('operations')
+    if not isinstance(operations, list) or not operations:
+        return jsonify({'error': 'operations must be a non-empty list'}), 400
+    max_items = current_app.config.get('BULK_MAX_ITEMS', 500)
+    if len(operations) > max_items:
+        return jsonify({'error': f'At most {max_items} operations per request'}), 400
+    
+    batch = BulkTaskBatch(user_id, operations)
+    batch.apply()
+    
+    if data.get('atomic') and batch.failed:
+        db.session.rollback()
+        for result in batch.results:
+            if result['status'] == 'ok':
+                result['status'] = 'skipped'
+                if result['op'] == 'create':
+                    result['id'] = None
+        return jsonify({'results': batch.results, 'succeeded': 0, 'failed': batch.failed}), 400
     
-    # Collaborators (additional people on the task, excluding primary assignee)
-    collaborators = []
-    for collab in task.collaborators.all():
-        u = collab.user
-        collaborators.append({'id': u.id, 'name': u.name, 'email': u.email})
+    from app.notifications.service import NotificationService
+    updater = batch.users.get(user_id)
+    NotificationService.send_bulk_task_notifications(batch.summaries, updater.name if updater else "Someone")
+    db.session.commit()
     
     return jsonify({
+        'results': batch.results,
+        'succeeded': len(batch.results) - batch.failed,
+        'failed': batch.failed,
+    }), 200
+
+@tasks_bp.route('/archived', methods=['GET'])
+@jwt_required()
+def get_archived_tasks():
+    """Archived tasks the user created or was assigned, most recently archived first."""
+    user_id = int(get_jwt_identity())
+    try:
+        rows, next_cursor = keyset_page(archived_list_query(user_id), archived_tasks.c.archived_at,
+                                        archived_tasks.c.id, *(page_args() or (None, 50)))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'items': [{
+        'id': row.id,
+        'title': row.title,
+        'status': row.status.value,
+        'priority': row.priority.value,
+        'workspace_id': row.workspace_id,
+        'assignee_id': row.assignee_id,
+        'created_by_id': row.created_by_id,
+        'parent_task_id': row.parent_task_id,
+        'due_date': row.due_date.isoformat() if row.due_date else None,
+        'updated_at': row.updated_at.isoformat() if row.updated_at else None,
+        'archived_at': row.archived_at.isoformat(),
+    } for row in rows], 'next_cursor': next_cursor}), 200
+
+@tasks_bp.route('/<int:task_id>/restore', methods=['POST'])
+@jwt_required()
+def restore_task(task_id):
+    """Move an archived task, with the rest of its tree and their comments, activity and links, back to the live tables."""
+    role = archived_role(int(get_jwt_identity()), task_id)
+    if role is None:
+        if db.session.get(Task, task_id) is None and archived_task_detail(task_id) is not None:
+            return jsonify({'error': 'Unauthorized'}), 403
+        return jsonify({'error': 'Archived task not found'}), 404
+    if role not in ('creator', 'assignee'):
+        return jsonify({'error': 'Only the creator or assignee can restore this task'}), 403
+    restored = restore_tasks([task_id])
+    db.session.commit()
+    return jsonify({'message': 'Task restored', 'restored_ids': restored}), 200
+
+@tasks_bp.route('/<int:task_id>', methods=['GET'])
+@jwt_required()
+def get_task(task_id):
+    # ?include=comments,subtasks,... limits the sections loaded and returned (default: all)
+    try:
+        include = parse_include(request.args.get('include'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    etag, last_modified = task_detail_etag(task_id, include)
+    if last_modified is not None:
+        cached = not_modified(etag, last_modified)
+        if cached:
+            return cached
+    task, sections = load_task_detail(task_id, include)
+    if task is None:
+        # ?include_archived=true falls back to the archive for tasks moved there by `flask archive-tasks`
+        if request.args.get('include_archived', 'false').lower() != 'true':
+            abort(404)
+        body = archived_task_detail(task_id)
+        if body is None:
+            abort(404)
+        if archived_role(int(get_jwt_identity()), task_id) is None:
+            return jsonify({'error': 'Unauthorized'}), 403
+        return jsonify(body), 200
+    
+    body = {
         'id': task.id,
         'title': task.title,
         'description': task.description,
@@ -249,11 +339,63 @@ def get_task(task_id):
         'due_date': task.due_date.isoformat() if task.due_date else None,
         'created_at': task.created_at.isoformat(),
         'updated_at': task.updated_at.isoformat(),
-        'comments': comments,
-        'subtasks': subtask_list,
-        'attachments': attachments,
-        'collaborators': collaborators,
-    }), 200
+    }
+    
+    if 'comments' in sections:
+        body['comments'] = [{
+            'id': comment.id,
+            'content': comment.content,
+            'user': {
+                'id': comment.user.id,
+                'name': comment.user.name,
+                'email': comment.user.email
+            },
+            'created_at': comment.created_at.isoformat()
+        } for comment in sections['comments']]
+    
+    # Subtasks (tasks with this task as parent)
+    if 'subtasks' in sections:
+        body['subtasks'] = [{
+            'id': st.id,
+            'title': st.title,
+            'description': st.description,
+            'status': st.status.value,
+            'priority': st.priority.value,
+            'due_date': st.due_date.isoformat() if st.due_date else None,
+            'assignee': {'id': st.assignee.id, 'name': st.assignee.name, 'email': st.assignee.email},
+            'created_at': st.created_at.isoformat(),
+        } for st in sections['subtasks']]
+    
+    if 'attachments' in sections:
+        body['attachments'] = [{
+            'id': att.id,
+            'file_id': att.stored_file.id,
+            'original_filename': att.stored_file.original_filename,
+            'content_type': att.stored_file.content_type,
+            'file_size': att.stored_file.file_size,
+            'uploaded_by': {'id': att.uploaded_by.id, 'name': att.uploaded_by.name},
+            'created_at': att.created_at.isoformat(),
+        } for att in sections['attachments']]
+    
+    # Collaborators (additional people on the task, excluding primary assignee)
+    if 'collaborators' in sections:
+        body['collaborators'] = [
+            {'id': collab.user.id, 'name': collab.user.name, 'email': collab.user.email}
+            for collab in sections['collaborators']
+        ]
+    
+    return with_validators(make_response(jsonify(body), 200), etag, last_modified)
+
+@tasks_bp.route('/<int:task_id>/tree', methods=['GET'])
+@jwt_required()
+def get_task_tree(task_id):
+    """The task and all nested subtasks, each with rolled-up progress and hours, from one query."""
+    task = db.session.get(Task, task_id)
+    if task is None:
+        return jsonify({'error': 'Task not found'}), 404
+    if not can_access_task(int(get_jwt_identity()), task, 'read'):
+        return jsonify({'error': 'Not authorized'}), 403
+    return jsonify(subtask_tree(task_id)), 200
 
 @tasks_bp.route('/<int:task_id>', methods=['PUT'])
 @jwt_required()
@@ -285,6 +427,7 @@ def update_task(task_id):
                 activity = TaskActivity(
                     task_id=task_id,
                     user_id=user_id,
+                    workspace_id=task.workspace_id,
                     activity_type='status_changed',
                     description=f'Status changed from {old_status} to {new_status.value}',
                     activity_metadata=json.dumps({'old_status': old_status, 'new_status': new_status.value})
@@ -310,7 +453,9 @@ def update_task(task_id):
         task.notes = data['notes']
     
     task.updated_at = datetime.utcnow()
-    db.session.commit()
+    # Flush and reload (assignee/creator may have changed); the notifications below commit with the update
+    db.session.flush()
+    db.session.expire(task)
     
     from app.notifications.service import NotificationService
     updater = User.query.get(user_id)
@@ -340,6 +485,7 @@ def update_task(task_id):
         NotificationService.create_task_completed_notification(task)
     else:
         NotificationService.create_task_updated_notification(task)
+    db.session.commit()
     
     return jsonify({
         'id': task.id,
@@ -359,6 +505,26 @@ def delete_task(task_id):
     
     return jsonify({'message': 'Task deleted successfully'}), 200
 
+@tasks_bp.route('/<int:task_id>/comments', methods=['GET'])
+@jwt_required()
+def get_comments(task_id):
+    task = db.session.get(Task, task_id)
+    if task is None:
+        abort(404)
+    if not can_access_task(int(get_jwt_identity()), task, 'read'):
+        return jsonify({'error': 'Not authorized'}), 403
+    page = page_args()
+    # Unpaged (existing clients): the newest threads as a bare JSON array, capped at one maximum-size page
+    cursor, limit = page if page is not None else (None, current_app.config.get('PAGE_SIZE_MAX', 200))
+    try:
+        threads, next_cursor = comment_threads(task_id, cursor, limit)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if page is None:
+        return jsonify(threads), 200
+    return jsonify({'items': threads, 'next_cursor': next_cursor}), 200
+
 @tasks_bp.route('/<int:task_id>/comments', methods=['POST'])
 @jwt_required()
 def add_comment(task_id):
@@ -369,20 +535,20 @@ def add_comment(task_id):
     if not data or not data.get('content'):
         return jsonify({'error': 'Comment content is required'}), 400
     
-    # Extract mentions from content (@username)
-    import re
-    mentions = []
-    mention_pattern = r'@(\w+)'
-    matches = re.findall(mention_pattern, data['content'])
-    for username in matches:
-        user = User.query.filter(User.name.ilike(f'%{username}%')).first()
-        if user:
-            mentions.append(user.id)
+    parent_comment_id = data.get('parent_comment_id')
+    if parent_comment_id is not None:
+        parent = db.session.get(Comment, parent_comment_id)
+        if parent is None or parent.task_id != task_id:
+            return jsonify({'error': 'Parent comment not found on this task'}), 400
+    
+    # Resolve every @mention in one query against the task's workspace members
+    mentioned_users = resolve_mentions(data['content'], task.workspace_id, author_id=user_id)
+    mentions = [u.id for u in mentioned_users]
     
     comment = Comment(
         task_id=task_id,
         user_id=user_id,
-        parent_comment_id=data.get('parent_comment_id'),
+        parent_comment_id=parent_comment_id,
         content=data['content'],
         mentions=json.dumps(mentions) if mentions else None
     )
@@ -393,27 +559,24 @@ def add_comment(task_id):
     activity = TaskActivity(
         task_id=task_id,
         user_id=user_id,
+        workspace_id=task.workspace_id,
         activity_type='commented',
         description=f'Added a comment'
     )
     db.session.add(activity)
-    db.session.commit()
+    db.session.flush()
     
     from app.notifications.service import NotificationService
     comment_author = User.query.get(user_id)
     comment_author_name = comment_author.name if comment_author else "Someone"
     content_snippet = (data['content'] or "")[:500]
     
-    # Email assignee and creator when someone comments (excluding commenter)
-    NotificationService.send_comment_added_emails(task, comment_author_name, content_snippet, exclude_user_ids=[user_id])
+    # Email assignee and creator when someone comments (excluding commenter; mentioned users get the mention email instead)
+    NotificationService.send_comment_added_emails(task, comment_author_name, content_snippet, exclude_user_ids=[user_id] + mentions)
     
-    # Notify mentioned users (in-app + email)
-    if mentions:
-        for mentioned_id in mentions:
-            NotificationService.create_mention_notification(mentioned_id, task_id, comment.id)
-            mentioned_user = User.query.get(mentioned_id)
-            if mentioned_user:
-                NotificationService.send_mention_email(mentioned_user, task, comment_author_name, content_snippet)
+    # Notify mentioned users (in-app + email), one commit for all of them
+    NotificationService.create_mention_notifications(mentions, task, comment_author_name, content_snippet)
+    db.session.commit()
     
     return jsonify({
         'id': comment.id,
@@ -454,17 +617,22 @@ def share_task(task_id):
 
 @tasks_bp.route('/shared/<token>', methods=['GET'])
 def get_shared_task(token):
-    task = Task.query.filter_by(share_token=token, share_type=TaskShareType.PUBLIC).first_or_404()
-    
-    return jsonify({
-        'id': task.id,
-        'title': task.title,
-        'description': task.description,
-        'status': task.status.value,
-        'priority': task.priority.value,
-        'due_date': task.due_date.isoformat() if task.due_date else None,
-        'created_at': task.created_at.isoformat()
-    }), 200
+    # Public and cacheable: served from the per-process LRU, and browsers/CDNs may reuse it briefly
+    max_age = current_app.config.get('SHARED_TASK_MAX_AGE', 30)
+    shared = shared_task(token)
+    if shared is None:
+        response = make_response(jsonify({'error': 'Not found'}), 404)
+    elif request.if_none_match and request.if_none_match.contains_weak(shared.etag):
+        response = make_response('', 304)
+    else:
+        response = make_response(jsonify(shared.body), 200)
+    if shared is not None:
+        response.set_etag(shared.etag, weak=True)
+        if shared.last_modified is not None:
+            response.last_modified = shared.last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    return response
 
 @tasks_bp.route('/<int:task_id>/dependencies', methods=['POST'])
 @jwt_required()
@@ -478,8 +646,18 @@ def add_dependency(task_id):
     if task_id == depends_on_id:
         return jsonify({'error': 'Task cannot depend on itself'}), 400
     
-    # Check for circular dependencies
-    # (simplified check - in production, do a full graph traversal)
+    tasks = {t.id: t for t in Task.query.filter(Task.id.in_([task_id, depends_on_id]))}
+    if task_id not in tasks or depends_on_id not in tasks:
+        return jsonify({'error': 'Task not found'}), 404
+    workspace_id = tasks[task_id].workspace_id
+    if tasks[depends_on_id].workspace_id != workspace_id:
+        return jsonify({'error': 'Dependencies must be between tasks in the same workspace'}), 400
+    if TaskDependency.query.filter_by(task_id=task_id, depends_on_id=depends_on_id).first():
+        return jsonify({'error': 'Dependency already exists'}), 409
+    
+    # The new edge closes a cycle iff the prerequisite already (transitively) depends on this task
+    if workspace_graph(workspace_id, fresh=True).depends_on(depends_on_id, task_id):
+        return jsonify({'error': 'Dependency would create a cycle'}), 409
     
     dependency = TaskDependency(
         task_id=task_id,
@@ -495,34 +673,110 @@ def add_dependency(task_id):
         'depends_on_id': dependency.depends_on_id
     }), 201
 
+def _requested_workspace(user_id, required=False):
+    """
+    Workspace for the graph and count endpoints: ?workspace_id= if the user is a member, else their
+    current one. With required=True, having neither is a 400 rather than None (all workspace-less tasks).
+    """
+    workspace_id = request.args.get('workspace_id', type=int)
+    if workspace_id is None:
+        user = User.query.get(user_id)
+        workspace_id = user.current_workspace_id if user else None
+        if workspace_id is None and required:
+            return None, (jsonify({'error': 'workspace_id is required'}), 400)
+        return workspace_id, None
+    if not WorkspaceMember.query.filter_by(workspace_id=workspace_id, user_id=user_id).first():
+        return None, (jsonify({'error': 'Unauthorized'}), 403)
+    return workspace_id, None
+
+@tasks_bp.route('/counts', methods=['GET'])
+@jwt_required()
+def get_task_counts():
+    """Task counts by status from the counters: the user's own tasks and the whole workspace."""
+    user_id = int(get_jwt_identity())
+    workspace_id, error = _requested_workspace(user_id)
+    if error:
+        return error
+    return jsonify({
+        'workspace_id': workspace_id,
+        'assigned_to_me': task_counts(assignee_id=user_id, workspace_id=workspace_id),
+        'workspace': task_counts(workspace_id=workspace_id) if workspace_id else None,
+    }), 200
+
+@tasks_bp.route('/dependencies/order', methods=['GET'])
+@jwt_required()
+def get_dependency_order():
+    """Tasks in the workspace's dependency graph, prerequisites first. Tasks on a cycle are listed under 'cyclic'."""
+    workspace_id, error = _requested_workspace(int(get_jwt_identity()), required=True)
+    if error:
+        return error
+    graph = workspace_graph(workspace_id)
+    titles, done, hours = node_states(graph, workspace_id)
+    order, cyclic = graph.topological_order()
+    return jsonify({
+        'order': [{'id': graph.ids[i], 'title': titles[i], 'done': bool(done[i])} for i in order],
+        'cyclic': [graph.ids[i] for i in cyclic],
+    }), 200
+
+@tasks_bp.route('/dependencies/blocked', methods=['GET'])
+@jwt_required()
+def get_blocked_tasks():
+    """Open tasks in the dependency graph split into blocked (with their open prerequisites) and ready to start."""
+    workspace_id, error = _requested_workspace(int(get_jwt_identity()), required=True)
+    if error:
+        return error
+    graph = workspace_graph(workspace_id)
+    titles, done, hours = node_states(graph, workspace_id)
+    blocking = graph.blocking(done)
+    return jsonify({
+        'blocked': [{
+            'id': graph.ids[i],
+            'title': titles[i],
+            'blocked_by': [graph.ids[j] for j in waiting],
+        } for i, waiting in blocking.items()],
+        'unblocked': [
+            {'id': graph.ids[i], 'title': titles[i]}
+            for i in range(len(graph)) if not done[i] and i not in blocking
+        ],
+    }), 200
+
+@tasks_bp.route('/dependencies/critical-path', methods=['GET'])
+@jwt_required()
+def get_critical_path():
+    """Longest chain of open tasks by estimated_hours (completed/cancelled tasks count as zero)."""
+    workspace_id, error = _requested_workspace(int(get_jwt_identity()), required=True)
+    if error:
+        return error
+    graph = workspace_graph(workspace_id)
+    titles, done, hours = node_states(graph, workspace_id)
+    order, cyclic = graph.topological_order()
+    path, total = graph.critical_path(hours, order)
+    return jsonify({
+        'tasks': [{'id': graph.ids[i], 'title': titles[i], 'estimated_hours': hours[i]} for i in path],
+        'total_hours': total,
+        'cyclic': [graph.ids[i] for i in cyclic],
+    }), 200
+
 @tasks_bp.route('/<int:task_id>/activities', methods=['GET'])
 @jwt_required()
 def get_task_activities(task_id):
-    task = Task.query.get_or_404(task_id)
-    activities = task.activities.limit(50).all()
-    
-    return jsonify([{
-        'id': act.id,
-        'activity_type': act.activity_type,
-        'description': act.description,
-        'user': {
-            'id': act.user.id,
-            'name': act.user.name,
-            'email': act.user.email
-        },
-        'metadata': json.loads(act.activity_metadata) if act.activity_metadata else None,
-        'created_at': act.created_at.isoformat()
-    } for act in activities]), 200
+    if db.session.get(Task, task_id) is None:
+        abort(404)
+    # Authors are loaded in one batch
+    return jsonify(serialize_activities(task_activity_rows(task_id, 50))), 200
 
 @tasks_bp.route('/due-today', methods=['GET'])
 @jwt_required()
 def get_tasks_due_today():
     user_id = int(get_jwt_identity())
-    today = datetime.utcnow().date()
+    try:
+        tz = user_timezone(User.query.get(user_id), request.args.get('tz'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     tasks = Task.query.filter(
         Task.assignee_id == user_id,
-        func.date(Task.due_date) == today
+        in_window(Task.due_date, day_window(tz))
     ).all()
     
     return jsonify([{
@@ -533,6 +787,62 @@ def get_tasks_due_today():
         'due_date': task.due_date.isoformat()
     } for task in tasks]), 200
 
+@tasks_bp.route('/changes', methods=['GET'])
+@jwt_required()
+def get_task_changes():
+    """
+    Incremental sync. Without ?since= returns every task the user can see plus a token;
+    with ?since=<token> returns only tasks created or updated after it, and the ids of
+    tasks deleted (or no longer visible to the user) in 'deleted'. Repeat with the
+    returned 'since' while has_more is true.
+    """
+    user_id = int(get_jwt_identity())
+    workspace_id = request.args.get('workspace_id', type=int)
+    try:
+        fields = parse_fields(request.args.get('fields'), request.args.get('view'), default=SYNC_FIELDS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    visible = or_(Task.assignee_id == user_id, Task.created_by_id == user_id)
+    listing = task_list_query(fields).filter(visible)
+    if workspace_id:
+        listing = listing.filter(Task.workspace_id == workspace_id)
+    
+    since_arg = request.args.get('since')
+    if not since_arg:
+        # Initial sync: token first, so anything written while the snapshot loads is re-sent next time
+        since = current_sequence()
+        rows = listing.order_by(Task.id).all()
+        tasks = [serialize_task(task, fields, c, s) for task, c, s in rows]
+        if 'rollup' in fields:
+            attach_rollups(tasks)
+        return jsonify({
+            'tasks': tasks,
+            'deleted': [],
+            'since': str(since),
+            'has_more': False,
+        }), 200
+    
+    try:
+        since = int(since_arg)
+    except ValueError:
+        return jsonify({'error': 'Invalid since token'}), 400
+    limit = request.args.get('limit', type=int) or current_app.config.get('PAGE_SIZE_DEFAULT', 50)
+    limit = max(1, min(limit, current_app.config.get('PAGE_SIZE_MAX', 200)))
+    
+    task_ids, next_since, has_more = changes_since(user_id, since, limit, workspace_id)
+    rows = listing.filter(Task.id.in_(task_ids)).all() if task_ids else []
+    by_id = {task.id: serialize_task(task, fields, c, s) for task, c, s in rows}
+    if 'rollup' in fields:
+        attach_rollups(list(by_id.values()))
+    
+    return jsonify({
+        'tasks': [by_id[tid] for tid in task_ids if tid in by_id],
+        'deleted': [tid for tid in task_ids if tid not in by_id],
+        'since': str(next_since),
+        'has_more': has_more,
+    }), 200
+
 @tasks_bp.route('/users', methods=['GET'])
 @jwt_required()
 def get_users():
@@ -550,11 +860,10 @@ def get_users():
 def get_task_attachments(task_id):
     task = Task.query.get_or_404(task_id)
     user_id = int(get_jwt_identity())
-    if task.assignee_id != user_id and task.created_by_id != user_id:
-        if not any(c.user_id == user_id for c in task.collaborators.all()):
-            return jsonify({'error': 'Not authorized'}), 403
+    if not can_access_task(user_id, task, 'read'):
+        return jsonify({'error': 'Not authorized'}), 403
     attachments = []
-    for att in task.attachments.all():
+    for att in load_task_detail(task_id, ('attachments',))[1]['attachments']:
         sf = att.stored_file
         attachments.append({
             'id': att.id,
@@ -573,9 +882,8 @@ def get_task_attachments(task_id):
 def add_task_attachment(task_id):
     user_id = int(get_jwt_identity())
     task = Task.query.get_or_404(task_id)
-    if task.assignee_id != user_id and task.created_by_id != user_id:
-        if not any(c.user_id == user_id for c in task.collaborators.all()):
-            return jsonify({'error': 'Not authorized'}), 403
+    if not can_access_task(user_id, task, 'write'):
+        return jsonify({'error': 'Not authorized'}), 403
     data = request.get_json()
     file_id = data.get('file_id')
     if not file_id:
@@ -604,9 +912,8 @@ def add_task_attachment(task_id):
 def delete_task_attachment(task_id, att_id):
     user_id = int(get_jwt_identity())
     task = Task.query.get_or_404(task_id)
-    if task.assignee_id != user_id and task.created_by_id != user_id:
-        if not any(c.user_id == user_id for c in task.collaborators.all()):
-            return jsonify({'error': 'Not authorized'}), 403
+    if not can_access_task(user_id, task, 'write'):
+        return jsonify({'error': 'Not authorized'}), 403
     att = TaskAttachment.query.filter_by(id=att_id, task_id=task_id).first_or_404()
     db.session.delete(att)
     db.session.commit()
@@ -618,10 +925,12 @@ def delete_task_attachment(task_id, att_id):
 def get_task_collaborators(task_id):
     task = Task.query.get_or_404(task_id)
     user_id = int(get_jwt_identity())
-    if task.assignee_id != user_id and task.created_by_id != user_id:
-        if not any(c.user_id == user_id for c in task.collaborators.all()):
-            return jsonify({'error': 'Not authorized'}), 403
-    collaborators = [{'id': c.user.id, 'name': c.user.name, 'email': c.user.email} for c in task.collaborators.all()]
+    if not can_access_task(user_id, task, 'read'):
+        return jsonify({'error': 'Not authorized'}), 403
+    collaborators = [
+        {'id': c.user.id, 'name': c.user.name, 'email': c.user.email}
+        for c in task.collaborators.options(joinedload(TaskCollaborator.user))
+    ]
     return jsonify(collaborators), 200
 
 
@@ -630,7 +939,7 @@ def get_task_collaborators(task_id):
 def add_task_collaborator(task_id):
     user_id = int(get_jwt_identity())
     task = Task.query.get_or_404(task_id)
-    if task.assignee_id != user_id and task.created_by_id != user_id:
+    if not can_access_task(user_id, task, 'manage'):
         return jsonify({'error': 'Only assignee or creator can add collaborators'}), 403
     data = request.get_json()
     collaborator_user_id = data.get('user_id')
@@ -653,7 +962,7 @@ def add_task_collaborator(task_id):
 def remove_task_collaborator(task_id, collab_user_id):
     user_id = int(get_jwt_identity())
     task = Task.query.get_or_404(task_id)
-    if task.assignee_id != user_id and task.created_by_id != user_id:
+    if not can_access_task(user_id, task, 'manage'):
         return jsonify({'error': 'Only assignee or creator can remove collaborators'}), 403
     collab = TaskCollaborator.query.filter_by(task_id=task_id, user_id=collab_user_id).first_or_404()
     db.session.delete(collab)
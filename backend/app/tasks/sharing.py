@@ -0,0 +1,124 @@
+"""
+Public shared-task lookups (GET /api/tasks/shared/<token>).
+
+The endpoint is unauthenticated and a link can circulate widely, so responses are kept
+in a size-bounded, per-process LRU keyed by share token for SHARED_TASK_CACHE_TTL
+seconds; unknown or revoked tokens are cached too, so guessing floods stay off the
+database. A session after_flush hook drops a token as soon as its task changes, is made
+private or is deleted in this process, and drops it again when that transaction commits
+or rolls back, in case a concurrent request re-cached the old committed row in between;
+other processes see the change within the TTL.
+Responses carry an ETag and a short public Cache-Control so browsers and CDNs can
+absorb most of the traffic.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import undefer_group
+
+from app import db
+from app.conditional import make_etag
+from app.models import Task, TaskShareType
+
+_cache = OrderedDict()  # token -> (expires_at, entry or None)
+_cache_lock = threading.Lock()
+
+
+class SharedTask:
+    __slots__ = ('task_id', 'body', 'etag', 'last_modified')
+
+    def __init__(self, task):
+        self.task_id = task.id
+        self.body = {
+            'id': task.id,
+            'title': task.title,
+            'description': task.description,
+            'status': task.status.value,
+            'priority': task.priority.value,
+            'due_date': task.due_date.isoformat() if task.due_date else None,
+            'created_at': task.created_at.isoformat()
+        }
+        self.last_modified = task.updated_at
+        self.etag = make_etag('shared', task.id, task.updated_at, task.status.value, task.share_token)
+
+
+def _load(token):
+    task = (
+        Task.query.options(undefer_group('text'))
+        .filter_by(share_token=token, share_type=TaskShareType.PUBLIC)
+        .first()
+    )
+    return SharedTask(task) if task else None
+
+
+def shared_task(token):
+    """The SharedTask for a public share token, or None; served from the LRU when fresh."""
+    ttl = current_app.config.get('SHARED_TASK_CACHE_TTL', 30)
+    now = time.monotonic()
+    with _cache_lock:
+        cached = _cache.get(token)
+        if cached and cached[0] > now:
+            _cache.move_to_end(token)
+            return cached[1]
+    entry = _load(token)
+    if ttl > 0:
+        max_size = current_app.config.get('SHARED_TASK_CACHE_SIZE', 1024)
+        with _cache_lock:
+            _cache[token] = (now + ttl, entry)
+            _cache.move_to_end(token)
+            while len(_cache) > max_size:
+                _cache.popitem(last=False)
+    return entry
+
+
+def _evict(tokens, task_ids):
+    with _cache_lock:
+        for token in tokens:
+            _cache.pop(token, None)
+        if task_ids:
+            stale = [token for token, (_, entry) in _cache.items() if entry is not None and entry.task_id in task_ids]
+            for token in stale:
+                del _cache[token]
+
+
+def _defer(key, values):
+    db.session.info.setdefault(key, set()).update(values)
+
+
+def invalidate_tokens(tokens):
+    """Drop cached entries (including cached misses) for tokens, now and when the transaction ends."""
+    tokens = set(tokens)
+    _evict(tokens, None)
+    _defer('shared_tokens_changed', tokens)
+
+
+def invalidate_tasks(task_ids):
+    """Drop cached entries for task_ids (for writes that bypass the session, e.g. bulk deletes)."""
+    task_ids = set(task_ids)
+    _evict((), task_ids)
+    _defer('shared_tasks_changed', task_ids)
+
+
+@event.listens_for(db.session, 'after_commit')
+@event.listens_for(db.session, 'after_rollback')
+def _invalidate_after_transaction(session):
+    tokens = session.info.pop('shared_tokens_changed', None)
+    task_ids = session.info.pop('shared_tasks_changed', None)
+    if tokens or task_ids:
+        _evict(tokens or (), task_ids)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _invalidate_on_task_change(session, flush_context):
+    tokens = set()
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Task):
+            history = inspect(obj).attrs.share_token.history
+            tokens.update(history.deleted)
+            tokens.add(obj.share_token)
+    tokens.discard(None)
+    if tokens:
+        invalidate_tokens(tokens)
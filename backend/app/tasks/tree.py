@@ -0,0 +1,129 @@
+"""
+Subtask hierarchies via recursive CTEs.
+
+subtask_tree() returns a task's whole hierarchy from one statement: one CTE walks
+parent_task_id down from the root, a second builds (ancestor, descendant) pairs for
+every node in it, and the rollups (completion counts, summed estimated/actual hours)
+are grouped in SQL. task_rollups() runs the same closure seeded with a page of task ids,
+so list views get rolled-up progress in one extra query per page.
+"""
+from sqlalchemy import select, func, case, literal
+from sqlalchemy.orm import aliased
+
+from app import db
+from app.models import Task, User, TaskStatus
+
+# Deeper hierarchies are cut off here, which also stops a corrupt parent_task_id loop
+MAX_TREE_DEPTH = 32
+
+
+def _rollups(seed):
+    """Subquery of rollups over each seed.c.id task and all of its descendants."""
+    child = aliased(Task)
+    closure = select(
+        seed.c.id.label('ancestor'), seed.c.id.label('descendant'), literal(0).label('depth')
+    ).cte('task_closure', recursive=True)
+    closure = closure.union_all(
+        select(closure.c.ancestor, child.id, closure.c.depth + 1)
+        .join(closure, child.parent_task_id == closure.c.descendant)
+        .where(closure.c.depth < MAX_TREE_DEPTH)
+    )
+    member = aliased(Task)
+    own = closure.c.depth == 0
+    return (
+        select(
+            closure.c.ancestor.label('task_id'),
+            func.count().label('total'),
+            func.sum(case((member.status == TaskStatus.COMPLETED, 1), else_=0)).label('completed'),
+            func.sum(case((member.status == TaskStatus.CANCELLED, 1), else_=0)).label('cancelled'),
+            func.max(case((own, member.status), else_=None)).label('own_status'),
+            func.coalesce(func.sum(member.estimated_hours), 0).label('rollup_estimated_hours'),
+            func.coalesce(func.sum(member.actual_hours), 0).label('rollup_actual_hours'),
+        )
+        .join(member, member.id == closure.c.descendant)
+        .group_by(closure.c.ancestor)
+        .subquery('task_rollups')
+    )
+
+
+def _rollup_dict(row):
+    """
+    Progress is over a task's descendants (cancelled ones excluded); a task without subtasks
+    is 0 or 100 by its own status. Hours are summed over the task and all descendants.
+    """
+    own_status = row.own_status.name if isinstance(row.own_status, TaskStatus) else row.own_status
+    own_completed = own_status == TaskStatus.COMPLETED.name
+    own_cancelled = own_status == TaskStatus.CANCELLED.name
+    subtasks = row.total - 1
+    completed = row.completed - own_completed
+    counted = subtasks - (row.cancelled - own_cancelled)
+    if subtasks:
+        percent = round(100.0 * completed / counted, 1) if counted else 100.0
+    else:
+        percent = 100.0 if own_completed else 0.0
+    return {
+        'subtasks': subtasks,
+        'completed_subtasks': completed,
+        'percent_complete': percent,
+        'estimated_hours': float(row.rollup_estimated_hours or 0),
+        'actual_hours': float(row.rollup_actual_hours or 0),
+    }
+
+
+def task_rollups(task_ids):
+    """{task_id: rollup dict} for task_ids, in one query."""
+    if not task_ids:
+        return {}
+    seed = select(Task.id).where(Task.id.in_(list(task_ids))).subquery('seed')
+    rollups = _rollups(seed)
+    return {row.task_id: _rollup_dict(row) for row in db.session.execute(select(rollups))}
+
+
+def attach_rollups(items):
+    """Fill 'rollup' on serialized list items (see the 'rollup' field in tasks/fields.py)."""
+    rollups = task_rollups([item['id'] for item in items])
+    for item in items:
+        item['rollup'] = rollups.get(item['id'])
+    return items
+
+
+def subtask_tree(root_id):
+    """The task root_id with nested 'subtasks' and a 'rollup' on every node, or None if it does not exist."""
+    child = aliased(Task)
+    tree = select(Task.id, literal(0).label('depth')).where(Task.id == root_id).cte('task_tree', recursive=True)
+    tree = tree.union_all(
+        select(child.id, tree.c.depth + 1)
+        .join(tree, child.parent_task_id == tree.c.id)
+        .where(tree.c.depth < MAX_TREE_DEPTH)
+    )
+    rollups = _rollups(select(tree.c.id).subquery('seed'))
+    stmt = (
+        select(Task.id, Task.parent_task_id, Task.title, Task.status, Task.priority, Task.due_date,
+               Task.assignee_id, User.name.label('assignee_name'), Task.estimated_hours, Task.actual_hours,
+               tree.c.depth, rollups)
+        .join(tree, tree.c.id == Task.id)
+        .join(rollups, rollups.c.task_id == Task.id)
+        .outerjoin(User, User.id == Task.assignee_id)
+        .order_by(tree.c.depth, Task.created_at, Task.id)
+    )
+    nodes = {}
+    root = None
+    for row in db.session.execute(stmt):
+        node = {
+            'id': row.id,
+            'title': row.title,
+            'status': row.status.value,
+            'priority': row.priority.value,
+            'due_date': row.due_date.isoformat() if row.due_date else None,
+            'assignee': {'id': row.assignee_id, 'name': row.assignee_name},
+            'estimated_hours': row.estimated_hours,
+            'actual_hours': row.actual_hours,
+            'rollup': _rollup_dict(row),
+            'subtasks': [],
+        }
+        nodes[row.id] = node
+        if row.depth == 0:
+            root = node
+        elif row.parent_task_id in nodes:
+            nodes[row.parent_task_id]['subtasks'].append(node)
+    return root
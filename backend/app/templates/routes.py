@@ -95,11 +95,12 @@ def create_task_from_template(template_id):
     )
     
     db.session.add(task)
-    db.session.commit()
+    db.session.flush()
     
-    # Create notification
+    # Create notification (outbox rows commit with the task)
     from app.notifications.service import NotificationService
     NotificationService.create_task_assigned_notification(task)
+    db.session.commit()
     
     return jsonify({
         'id': task.id,
@@ -8,6 +8,10 @@ import re
 import azure.cognitiveservices.speech as speechsdk
 from app.config import Config
 from dateutil import parser as date_parser
+from app.dates import user_timezone, day_window, week_window, in_window
+from app.search.index import rank_matching
+from app.access import can_access_task
+from app.tasks.counters import task_counts
 
 voice_bp = Blueprint('voice', __name__)
 
@@ -99,6 +103,14 @@ def process_voice_command():
     # Log incoming command for debugging
     print(f"[Voice Command] User {user_id}: {data['text']}")
     
+    # "today" / "this week" are the user's local day and week (same windows as /api/tasks/due-today)
+    try:
+        tz = user_timezone(User.query.get(user_id), data.get('timezone'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    today_range = day_window(tz)
+    week_range = week_window(tz)
+    
     # PRIORITY ORDER: Check queries FIRST before commands to avoid false positives
     # This prevents "What events do I have?" from being detected as task creation
     
@@ -150,18 +162,13 @@ def process_voice_command():
             from app.calendar.routes import get_google_access_token
             import requests
             
-            today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-            today_end = today_start + timedelta(days=1)
-            
             # Filter by date if mentioned
             if 'today' in text:
-                time_min = today_start.isoformat() + 'Z'
-                time_max = today_end.isoformat() + 'Z'
+                time_min = today_range[0].isoformat() + 'Z'
+                time_max = today_range[1].isoformat() + 'Z'
             elif 'this week' in text:
-                week_start = datetime.utcnow() - timedelta(days=datetime.utcnow().weekday())
-                week_end = week_start + timedelta(days=7)
-                time_min = week_start.isoformat() + 'Z'
-                time_max = week_end.isoformat() + 'Z'
+                time_min = week_range[0].isoformat() + 'Z'
+                time_max = week_range[1].isoformat() + 'Z'
             else:
                 time_min = datetime.utcnow().isoformat() + 'Z'
                 time_max = None
@@ -206,11 +213,9 @@ def process_voice_command():
             
             meeting_query = Meeting.query.filter(Meeting.user_id == user_id)
             if 'today' in text:
-                meeting_query = meeting_query.filter(Meeting.start_time >= today_start, Meeting.start_time < today_end)
+                meeting_query = meeting_query.filter(in_window(Meeting.start_time, today_range))
             elif 'this week' in text:
-                week_start = datetime.utcnow() - timedelta(days=datetime.utcnow().weekday())
-                week_end = week_start + timedelta(days=7)
-                meeting_query = meeting_query.filter(Meeting.start_time >= week_start, Meeting.start_time < week_end)
+                meeting_query = meeting_query.filter(in_window(Meeting.start_time, week_range))
             else:
                 meeting_query = meeting_query.filter(Meeting.start_time >= datetime.utcnow())
             
@@ -273,13 +278,9 @@ def process_voice_command():
             
             # Filter by date if mentioned
             if 'today' in text:
-                today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-                today_end = today_start + timedelta(days=1)
-                query = query.filter(Meeting.start_time >= today_start, Meeting.start_time < today_end)
+                query = query.filter(in_window(Meeting.start_time, today_range))
             elif 'this week' in text:
-                week_start = datetime.utcnow() - timedelta(days=datetime.utcnow().weekday())
-                week_end = week_start + timedelta(days=7)
-                query = query.filter(Meeting.start_time >= week_start, Meeting.start_time < week_end)
+                query = query.filter(in_window(Meeting.start_time, week_range))
             
             if workspace_id:
                 query = query.filter(Meeting.workspace_id == workspace_id)
@@ -460,13 +461,14 @@ def process_voice_command():
         )
         
         db.session.add(task)
-        db.session.commit()
+        db.session.flush()
         
-        print(f"[Voice] Task created successfully: ID={task.id}, workspace_id={task.workspace_id}")
-        
-        # Create notification
+        # Create notification (outbox rows commit with the task)
         from app.notifications.service import NotificationService
         NotificationService.create_task_assigned_notification(task)
+        db.session.commit()
+        
+        print(f"[Voice] Task created successfully: ID={task.id}, workspace_id={task.workspace_id}")
         
         return jsonify({
             'message': f'Task "{task_title}" created and assigned to {assignee.name}',
@@ -495,13 +497,10 @@ def process_voice_command():
                 # Find task by title
                 user_obj = User.query.get(user_id)
                 workspace_id = user_obj.current_workspace_id if user_obj else None
-                query = Task.query.filter(
-                    Task.title.ilike(f'%{task_title}%'),
-                    or_(Task.assignee_id == user_id, Task.created_by_id == user_id)
-                )
+                query = Task.query.filter(or_(Task.assignee_id == user_id, Task.created_by_id == user_id))
                 if workspace_id:
                     query = query.filter(Task.workspace_id == workspace_id)
-                task = query.first()
+                task = rank_matching(query, task_title, title_only=True).first()
                 if not task:
                     return jsonify({'error': f'Task "{task_title}" not found'}), 404
             else:
@@ -513,7 +512,7 @@ def process_voice_command():
                 return jsonify({'error': f'Task {task_id} not found'}), 404
         
         # Check permissions
-        if task.assignee_id != user_id and task.created_by_id != user_id:
+        if not can_access_task(user_id, task, 'manage'):
             return jsonify({'error': 'You do not have permission to update this task'}), 403
         
         # Determine new status with more flexible matching
@@ -535,10 +534,10 @@ def process_voice_command():
         
         task.status = new_status
         task.updated_at = datetime.utcnow()
-        db.session.commit()
         
         from app.notifications.service import NotificationService
         NotificationService.create_task_updated_notification(task)
+        db.session.commit()
         
         return jsonify({
             'message': f'Task "{task.title}" moved from {old_status} to {status_msg}',
@@ -553,10 +552,6 @@ def process_voice_command():
     # Check for task queries
     elif is_task_query:
         try:
-            today = datetime.utcnow().date()
-            today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-            today_end = today_start + timedelta(days=1)
-            
             user_obj = User.query.get(user_id)
             workspace_id = user_obj.current_workspace_id if user_obj else None
             
@@ -568,7 +563,7 @@ def process_voice_command():
                 # Include tasks due today OR tasks without due date that are pending/in progress
                 query = query.filter(
                     db.or_(
-                        db.and_(Task.due_date >= today_start, Task.due_date < today_end),
+                        in_window(Task.due_date, today_range),
                         db.and_(
                             Task.due_date.is_(None),
                             Task.status.in_([TaskStatus.PENDING, TaskStatus.IN_PROGRESS])
@@ -649,13 +644,9 @@ def process_voice_command():
         
         # Filter by date if mentioned
         if 'today' in text:
-            today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-            today_end = today_start + timedelta(days=1)
-            query = query.filter(Meeting.start_time >= today_start, Meeting.start_time < today_end)
+            query = query.filter(in_window(Meeting.start_time, today_range))
         elif 'this week' in text:
-            week_start = datetime.utcnow() - timedelta(days=datetime.utcnow().weekday())
-            week_end = week_start + timedelta(days=7)
-            query = query.filter(Meeting.start_time >= week_start, Meeting.start_time < week_end)
+            query = query.filter(in_window(Meeting.start_time, week_range))
         
         # Get upcoming meetings
         now = datetime.utcnow()
@@ -750,17 +741,17 @@ def process_voice_command():
     # Check for reports
     elif any(keyword in text for keyword in ['completion rate', 'task completion', 'how many tasks', 'task report']):
         # Get completion stats
-        total = Task.query.filter_by(assignee_id=user_id).count()
-        completed = Task.query.filter_by(assignee_id=user_id, status=TaskStatus.COMPLETED).count()
+        counts = task_counts(assignee_id=user_id)
+        total = counts['total']
+        completed = counts[TaskStatus.COMPLETED.value]
         rate = (completed / total * 100) if total > 0 else 0
         
         # Check for time period
         if 'this week' in text:
-            week_start = datetime.utcnow() - timedelta(days=datetime.utcnow().weekday())
             completed = Task.query.filter(
                 Task.assignee_id == user_id,
                 Task.status == TaskStatus.COMPLETED,
-                Task.updated_at >= week_start
+                Task.updated_at >= week_range[0]
             ).count()
             return jsonify({
                 'message': f'You completed {completed} task(s) this week',
@@ -824,13 +815,10 @@ def process_voice_command():
                 # Find task by title
                 user_obj = User.query.get(user_id)
                 workspace_id = user_obj.current_workspace_id if user_obj else None
-                query = Task.query.filter(
-                    Task.title.ilike(f'%{task_title}%'),
-                    or_(Task.assignee_id == user_id, Task.created_by_id == user_id)
-                )
+                query = Task.query.filter(or_(Task.assignee_id == user_id, Task.created_by_id == user_id))
                 if workspace_id:
                     query = query.filter(Task.workspace_id == workspace_id)
-                task = query.first()
+                task = rank_matching(query, task_title, title_only=True).first()
                 if not task:
                     return jsonify({'error': f'Task "{task_title}" not found'}), 404
             else:
@@ -842,7 +830,7 @@ def process_voice_command():
                 return jsonify({'error': f'Task {task_id} not found'}), 404
         
         # Only allow deletion if user created it or is assigned to it
-        if task.created_by_id != user_id and task.assignee_id != user_id:
+        if not can_access_task(user_id, task, 'manage'):
             return jsonify({'error': 'You do not have permission to delete this task'}), 403
         
         task_title = task.title
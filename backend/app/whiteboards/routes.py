@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify
 from app import db
 from app.models import Whiteboard, WhiteboardDocument, User, StoredFile
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.pagination import page_args, keyset_page
 
 whiteboards_bp = Blueprint('whiteboards', __name__)
 
@@ -14,15 +15,25 @@ def list_whiteboards():
     query = Whiteboard.query.filter(Whiteboard.user_id == user_id)
     if workspace_id:
         query = query.filter(Whiteboard.workspace_id == workspace_id)
-    boards = query.order_by(Whiteboard.updated_at.desc()).all()
-    return jsonify([{
+    page = page_args()
+    if page is None:
+        boards, next_cursor = query.order_by(Whiteboard.updated_at.desc()).all(), None
+    else:
+        try:
+            boards, next_cursor = keyset_page(query, Whiteboard.updated_at, Whiteboard.id, *page)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+    items = [{
         'id': w.id,
         'title': w.title,
         'workspace_id': w.workspace_id,
         'created_at': w.created_at.isoformat(),
         'updated_at': w.updated_at.isoformat(),
         'documents_count': w.documents.count(),
-    } for w in boards]), 200
+    } for w in boards]
+    if page is None:
+        return jsonify(items), 200
+    return jsonify({'items': items, 'next_cursor': next_cursor}), 200
 
 
 @whiteboards_bp.route('', methods=['POST'])
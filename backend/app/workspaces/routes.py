@@ -1,6 +1,8 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from app import db
 from app.models import Workspace, WorkspaceMember, User
+from app.pagination import page_args
+from app.tasks.activity import workspace_activity, parse_types
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 
@@ -86,6 +88,27 @@ def get_workspace(workspace_id):
         'created_at': workspace.created_at.isoformat()
     }), 200
 
+@workspaces_bp.route('/<int:workspace_id>/activity', methods=['GET'])
+@jwt_required()
+def get_workspace_activity(workspace_id):
+    """Task activity across the workspace, newest first; ?type=commented,status_changed filters."""
+    user_id = int(get_jwt_identity())
+    member = WorkspaceMember.query.filter_by(workspace_id=workspace_id, user_id=user_id).first()
+    if not member:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    page = page_args()
+    cursor, limit = page if page is not None else (None, current_app.config.get('PAGE_SIZE_DEFAULT', 50))
+    try:
+        types = parse_types(request.args.get('type'))
+        items, next_cursor = workspace_activity(workspace_id, cursor, limit, types)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if page is None:
+        return jsonify(items), 200
+    return jsonify({'items': items, 'next_cursor': next_cursor}), 200
+
 @workspaces_bp.route('/<int:workspace_id>/members', methods=['POST'])
 @jwt_required()
 def add_member(workspace_id):
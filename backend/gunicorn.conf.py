@@ -0,0 +1,7 @@
+# Picked up by gunicorn from the app root (Azure App Service starts gunicorn there).
+# Each worker process runs the notification outbox workers and recurring scheduler, unless
+# the environment already sets BACKGROUND_WORKERS_ENABLED (e.g. false when a separate
+# `flask run-workers` process runs them).
+import os
+
+os.environ.setdefault('BACKGROUND_WORKERS_ENABLED', 'true')
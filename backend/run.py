@@ -1,5 +1,5 @@
 import os
-from app import create_app, socketio
+from app import create_app, socketio, start_background_workers
 from app.config import Config
 
 app = create_app(Config)
@@ -7,4 +7,7 @@ app = create_app(Config)
 if __name__ == '__main__':
     # Use PORT from environment or default to 5001 (5000 is often used by AirPlay on macOS)
     port = int(os.environ.get('PORT', 5001))
+    # With the debug reloader only the child process (WERKZEUG_RUN_MAIN) serves requests
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_workers(app)
     socketio.run(app, host='0.0.0.0', port=port, debug=True)
@@ -0,0 +1,37 @@
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app import create_app, db
+from app.config import Config
+from app.models import User
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    OUTBOX_WORKERS = 0
+    MAIL_SUPPRESS_SEND = True
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_user(app):
+    """Create a user; returns (user, Authorization headers)."""
+    def make(name='Test User', **fields):
+        user = User(email=f'{name.lower().replace(" ", ".")}@example.com', password_hash='x', name=name, **fields)
+        db.session.add(user)
+        db.session.commit()
+        return user, {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+    return make
@@ -0,0 +1,48 @@
+import pytest
+
+from app import db, access
+from app.access import task_role
+from app.models import Task
+
+
+@pytest.fixture(autouse=True)
+def access_cache(app):
+    """Turn the per-process role cache on; each test's fresh database reuses the same ids."""
+    app.config['TASK_ACCESS_CACHE_TTL'] = 60
+    access._cache.clear()
+    yield
+    access._cache.clear()
+
+
+def test_collaborator_access_follows_adds_and_removals_with_the_cache_on(client, make_user):
+    owner, owner_headers = make_user('Ann Lee')
+    helper, helper_headers = make_user('Bob Smith')
+    task = Task(title='Shared work', assignee_id=owner.id, created_by_id=owner.id)
+    db.session.add(task)
+    db.session.commit()
+    url = f'/api/tasks/{task.id}/collaborators'
+
+    assert client.get(url, headers=helper_headers).status_code == 403
+    assert client.post(url, json={'user_id': helper.id}, headers=owner_headers).status_code == 201
+    response = client.get(url, headers=helper_headers)
+    assert response.status_code == 200
+    assert [c['id'] for c in response.get_json()] == [helper.id]
+    # Collaborators may read but not manage
+    assert client.post(url, json={'user_id': owner.id}, headers=helper_headers).status_code == 403
+
+    assert client.delete(f'{url}/{helper.id}', headers=owner_headers).status_code == 200
+    assert client.get(url, headers=helper_headers).status_code == 403
+
+
+def test_reassignment_drops_the_cached_role(make_user):
+    owner, _ = make_user('Ann Lee')
+    assignee, _ = make_user('Bob Smith')
+    task = Task(title='Handover', assignee_id=assignee.id, created_by_id=owner.id)
+    db.session.add(task)
+    db.session.commit()
+    task_id = task.id
+
+    assert task_role(assignee.id, task_id) == 'assignee'
+    task.assignee_id = owner.id
+    db.session.commit()
+    assert task_role(assignee.id, task_id) is None
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+
+from app import db
+from app.models import Task, TaskActivity, Workspace, WorkspaceMember
+
+TYPES = ['created', 'commented', 'status_changed']
+
+
+def workspace_feed(user, count):
+    """A workspace with one task and count activities cycling through TYPES, two per timestamp."""
+    workspace = Workspace(name='Team', owner_id=user.id)
+    db.session.add(workspace)
+    db.session.flush()
+    db.session.add(WorkspaceMember(workspace_id=workspace.id, user_id=user.id, role='owner'))
+    task = Task(title='Feed', assignee_id=user.id, created_by_id=user.id, workspace_id=workspace.id)
+    db.session.add(task)
+    db.session.flush()
+    start = datetime(2026, 1, 1)
+    db.session.add_all([
+        TaskActivity(task_id=task.id, user_id=user.id, workspace_id=workspace.id, activity_type=TYPES[i % 3],
+                     description=f'Activity {i}', created_at=start + timedelta(minutes=i // 2))
+        for i in range(count)
+    ])
+    db.session.commit()
+    return workspace.id
+
+
+def read_all(client, headers, url, **args):
+    items, cursor = [], None
+    while True:
+        query = {**args, 'limit': 3, **({'cursor': cursor} if cursor else {})}
+        body = client.get(url, query_string=query, headers=headers).get_json()
+        assert len(body['items']) <= 3
+        items += [item['description'] for item in body['items']]
+        cursor = body['next_cursor']
+        if not cursor:
+            return items
+
+
+def newest_first(indexes):
+    return [f'Activity {i}' for i in sorted(indexes, key=lambda i: (i // 2, i), reverse=True)]
+
+
+def test_feed_pages_newest_first_across_timestamp_ties(client, make_user):
+    user, headers = make_user('Ann Lee')
+    workspace_id = workspace_feed(user, 10)
+    url = f'/api/workspaces/{workspace_id}/activity'
+
+    assert read_all(client, headers, url) == newest_first(range(10))
+    # Unpaged clients get the newest page as a bare array
+    assert len(client.get(url, headers=headers).get_json()) == 10
+
+
+def test_type_filter_merges_each_type_in_order(client, make_user):
+    user, headers = make_user('Ann Lee')
+    workspace_id = workspace_feed(user, 10)
+    url = f'/api/workspaces/{workspace_id}/activity'
+
+    expected = newest_first(i for i in range(10) if TYPES[i % 3] in ('created', 'commented'))
+    assert read_all(client, headers, url, type='created,commented') == expected
+    assert client.get(url, query_string={'type': ','.join(f't{i}' for i in range(11))},
+                      headers=headers).status_code == 400
+    assert client.get(url, query_string={'cursor': 'garbage'}, headers=headers).status_code == 400
+
+
+def test_feed_is_for_members_only(client, make_user):
+    user, _ = make_user('Ann Lee')
+    _, outsider_headers = make_user('Bob Stone')
+    workspace_id = workspace_feed(user, 2)
+    assert client.get(f'/api/workspaces/{workspace_id}/activity', headers=outsider_headers).status_code == 403
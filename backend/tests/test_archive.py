@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+
+from app import db
+from app.models import Task, TaskStatus, Comment, TaskActivity, TaskDependency, archived_tasks
+from app.tasks.archive import archive_closed
+
+LONG_AGO = datetime.utcnow() - timedelta(days=365)
+
+
+def closed_tree(user_id):
+    """A completed root with a completed subtask, a comment, an activity and a dependency on a live task."""
+    live = Task(title='Live', assignee_id=user_id, created_by_id=user_id)
+    root = Task(title='Root', assignee_id=user_id, created_by_id=user_id, status=TaskStatus.COMPLETED)
+    db.session.add_all([live, root])
+    db.session.flush()
+    child = Task(title='Child', assignee_id=user_id, created_by_id=user_id, status=TaskStatus.COMPLETED,
+                 parent_task_id=root.id)
+    db.session.add(child)
+    db.session.flush()
+    db.session.add_all([
+        Comment(task_id=child.id, user_id=user_id, content='Done'),
+        TaskActivity(task_id=root.id, user_id=user_id, activity_type='created', description='Created'),
+        TaskDependency(task_id=child.id, depends_on_id=live.id),
+    ])
+    db.session.commit()
+    # Backdate after the commit so the onupdate hook does not reset it
+    db.session.execute(Task.__table__.update().where(Task.id.in_([root.id, child.id])).values(updated_at=LONG_AGO))
+    db.session.commit()
+    return root.id, child.id, live.id
+
+
+def test_archive_and_restore_round_trip(client, make_user):
+    user, headers = make_user()
+    root, child, live = closed_tree(user.id)
+
+    assert archive_closed() == 2
+    assert client.get(f'/api/tasks/{child}', headers=headers).status_code == 404
+    assert client.get(f'/api/tasks/{child}?include_archived=true', headers=headers).status_code == 200
+    assert Comment.query.count() == 0 and TaskDependency.query.count() == 0
+
+    response = client.post(f'/api/tasks/{root}/restore', headers=headers)
+    assert response.status_code == 200
+    assert sorted(response.get_json()['restored_ids']) == [root, child]
+    assert db.session.execute(archived_tasks.select()).first() is None
+    assert client.get(f'/api/tasks/{child}', headers=headers).status_code == 200
+    assert Comment.query.filter_by(task_id=child).count() == 1
+    assert TaskActivity.query.filter_by(task_id=root).count() == 1
+    assert TaskDependency.query.filter_by(task_id=child, depends_on_id=live).count() == 1
+
+    # Restored trees are fresh again, so the next run leaves them alone
+    assert archive_closed() == 0
+    assert client.get(f'/api/tasks/{root}', headers=headers).status_code == 200
+
+
+def test_restoring_a_subtask_brings_back_its_whole_tree(client, make_user):
+    user, headers = make_user()
+    root, child, _ = closed_tree(user.id)
+    archive_closed()
+
+    response = client.post(f'/api/tasks/{child}/restore', headers=headers)
+    assert sorted(response.get_json()['restored_ids']) == [root, child]
+    assert db.session.get(Task, child).parent_task_id == root
@@ -0,0 +1,93 @@
+from app import db
+from app.models import Task, TaskStatus, Comment
+
+
+def bulk(client, headers, operations, **fields):
+    return client.post('/api/tasks/bulk', json={'operations': operations, **fields}, headers=headers)
+
+
+def test_each_operation_reports_its_own_result(client, make_user):
+    user, headers = make_user('Ann Lee')
+    other, _ = make_user('Bob Smith')
+    mine = Task(title='Mine', assignee_id=user.id, created_by_id=user.id)
+    gone = Task(title='Gone', assignee_id=user.id, created_by_id=user.id)
+    theirs = Task(title='Theirs', assignee_id=other.id, created_by_id=other.id)
+    db.session.add_all([mine, gone, theirs])
+    db.session.commit()
+    mine_id, gone_id, theirs_id = mine.id, gone.id, theirs.id
+
+    response = bulk(client, headers, [
+        {'op': 'create', 'title': 'Created', 'assignee_id': user.id},
+        {'op': 'update', 'id': mine_id, 'title': 'Renamed', 'status': 'bogus'},
+        {'op': 'update', 'id': mine_id, 'status': 'in_progress'},
+        {'op': 'update', 'id': 999999, 'title': 'Nope'},
+        {'op': 'delete', 'id': theirs_id},
+        {'op': 'delete', 'id': gone_id},
+        {'op': 'delete', 'id': gone_id},
+        {'op': 'create', 'title': 'No assignee'},
+        {'op': 'rename'},
+        'not an object',
+    ])
+    assert response.status_code == 200
+    body = response.get_json()
+    assert [(r['status'], r.get('error')) for r in body['results']] == [
+        ('ok', None),
+        ('error', 'Invalid status'),
+        ('ok', None),
+        ('error', 'Task not found'),
+        ('error', 'You do not have permission to change this task'),
+        ('ok', None),
+        ('error', 'Task is already deleted in this batch'),
+        ('error', 'Missing required fields: title, assignee_id'),
+        ('error', 'op must be one of: create, update, delete'),
+        ('error', 'op must be one of: create, update, delete'),
+    ]
+    assert (body['succeeded'], body['failed']) == (3, 7)
+
+    db.session.expire_all()
+    mine = db.session.get(Task, mine_id)
+    # The rejected update left the task untouched; the later one applied
+    assert (mine.title, mine.status) == ('Mine', TaskStatus.IN_PROGRESS)
+    assert db.session.get(Task, gone_id) is None
+    assert db.session.get(Task, theirs_id) is not None
+    assert Task.query.filter_by(title='Created').count() == 1
+
+
+def test_atomic_batch_rolls_back_on_any_failure(client, make_user):
+    user, headers = make_user('Ann Lee')
+    task = Task(title='Keep me', assignee_id=user.id, created_by_id=user.id)
+    db.session.add(task)
+    db.session.commit()
+    task_id = task.id
+
+    response = bulk(client, headers, [
+        {'op': 'create', 'title': 'Created', 'assignee_id': user.id},
+        {'op': 'delete', 'id': task_id},
+        {'op': 'update', 'id': task_id, 'priority': 'extreme'},
+    ], atomic=True)
+    assert response.status_code == 400
+    body = response.get_json()
+    assert [r['status'] for r in body['results']] == ['skipped', 'skipped', 'error']
+    assert body['results'][0]['id'] is None
+
+    db.session.expire_all()
+    assert db.session.get(Task, task_id) is not None
+    assert Task.query.filter_by(title='Created').count() == 0
+
+
+def test_deleting_a_parent_keeps_its_subtasks_and_drops_its_comments(client, make_user):
+    user, headers = make_user('Ann Lee')
+    parent = Task(title='Parent', assignee_id=user.id, created_by_id=user.id)
+    db.session.add(parent)
+    db.session.flush()
+    child = Task(title='Child', assignee_id=user.id, created_by_id=user.id, parent_task_id=parent.id)
+    db.session.add_all([child, Comment(task_id=parent.id, user_id=user.id, content='Note')])
+    db.session.commit()
+    parent_id, child_id = parent.id, child.id
+
+    response = bulk(client, headers, [{'op': 'delete', 'id': parent_id}])
+    assert response.get_json()['results'][0]['status'] == 'ok'
+
+    db.session.expire_all()
+    assert db.session.get(Task, child_id).parent_task_id is None
+    assert Comment.query.filter_by(task_id=parent_id).count() == 0
@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from app import db
+from app.models import Task, TaskChange
+
+
+def sync(client, headers, since=None, **args):
+    if since is not None:
+        args['since'] = since
+    response = client.get('/api/tasks/changes', query_string=args, headers=headers)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def titles(body):
+    return sorted(task['title'] for task in body['tasks'])
+
+
+def test_changes_return_updates_creates_and_deletes(app, client, make_user):
+    app.config['TASK_CHANGES_LAG_SECONDS'] = 0
+    user, headers = make_user('Ann Lee')
+    keep = Task(title='Keep', assignee_id=user.id, created_by_id=user.id)
+    drop = Task(title='Drop', assignee_id=user.id, created_by_id=user.id)
+    db.session.add_all([keep, drop])
+    db.session.commit()
+    drop_id = drop.id
+
+    initial = sync(client, headers)
+    assert titles(initial) == ['Drop', 'Keep']
+    assert sync(client, headers, initial['since'])['tasks'] == []
+
+    keep.title = 'Kept'
+    db.session.delete(drop)
+    db.session.add(Task(title='New', assignee_id=user.id, created_by_id=user.id))
+    db.session.commit()
+    body = sync(client, headers, initial['since'])
+    assert titles(body) == ['Kept', 'New']
+    assert body['deleted'] == [drop_id]
+    assert sync(client, headers, body['since'])['tasks'] == []
+
+
+def test_reassigned_task_is_deleted_for_the_previous_assignee(app, client, make_user):
+    app.config['TASK_CHANGES_LAG_SECONDS'] = 0
+    user, headers = make_user('Ann Lee')
+    other, _ = make_user('Bob Smith')
+    task = Task(title='Handover', assignee_id=user.id, created_by_id=other.id)
+    db.session.add(task)
+    db.session.commit()
+    since = sync(client, headers)['since']
+
+    task.assignee_id = other.id
+    db.session.commit()
+    assert sync(client, headers, since)['deleted'] == [task.id]
+
+
+def test_changes_newer_than_the_lag_wait_for_a_later_call(app, client, make_user):
+    app.config['TASK_CHANGES_LAG_SECONDS'] = 60
+    user, headers = make_user('Ann Lee')
+    since = sync(client, headers)['since']
+
+    db.session.add(Task(title='Fresh', assignee_id=user.id, created_by_id=user.id))
+    db.session.commit()
+    body = sync(client, headers, since)
+    assert body['tasks'] == [] and body['since'] == since  # not skipped past
+
+    # Once the change is older than the lag, every transaction before it has committed
+    db.session.execute(update(TaskChange).values(changed_at=datetime.utcnow() - timedelta(minutes=2)))
+    db.session.commit()
+    body = sync(client, headers, since)
+    assert titles(body) == ['Fresh']
+    assert int(body['since']) > int(since)
+
+
+def test_changes_are_paged_with_has_more(app, client, make_user):
+    app.config['TASK_CHANGES_LAG_SECONDS'] = 0
+    user, headers = make_user('Ann Lee')
+    since = sync(client, headers)['since']
+    db.session.add_all([Task(title=f'Task {i}', assignee_id=user.id, created_by_id=user.id) for i in range(5)])
+    db.session.commit()
+
+    seen = []
+    while True:
+        body = sync(client, headers, since, limit=2)
+        assert len(body['tasks']) <= 2
+        seen += titles(body)
+        since = body['since']
+        if not body['has_more']:
+            break
+    assert sorted(seen) == [f'Task {i}' for i in range(5)]
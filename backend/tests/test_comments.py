@@ -0,0 +1,40 @@
+from app import db
+from app.models import Task
+
+
+def post_comment(client, headers, task_id, content, parent_comment_id=None):
+    response = client.post(f'/api/tasks/{task_id}/comments', headers=headers,
+                           json={'content': content, 'parent_comment_id': parent_comment_id})
+    assert response.status_code == 201
+    return response.get_json()['id']
+
+
+def test_comment_threads_page_newest_first_with_nested_replies(client, make_user):
+    user, headers = make_user()
+    task = Task(title='Plan', assignee_id=user.id, created_by_id=user.id)
+    db.session.add(task)
+    db.session.commit()
+    first = post_comment(client, headers, task.id, 'First')
+    reply = post_comment(client, headers, task.id, 'Reply', first)
+    post_comment(client, headers, task.id, 'Nested reply', reply)
+    post_comment(client, headers, task.id, 'Second')
+    post_comment(client, headers, task.id, 'Third')
+
+    page = client.get(f'/api/tasks/{task.id}/comments?limit=2', headers=headers).get_json()
+    assert [c['content'] for c in page['items']] == ['Third', 'Second']
+    page = client.get(f'/api/tasks/{task.id}/comments?limit=2&cursor={page["next_cursor"]}', headers=headers).get_json()
+    assert [c['content'] for c in page['items']] == ['First']
+    assert page['next_cursor'] is None
+    [thread] = page['items']
+    assert thread['replies'][0]['content'] == 'Reply'
+    assert thread['replies'][0]['replies'][0]['content'] == 'Nested reply'
+
+
+def test_comments_require_access_to_the_task(client, make_user):
+    owner, _ = make_user('Ann Lee')
+    _, stranger_headers = make_user('Bob Smith')
+    task = Task(title='Private', assignee_id=owner.id, created_by_id=owner.id)
+    db.session.add(task)
+    db.session.commit()
+
+    assert client.get(f'/api/tasks/{task.id}/comments', headers=stranger_headers).status_code == 403
@@ -0,0 +1,58 @@
+from app import db
+from app.models import Task, Comment
+
+
+def revalidate(client, url, headers, etag):
+    return client.get(url, headers={**headers, 'If-None-Match': etag})
+
+
+def test_task_list_answers_304_until_the_list_changes(client, make_user):
+    user, headers = make_user('Ann Lee')
+    tasks = [Task(title=f'Task {i}', assignee_id=user.id, created_by_id=user.id) for i in range(3)]
+    db.session.add_all(tasks)
+    db.session.commit()
+
+    first = client.get('/api/tasks', headers=headers)
+    etag = first.headers['ETag']
+    cached = revalidate(client, '/api/tasks', headers, etag)
+    assert cached.status_code == 304 and cached.data == b''
+    assert cached.headers['ETag'] == etag
+
+    tasks[0].title = 'Renamed'
+    db.session.commit()
+    changed = revalidate(client, '/api/tasks', headers, etag)
+    assert changed.status_code == 200
+    etag = changed.headers['ETag']
+
+    # A delete does not move max(updated_at) but does change the count
+    db.session.delete(tasks[1])
+    db.session.commit()
+    assert revalidate(client, '/api/tasks', headers, etag).status_code == 200
+
+
+def test_task_list_etag_is_scoped_to_the_user_and_query(client, make_user):
+    user, headers = make_user('Ann Lee')
+    _, other_headers = make_user('Bob Smith')
+    db.session.add(Task(title='Shared', assignee_id=user.id, created_by_id=user.id))
+    db.session.commit()
+
+    etag = client.get('/api/tasks', headers=headers).headers['ETag']
+    assert revalidate(client, '/api/tasks', other_headers, etag).status_code == 200
+    assert revalidate(client, '/api/tasks?status=pending', headers, etag).status_code == 200
+
+
+def test_task_detail_answers_304_until_a_comment_is_added(client, make_user):
+    user, headers = make_user('Ann Lee')
+    task = Task(title='Detail', assignee_id=user.id, created_by_id=user.id)
+    db.session.add(task)
+    db.session.commit()
+    url = f'/api/tasks/{task.id}'
+
+    etag = client.get(url, headers=headers).headers['ETag']
+    assert revalidate(client, url, headers, etag).status_code == 304
+
+    db.session.add(Comment(task_id=task.id, user_id=user.id, content='New comment'))
+    db.session.commit()
+    response = revalidate(client, url, headers, etag)
+    assert response.status_code == 200
+    assert [c['content'] for c in response.get_json()['comments']] == ['New comment']
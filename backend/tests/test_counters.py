@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from app import db
+from app.models import Task, TaskCounter
+from app.tasks.archive import archive_closed
+from app.tasks.counters import reconcile, task_counts
+
+
+def counters():
+    rows = db.session.execute(select(TaskCounter.workspace_id, TaskCounter.assignee_id, TaskCounter.status, TaskCounter.count))
+    return {(w, a, s): n for w, a, s, n in rows if n}
+
+
+def assert_counters_match_tasks():
+    kept = counters()
+    reconcile()
+    assert kept == counters()
+    db.session.rollback()
+
+
+def test_counters_follow_create_reassign_update_and_delete(client, make_user):
+    ann, headers = make_user('Ann Lee')
+    bob, _ = make_user('Bob Smith')
+
+    ids = [client.post('/api/tasks', json={'title': f'Task {i}', 'assignee_id': ann.id}, headers=headers).get_json()['id']
+           for i in range(3)]
+    assert task_counts(assignee_id=ann.id)['pending'] == 3
+    assert_counters_match_tasks()
+
+    client.put(f'/api/tasks/{ids[0]}', json={'assignee_id': bob.id}, headers=headers)
+    client.put(f'/api/tasks/{ids[1]}', json={'status': 'completed'}, headers=headers)
+    ann_counts = task_counts(assignee_id=ann.id)
+    assert (ann_counts['pending'], ann_counts['completed'], ann_counts['total']) == (1, 1, 2)
+    assert task_counts(assignee_id=bob.id)['pending'] == 1
+    assert_counters_match_tasks()
+
+    client.delete(f'/api/tasks/{ids[2]}', headers=headers)
+    client.post('/api/tasks/bulk', json={'operations': [{'op': 'delete', 'id': ids[0]}]}, headers=headers)
+    assert task_counts()['total'] == 1
+    assert_counters_match_tasks()
+
+
+def test_counters_follow_archive_and_restore(client, make_user):
+    ann, headers = make_user()
+    task_id = client.post('/api/tasks', json={'title': 'Old', 'assignee_id': ann.id}, headers=headers).get_json()['id']
+    client.put(f'/api/tasks/{task_id}', json={'status': 'completed'}, headers=headers)
+    db.session.execute(Task.__table__.update().values(updated_at=datetime.utcnow() - timedelta(days=365)))
+    db.session.commit()
+
+    assert archive_closed() == 1
+    assert task_counts(assignee_id=ann.id)['total'] == 0
+    assert_counters_match_tasks()
+
+    client.post(f'/api/tasks/{task_id}/restore', headers=headers)
+    assert task_counts(assignee_id=ann.id)['completed'] == 1
+    assert_counters_match_tasks()
@@ -0,0 +1,66 @@
+from datetime import datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from app import db
+from app.dates import day_window, week_window
+from app.models import Task
+
+NAIROBI = ZoneInfo('Africa/Nairobi')  # UTC+3, no DST
+
+
+def test_windows_are_local_midnights_as_naive_utc():
+    now = datetime(2026, 3, 4, 22, 30, tzinfo=timezone.utc)  # already Thursday 01:30 in Nairobi
+    assert day_window(NAIROBI, now=now) == (datetime(2026, 3, 4, 21), datetime(2026, 3, 5, 21))
+    assert day_window(NAIROBI, days_ahead=1, now=now) == (datetime(2026, 3, 5, 21), datetime(2026, 3, 6, 21))
+    assert week_window(NAIROBI, now=now) == (datetime(2026, 3, 1, 21), datetime(2026, 3, 8, 21))
+
+
+def test_week_window_spans_a_dst_change():
+    new_york = ZoneInfo('America/New_York')
+    start, end = week_window(new_york, now=datetime(2026, 3, 10, 12, tzinfo=timezone.utc))
+    assert (start, end) == (datetime(2026, 3, 9, 4), datetime(2026, 3, 16, 4))
+    start, end = week_window(new_york, now=datetime(2026, 3, 5, 12, tzinfo=timezone.utc))
+    assert end - start == timedelta(days=7, hours=-1)  # clocks went forward on Sunday 8 March
+
+
+def local_noon(tz, days_ahead=0):
+    day = datetime.now(tz).date() + timedelta(days=days_ahead)
+    return datetime.combine(day, time(12), tzinfo=tz).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def add_today_and_tomorrow(user, tz):
+    db.session.add_all([
+        Task(title='Today', assignee_id=user.id, created_by_id=user.id, due_date=local_noon(tz)),
+        Task(title='Tomorrow', assignee_id=user.id, created_by_id=user.id, due_date=local_noon(tz, 1)),
+    ])
+    db.session.commit()
+
+
+def test_due_today_uses_the_users_timezone(client, make_user):
+    user, headers = make_user('Ann Lee', timezone='Pacific/Kiritimati')  # UTC+14
+    add_today_and_tomorrow(user, ZoneInfo('Pacific/Kiritimati'))
+
+    for url in ('/api/tasks?due_today=true', '/api/tasks/due-today'):
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200
+        assert [task['title'] for task in response.get_json()] == ['Today']
+
+
+def test_tz_parameter_overrides_the_saved_timezone(client, make_user):
+    user, headers = make_user('Ann Lee', timezone='Pacific/Kiritimati')
+    add_today_and_tomorrow(user, ZoneInfo('Pacific/Pago_Pago'))  # UTC-11
+
+    response = client.get('/api/tasks/due-today?tz=Pacific/Pago_Pago', headers=headers)
+    assert [task['title'] for task in response.get_json()] == ['Today']
+
+
+def test_unknown_timezones_are_rejected(client, make_user):
+    _, headers = make_user('Ann Lee')
+    assert client.get('/api/tasks?due_today=true&tz=Mars/Olympus', headers=headers).status_code == 400
+    assert client.get('/api/tasks/due-today?tz=Mars/Olympus', headers=headers).status_code == 400
+    response = client.post('/api/auth/update-timezone', json={'timezone': 'Mars/Olympus'}, headers=headers)
+    assert response.status_code == 400
+
+    response = client.post('/api/auth/update-timezone', json={'timezone': 'Africa/Nairobi'}, headers=headers)
+    assert response.status_code == 200
+    assert client.get('/api/auth/me', headers=headers).get_json()['timezone'] == 'Africa/Nairobi'
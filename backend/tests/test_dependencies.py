@@ -0,0 +1,60 @@
+from sqlalchemy import delete, insert
+
+from app import db
+from app.models import Task, TaskDependency
+from app.tasks.graph import workspace_graph
+
+
+def add_tasks(user_id, *titles):
+    tasks = [Task(title=title, assignee_id=user_id, created_by_id=user_id) for title in titles]
+    db.session.add_all(tasks)
+    db.session.commit()
+    return [task.id for task in tasks]
+
+
+def add_dependency(client, headers, task_id, depends_on_id):
+    return client.post(f'/api/tasks/{task_id}/dependencies', json={'depends_on_id': depends_on_id}, headers=headers)
+
+
+def test_dependency_cycles_are_rejected(client, make_user):
+    user, headers = make_user()
+    a, b, c = add_tasks(user.id, 'Design', 'Build', 'Ship')
+
+    assert add_dependency(client, headers, c, b).status_code == 201
+    assert add_dependency(client, headers, b, a).status_code == 201
+    assert add_dependency(client, headers, a, c).status_code == 409
+    assert add_dependency(client, headers, a, a).status_code == 400
+    assert add_dependency(client, headers, c, b).status_code == 409  # duplicate
+    assert add_dependency(client, headers, c, a).status_code == 201  # shortcut, not a cycle
+
+
+def test_cycle_check_sees_edges_behind_a_stale_cache(client, make_user):
+    user, headers = make_user()
+    a, b, c = add_tasks(user.id, 'Design', 'Build', 'Ship')
+    assert add_dependency(client, headers, a, b).status_code == 201
+    workspace_graph(None)  # cached with a -> b
+
+    # Another process swaps the edge for b -> c in a way the watermark cannot see
+    edge = TaskDependency.query.one()
+    edge_id, created_at = edge.id, edge.created_at
+    db.session.execute(delete(TaskDependency))
+    db.session.execute(insert(TaskDependency).values(id=edge_id, task_id=b, depends_on_id=c, created_at=created_at))
+    db.session.commit()
+
+    assert add_dependency(client, headers, c, b).status_code == 409
+
+
+def test_graph_cache_notices_a_reused_edge_id(client, make_user):
+    user, headers = make_user()
+    a, b, c = add_tasks(user.id, 'Design', 'Build', 'Ship')
+    assert add_dependency(client, headers, a, b).status_code == 201
+    assert workspace_graph(None).depends_on(a, b)
+
+    edge_id = TaskDependency.query.one().id
+    db.session.execute(delete(TaskDependency))
+    db.session.execute(insert(TaskDependency).values(id=edge_id, task_id=b, depends_on_id=c))
+    db.session.commit()
+
+    graph = workspace_graph(None)
+    assert graph.depends_on(b, c)
+    assert not graph.depends_on(a, b)
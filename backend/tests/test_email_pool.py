@@ -0,0 +1,92 @@
+import smtplib
+
+import pytest
+
+from app.config import Config
+from app.notifications import email_service
+from app.notifications.email_service import SMTPPool
+
+
+class FakeSMTP:
+    """Stands in for smtplib.SMTP; `fail` maps a recipient to the exception sending to it raises once."""
+    connections = []
+    fail = {}
+
+    def __init__(self, host, port, timeout=None):
+        self.sent = []
+        self.logins = 0
+        FakeSMTP.connections.append(self)
+
+    def starttls(self):
+        pass
+
+    def login(self, username, password):
+        if password == 'wrong':
+            raise smtplib.SMTPAuthenticationError(535, b'Bad credentials')
+        self.logins += 1
+
+    def send_message(self, msg):
+        error = FakeSMTP.fail.pop(msg['To'], None)
+        if error is not None:
+            raise error
+        self.sent.append(msg['To'])
+
+    def quit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def smtp(monkeypatch):
+    FakeSMTP.connections = []
+    FakeSMTP.fail = {}
+    monkeypatch.setattr(smtplib, 'SMTP', FakeSMTP)
+    monkeypatch.setattr(Config, 'MAIL_USE_SSL', False)
+    monkeypatch.setattr(Config, 'MAIL_USERNAME', 'app@example.com')
+    monkeypatch.setattr(Config, 'MAIL_PASSWORD', 'secret')
+    monkeypatch.setattr(Config, 'MAIL_MAX_MESSAGES_PER_SESSION', 100)
+    return FakeSMTP
+
+
+def messages(*recipients):
+    return [email_service._build_message(to, 'Subject', 'Body') for to in recipients]
+
+
+def test_batches_reuse_one_logged_in_session(smtp):
+    pool = SMTPPool()
+    assert pool.send_many(messages('a@example.com', 'b@example.com')) == [(True, None)] * 2
+    assert pool.send_many(messages('c@example.com')) == [(True, None)]
+    [connection] = smtp.connections
+    assert connection.logins == 1
+    assert connection.sent == ['a@example.com', 'b@example.com', 'c@example.com']
+
+
+def test_sessions_are_retired_after_the_message_cap(smtp, monkeypatch):
+    monkeypatch.setattr(Config, 'MAIL_MAX_MESSAGES_PER_SESSION', 2)
+    pool = SMTPPool()
+    assert pool.send_many(messages(*[f'{i}@example.com' for i in range(5)])) == [(True, None)] * 5
+    assert [len(c.sent) for c in smtp.connections] == [2, 2, 1]
+
+
+def test_dropped_connection_is_replaced_and_the_message_retried(smtp):
+    smtp.fail['b@example.com'] = smtplib.SMTPServerDisconnected('Connection unexpectedly closed')
+    pool = SMTPPool()
+    assert pool.send_many(messages('a@example.com', 'b@example.com', 'c@example.com')) == [(True, None)] * 3
+    assert [c.sent for c in smtp.connections] == [['a@example.com'], ['b@example.com', 'c@example.com']]
+
+
+def test_refused_recipient_fails_alone(smtp):
+    smtp.fail['bad@example.com'] = smtplib.SMTPRecipientsRefused({'bad@example.com': (550, b'No such user')})
+    pool = SMTPPool()
+    results = pool.send_many(messages('a@example.com', 'bad@example.com', 'c@example.com'))
+    assert [ok for ok, _ in results] == [True, False, True]
+    assert len(smtp.connections) == 1
+
+
+def test_login_failure_fails_the_whole_batch(smtp, monkeypatch):
+    monkeypatch.setattr(Config, 'MAIL_PASSWORD', 'wrong')
+    results = SMTPPool().send_many(messages('a@example.com', 'b@example.com'))
+    assert [ok for ok, _ in results] == [False, False]
+    assert 'Bad credentials' in results[0][1]
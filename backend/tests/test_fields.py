@@ -0,0 +1,51 @@
+from app import db
+from app.models import Task, Comment
+
+from test_task_list import count_queries
+
+
+def test_summary_view_returns_only_its_keys(client, make_user):
+    user, headers = make_user('Ann Lee')
+    db.session.add(Task(title='Write report', description='Long text', assignee_id=user.id, created_by_id=user.id))
+    db.session.commit()
+
+    [task] = client.get('/api/tasks?view=summary', headers=headers).get_json()
+    assert set(task) == {'id', 'title', 'status', 'priority', 'due_date'}
+    [task] = client.get('/api/tasks?fields=title,comments_count', headers=headers).get_json()
+    assert task == {'id': task['id'], 'title': 'Write report', 'comments_count': 0}
+
+
+def test_default_response_keeps_every_key(client, make_user):
+    user, headers = make_user('Ann Lee')
+    db.session.add(Task(title='Write report', description='Long text', assignee_id=user.id, created_by_id=user.id))
+    db.session.commit()
+
+    [task] = client.get('/api/tasks', headers=headers).get_json()
+    assert task['description'] == 'Long text'
+    assert task['assignee']['name'] == 'Ann Lee' and task['subtasks_count'] == 0
+
+
+def test_unknown_fields_and_views_are_rejected(client, make_user):
+    _, headers = make_user('Ann Lee')
+    assert client.get('/api/tasks?fields=title,password_hash', headers=headers).status_code == 400
+    assert client.get('/api/tasks?view=everything', headers=headers).status_code == 400
+
+
+def test_unrequested_joins_and_counts_are_skipped(client, make_user):
+    user, headers = make_user('Ann Lee')
+    task = Task(title='Write report', assignee_id=user.id, created_by_id=user.id)
+    db.session.add(task)
+    db.session.flush()
+    db.session.add(Comment(task_id=task.id, user_id=user.id, content='Done?'))
+    db.session.commit()
+
+    def listing(url):
+        with count_queries() as statements:
+            client.get(url, headers=headers)
+        return next(s for s in statements if 'ORDER BY tasks.created_at DESC' in s)
+
+    full = listing('/api/tasks')
+    assert 'FROM comments' in full and 'JOIN users' in full and 'tasks.description' in full
+    summary = listing('/api/tasks?view=summary')
+    assert 'FROM comments' not in summary and 'JOIN users' not in summary
+    assert 'tasks.description' not in summary
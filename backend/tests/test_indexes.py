@@ -0,0 +1,46 @@
+import pytest
+from sqlalchemy import text
+
+from app import db
+
+# Hot predicates from the tasks, notifications, voice and reports blueprints, and the index each should use
+HOT_QUERIES = [
+    ("SELECT id FROM tasks WHERE assignee_id = 1 AND status = 'PENDING'", 'ix_tasks_assignee_status'),
+    ("SELECT id FROM tasks WHERE assignee_id = 1 AND due_date >= '2026-01-01' AND due_date < '2026-01-02'",
+     'ix_tasks_assignee_due_date'),
+    ("SELECT id FROM tasks WHERE created_by_id = 1 ORDER BY created_at DESC", 'ix_tasks_created_by_created_at'),
+    ("SELECT id FROM tasks WHERE workspace_id = 1 ORDER BY created_at DESC", 'ix_tasks_workspace_created_at'),
+    ("SELECT id FROM tasks WHERE parent_task_id = 1", 'ix_tasks_parent_task_id'),
+    ("SELECT id FROM notifications WHERE user_id = 1 AND read = 0 ORDER BY created_at DESC",
+     'ix_notifications_user_read_created_at'),
+    ("SELECT id FROM comments WHERE task_id = 1 ORDER BY created_at", 'ix_comments_task_created_at'),
+    ("SELECT id FROM task_activities WHERE task_id = 1 ORDER BY created_at DESC", 'ix_task_activities_task_created_at'),
+    ("SELECT id FROM meetings WHERE user_id = 1 AND start_time >= '2026-01-01'", 'ix_meetings_user_start_time'),
+]
+
+
+@pytest.mark.parametrize('query, index', HOT_QUERIES)
+def test_hot_query_uses_index(app, query, index):
+    plan = ' '.join(row[-1] for row in db.session.execute(text(f'EXPLAIN QUERY PLAN {query}')))
+    assert index in plan
+    assert 'USE TEMP B-TREE' not in plan
+
+
+def test_startup_fails_when_a_unique_index_cannot_be_built(tmp_path):
+    from sqlalchemy import create_engine
+
+    from app import create_app
+    from tests.conftest import TestConfig
+
+    class FileConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path / "app.db"}'
+
+    create_app(FileConfig)
+    engine = create_engine(FileConfig.SQLALCHEMY_DATABASE_URI)
+    with engine.begin() as conn:
+        conn.execute(text('DROP INDEX ix_users_email'))
+        conn.execute(text("INSERT INTO users (email, password_hash, name) VALUES ('a@example.com', 'x', 'A'), ('a@example.com', 'x', 'B')"))
+    engine.dispose()
+
+    with pytest.raises(RuntimeError, match='ix_users_email'):
+        create_app(FileConfig)
@@ -0,0 +1,42 @@
+from app import db
+from app.models import Task, Notification, NotificationType, Workspace, WorkspaceMember
+from app.tasks.mentions import resolve_mentions
+
+
+def workspace_with(owner, *members):
+    workspace = Workspace(name='Team', owner_id=owner.id)
+    db.session.add(workspace)
+    db.session.flush()
+    db.session.add_all([WorkspaceMember(workspace_id=workspace.id, user_id=u.id) for u in (owner, *members)])
+    db.session.commit()
+    return workspace
+
+
+def test_handles_pick_the_best_member_once_and_skip_the_author(app, make_user):
+    ann, _ = make_user('Ann Lee')
+    joanna, _ = make_user('Joanna Smith')
+    bob, _ = make_user('Bob Stone')
+    outsider, _ = make_user('Bobby Tables')
+    workspace = workspace_with(ann, joanna, bob)
+
+    mentioned = resolve_mentions('@bob and @ann, then @joan and @BOB again', workspace.id, author_id=bob.id)
+    assert [u.name for u in mentioned] == ['Ann Lee', 'Joanna Smith']
+    assert [u.name for u in resolve_mentions('@bobby', workspace.id)] == []
+    assert [u.name for u in resolve_mentions('@bobby')] == ['Bobby Tables']
+    assert resolve_mentions('no handles here', workspace.id) == []
+
+
+def test_comment_mentions_notify_each_mentioned_user_once(client, make_user):
+    ann, headers = make_user('Ann Lee')
+    bob, _ = make_user('Bob Stone')
+    workspace = workspace_with(ann, bob)
+    task = Task(title='Launch', assignee_id=ann.id, created_by_id=ann.id, workspace_id=workspace.id)
+    db.session.add(task)
+    db.session.commit()
+
+    response = client.post(f'/api/tasks/{task.id}/comments', json={'content': '@bob @bob please check, cc @ann'},
+                           headers=headers)
+    assert response.status_code == 201
+    assert response.get_json()['mentions'] == [bob.id]
+    notified = Notification.query.filter_by(type=NotificationType.MENTION).all()
+    assert [n.user_id for n in notified] == [bob.id]
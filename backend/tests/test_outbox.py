@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, update
+
+from app import db
+from app.config import Config
+from app.models import NotificationOutbox
+from app.notifications import outbox
+
+
+class FakeEmail:
+    """Stands in for the email deliverer: records each call and reports `outcome` for every message."""
+    def __init__(self):
+        self.calls = []
+        self.outcome = (True, None)
+
+    def __call__(self, messages):
+        self.calls.append([(m.recipient, m.subject, m.body) for m in messages])
+        return [self.outcome] * len(messages)
+
+
+@pytest.fixture
+def sent(app, monkeypatch):
+    fake = FakeEmail()
+    monkeypatch.setattr(Config, 'MAIL_SUPPRESS_SEND', True)
+    monkeypatch.setitem(outbox.DELIVERERS, 'email', fake)
+    app.config['NOTIFY_COALESCE_SECONDS'] = 0
+    return fake
+
+
+def rows():
+    return db.session.execute(select(NotificationOutbox).order_by(NotificationOutbox.id)).scalars().all()
+
+
+def make_due():
+    db.session.execute(update(NotificationOutbox).values(next_attempt_at=datetime.utcnow() - timedelta(seconds=1)))
+    db.session.commit()
+
+
+def test_failed_delivery_is_retried_with_backoff_then_marked_failed(app, sent):
+    app.config.update(OUTBOX_BACKOFF_SECONDS=30, OUTBOX_MAX_ATTEMPTS=2)
+    sent.outcome = (False, 'SMTP down')
+    outbox.enqueue_email('ann@example.com', 'Hi', 'Body')
+    db.session.commit()
+    make_due()
+
+    assert outbox.dispatch_once() == 1
+    [row] = rows()
+    assert (row.status, row.attempts, row.last_error) == ('pending', 1, 'SMTP down')
+    delay = (row.next_attempt_at - datetime.utcnow()).total_seconds()
+    assert 20 < delay <= 36  # 30s with +/-20% jitter
+    assert outbox.dispatch_once() == 0  # not due yet
+
+    make_due()
+    assert outbox.dispatch_once() == 1
+    db.session.expire_all()
+    [row] = rows()
+    assert (row.status, row.attempts) == ('failed', 2)
+    assert len(sent.calls) == 2
+
+
+def test_undeliverable_recipient_fails_without_retries(app, sent):
+    sent.outcome = (None, 'Invalid address')
+    outbox.enqueue_email('gone@example.com', 'Hi', 'Body')
+    db.session.commit()
+    make_due()
+
+    outbox.dispatch_once()
+    [row] = rows()
+    assert (row.status, row.attempts, row.last_error) == ('failed', 1, 'Invalid address')
+
+
+def test_messages_to_one_recipient_go_out_merged(app, sent):
+    app.config['NOTIFY_COALESCE_SECONDS'] = 30
+    for subject in ('Assigned', 'Due date changed', 'Status changed'):
+        outbox.enqueue_email('ann@example.com', subject, f'{subject} body')
+    outbox.enqueue_email('bob@example.com', 'Assigned', 'Assigned body')
+    db.session.commit()
+    assert outbox.dispatch_once() == 0  # still held for coalescing
+
+    # Only the first message for ann falls due; the others held for her are claimed with it
+    first = rows()[0].id
+    db.session.execute(update(NotificationOutbox).where(NotificationOutbox.id == first)
+                       .values(next_attempt_at=datetime.utcnow() - timedelta(seconds=1)))
+    db.session.commit()
+    assert outbox.dispatch_once() == 3
+    [[(recipient, subject, body)]] = sent.calls
+    assert recipient == 'ann@example.com'
+    assert 'Due date changed' in body and 'Status changed' in body
+    db.session.expire_all()
+    assert [row.status for row in rows()] == ['sent', 'sent', 'sent', 'pending']
+
+
+def test_digest_email_is_held_until_the_next_hour(app, sent, make_user):
+    user, _ = make_user('Ann', notification_digest='hourly')
+    outbox.enqueue_email(user.email, 'Assigned', 'Body')
+    db.session.commit()
+
+    [row] = rows()
+    assert row.digest == 'hourly'
+    assert row.next_attempt_at.minute == 0 and row.next_attempt_at > datetime.utcnow()
+    assert outbox.dispatch_once() == 0
+
+
+def test_warns_when_due_messages_wait_and_no_worker_runs(app, sent, monkeypatch, caplog):
+    monkeypatch.setattr(outbox, '_local_workers', 0)
+    monkeypatch.setattr(outbox, '_last_stale_check', 0.0)
+    app.config['OUTBOX_STALE_SECONDS'] = 60
+    db.session.add(NotificationOutbox(channel='email', recipient='ann@example.com', body='Old',
+                                      next_attempt_at=datetime.utcnow() - timedelta(minutes=10)))
+    db.session.commit()
+
+    outbox.enqueue_email('bob@example.com', 'Hi', 'Body')
+    db.session.commit()
+    assert 'no dispatch worker is delivering them' in caplog.text
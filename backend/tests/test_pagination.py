@@ -0,0 +1,43 @@
+from datetime import datetime
+
+from app import db
+from app.models import Task
+
+
+def add_tasks(user_id, count, created_at=None):
+    tasks = [Task(title=f'Task {i}', assignee_id=user_id, created_by_id=user_id, created_at=created_at)
+             for i in range(count)]
+    db.session.add_all(tasks)
+    db.session.commit()
+    return [task.id for task in tasks]
+
+
+def test_task_list_is_a_bare_array_unless_paging_is_requested(client, make_user):
+    user, headers = make_user()
+    add_tasks(user.id, 3)
+
+    assert isinstance(client.get('/api/tasks', headers=headers).get_json(), list)
+    assert isinstance(client.get('/api/tasks?paginate=false&limit=1', headers=headers).get_json(), list)
+    page = client.get('/api/tasks?limit=2', headers=headers).get_json()
+    assert len(page['items']) == 2 and page['next_cursor']
+    page = client.get('/api/tasks?paginate=true', headers=headers).get_json()
+    assert len(page['items']) == 3 and page['next_cursor'] is None
+
+
+def test_cursor_pages_are_stable_across_ties_and_new_rows(client, make_user):
+    user, headers = make_user()
+    ids = add_tasks(user.id, 5, created_at=datetime(2026, 1, 1))  # Same sort key: order falls back to id
+
+    page = client.get('/api/tasks?limit=2', headers=headers).get_json()
+    seen = [item['id'] for item in page['items']]
+    add_tasks(user.id, 2)  # Newer rows land before the cursor and must not shift later pages
+    while page['next_cursor']:
+        page = client.get(f'/api/tasks?limit=2&cursor={page["next_cursor"]}', headers=headers).get_json()
+        seen += [item['id'] for item in page['items']]
+
+    assert seen == sorted(ids, reverse=True)
+
+
+def test_invalid_cursor_is_rejected(client, make_user):
+    _, headers = make_user()
+    assert client.get('/api/tasks?cursor=not-a-cursor', headers=headers).status_code == 400
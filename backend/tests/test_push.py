@@ -0,0 +1,81 @@
+import threading
+import time
+
+from firebase_admin import messaging
+
+from app import db
+from app.models import User
+from app.notifications import push_service
+from app.notifications.push_service import PushBatcher, _send_batch
+
+
+class FakeFCM:
+    """Stands in for messaging.send_each; tokens in `errors` get that exception back."""
+    def __init__(self, errors=None):
+        self.calls = []
+        self.errors = errors or {}
+
+    def __call__(self, messages):
+        self.calls.append([m.token for m in messages])
+        return messaging.BatchResponse([
+            messaging.SendResponse(None, self.errors[m.token]) if m.token in self.errors
+            else messaging.SendResponse({'name': f'projects/p/messages/{m.token}'}, None)
+            for m in messages
+        ])
+
+
+def test_send_is_chunked_to_the_fcm_limit(app, monkeypatch):
+    fcm = FakeFCM()
+    monkeypatch.setattr(messaging, 'send_each', fcm)
+    items = [(f'token-{i}', 'Title', 'Body', None) for i in range(push_service.FCM_MAX_BATCH + 2)]
+
+    assert _send_batch(items) == [(True, None)] * len(items)
+    assert [len(call) for call in fcm.calls] == [push_service.FCM_MAX_BATCH, 2]
+
+
+def test_unregistered_tokens_are_pruned_and_not_retried(app, make_user, monkeypatch):
+    user, _ = make_user('Ann Lee', fcm_token='dead-token')
+    fcm = FakeFCM({
+        'dead-token': messaging.UnregisteredError('Requested entity was not found'),
+        'busy-token': messaging.QuotaExceededError('Quota exceeded'),
+    })
+    monkeypatch.setattr(messaging, 'send_each', fcm)
+
+    results = _send_batch([('dead-token', 'T', 'B', None), ('busy-token', 'T', 'B', None), ('ok-token', 'T', 'B', None)])
+    assert [ok for ok, _ in results] == [None, False, True]
+    db.session.expire_all()
+    assert db.session.get(User, user.id).fcm_token is None
+
+
+def test_concurrent_callers_share_one_batch():
+    calls = []
+
+    def send(items):
+        calls.append(list(items))
+        return [(True, item) for item in items]
+
+    batcher = PushBatcher(send, max_batch=100, linger=0.5)
+    results = {}
+    threads = [
+        threading.Thread(target=lambda n=n: results.__setitem__(n, batcher.submit([f'{n}-a', f'{n}-b'])))
+        for n in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1 and sorted(calls[0]) == sorted(f'{n}-{x}' for n in range(3) for x in 'ab')
+    for n in range(3):
+        assert results[n] == [(True, f'{n}-a'), (True, f'{n}-b')]
+
+
+def test_full_batch_goes_out_without_waiting_for_the_linger():
+    batcher = PushBatcher(lambda items: [(True, None)] * len(items), max_batch=2, linger=30)
+    other = threading.Thread(target=batcher.submit, args=(['a'],))
+    started = time.monotonic()
+    other.start()
+    assert batcher.submit(['b']) == [(True, None)]
+    other.join(5)
+    assert not other.is_alive()
+    assert time.monotonic() - started < 5
@@ -0,0 +1,67 @@
+import json
+from datetime import datetime, timedelta
+
+from app import db
+from app.models import Task, RecurrenceType
+from app.tasks.recurrence import Schedule, materialize_due, initial_next_occurrence
+
+NOW = datetime(2026, 3, 15, 9, 0)
+
+
+def series(user, due_date, recurrence_type=RecurrenceType.DAILY, **config):
+    task = Task(title='Standup notes', assignee_id=user.id, created_by_id=user.id, due_date=due_date,
+                is_recurring=True, recurrence_type=recurrence_type,
+                recurrence_config=json.dumps(config) if config else None)
+    task.next_occurrence = initial_next_occurrence(task)
+    db.session.add(task)
+    db.session.commit()
+    return task
+
+
+def instances(task_id):
+    return [t.due_date for t in Task.query.filter_by(recurrence_source_id=task_id).order_by(Task.due_date)]
+
+
+def test_catch_up_after_downtime_is_capped(app, make_user):
+    user, _ = make_user()
+    task = series(user, NOW - timedelta(days=10))
+    task_id = task.id
+
+    assert materialize_due(now=NOW, max_catchup=3) == 3
+    assert instances(task_id) == [NOW - timedelta(days=2), NOW - timedelta(days=1), NOW]
+    assert db.session.get(Task, task_id).next_occurrence == NOW + timedelta(days=1)
+    assert materialize_due(now=NOW, max_catchup=3) == 0
+
+
+def test_rerunning_an_occurrence_does_not_duplicate_it(app, make_user):
+    user, _ = make_user()
+    task = series(user, NOW - timedelta(days=2))
+    task_id = task.id
+    assert materialize_due(now=NOW) == 2
+
+    # A second scheduler that read the old next_occurrence retries the same occurrences
+    task = db.session.get(Task, task_id)
+    task.next_occurrence = NOW - timedelta(days=1)
+    db.session.commit()
+    assert materialize_due(now=NOW) == 0
+    assert instances(task_id) == [NOW - timedelta(days=1), NOW]
+
+
+def test_series_stops_at_until(app, make_user):
+    user, _ = make_user()
+    task = series(user, NOW - timedelta(days=3), RecurrenceType.CUSTOM,
+                  unit='days', interval=2, until=(NOW - timedelta(hours=12)).isoformat())
+    task_id = task.id
+
+    assert materialize_due(now=NOW) == 1
+    assert instances(task_id) == [NOW - timedelta(days=1)]
+    assert db.session.get(Task, task_id).next_occurrence is None
+
+
+def test_monthly_occurrences_do_not_drift():
+    schedule = Schedule(datetime(2026, 1, 31, 9, 0), 'months')
+    assert [schedule.occurrence(k) for k in (1, 2, 3)] == [
+        datetime(2026, 2, 28, 9, 0), datetime(2026, 3, 31, 9, 0), datetime(2026, 4, 30, 9, 0)]
+    occurrences, following = schedule.due(schedule.first(), datetime(2026, 4, 1), limit=30)
+    assert occurrences == [datetime(2026, 2, 28, 9, 0), datetime(2026, 3, 31, 9, 0)]
+    assert following == datetime(2026, 4, 30, 9, 0)
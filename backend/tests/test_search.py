@@ -0,0 +1,69 @@
+from app import db
+from app.models import Task, Comment
+from app.search.index import rank_matching
+
+
+def search(client, headers, q):
+    response = client.get('/api/search', query_string={'q': q}, headers=headers)
+    assert response.status_code == 200
+    return [task['title'] for task in response.get_json()]
+
+
+def test_search_ranks_title_matches_first_and_matches_prefixes(client, make_user):
+    user, headers = make_user('Ann Lee')
+    db.session.add_all([
+        Task(title='Quarterly report', description='Figures for the board', assignee_id=user.id, created_by_id=user.id),
+        Task(title='Board meeting', description='Discuss the quarterly report', assignee_id=user.id, created_by_id=user.id),
+        Task(title='Order supplies', notes='Ask finance about the report format', assignee_id=user.id, created_by_id=user.id),
+        Task(title='Plan offsite', assignee_id=user.id, created_by_id=user.id),
+    ])
+    db.session.commit()
+
+    assert search(client, headers, 'report') == ['Quarterly report', 'Board meeting', 'Order supplies']
+    assert search(client, headers, 'quart rep') == ['Quarterly report', 'Board meeting']
+    assert client.get('/api/search', headers=headers).status_code == 400
+
+
+def test_index_follows_edits_comments_and_deletes(client, make_user):
+    user, headers = make_user('Ann Lee')
+    task = Task(title='Draft proposal', assignee_id=user.id, created_by_id=user.id)
+    db.session.add(task)
+    db.session.commit()
+
+    task.title = 'Final proposal'
+    db.session.commit()
+    assert search(client, headers, 'draft') == []
+    assert search(client, headers, 'final') == ['Final proposal']
+
+    db.session.add_all([Comment(task_id=task.id, user_id=user.id, content='Waiting on legal'),
+                        Comment(task_id=task.id, user_id=user.id, content='Pricing agreed')])
+    db.session.commit()
+    assert search(client, headers, 'legal pricing') == ['Final proposal']
+
+    db.session.delete(task)
+    db.session.commit()
+    assert search(client, headers, 'proposal') == []
+
+
+def test_search_only_returns_visible_tasks(client, make_user):
+    user, headers = make_user('Ann Lee')
+    other, _ = make_user('Bob Smith')
+    db.session.add_all([
+        Task(title='Budget review', assignee_id=user.id, created_by_id=other.id),
+        Task(title='Budget approval', assignee_id=other.id, created_by_id=other.id),
+    ])
+    db.session.commit()
+
+    assert search(client, headers, 'budget') == ['Budget review']
+
+
+def test_title_only_ignores_notes(app, make_user):
+    user, _ = make_user('Ann Lee')
+    db.session.add_all([
+        Task(title='Call the client', notes='Then delete the old invoice', assignee_id=user.id, created_by_id=user.id),
+        Task(title='Old invoice cleanup', assignee_id=user.id, created_by_id=user.id),
+    ])
+    db.session.commit()
+
+    assert [t.title for t in rank_matching(Task.query, 'old invoice', title_only=True)] == ['Old invoice cleanup']
+    assert len(rank_matching(Task.query, 'old invoice').all()) == 2
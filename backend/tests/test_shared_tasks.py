@@ -0,0 +1,67 @@
+import pytest
+from sqlalchemy import event
+
+from app import db
+from app.models import Task
+from app.tasks import sharing
+
+
+@pytest.fixture(autouse=True)
+def shared_cache(app):
+    """Each test's fresh database reuses the same task ids, so start from an empty LRU."""
+    sharing._cache.clear()
+    yield
+    sharing._cache.clear()
+
+
+def share(client, headers, user, share_type='public'):
+    task = Task(title='Roadmap', assignee_id=user.id, created_by_id=user.id)
+    db.session.add(task)
+    db.session.commit()
+    response = client.post(f'/api/tasks/{task.id}/share', json={'share_type': share_type}, headers=headers)
+    return task, response.get_json()['share_token']
+
+
+def test_shared_task_is_served_from_cache_with_validators(app, client, make_user):
+    user, headers = make_user('Ann Lee')
+    _, token = share(client, headers, user)
+    url = f'/api/tasks/shared/{token}'
+
+    first = client.get(url)
+    assert first.status_code == 200
+    assert first.get_json()['title'] == 'Roadmap'
+    assert first.headers['Cache-Control'] == 'public, max-age=30'
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        assert client.get(url).status_code == 200
+        assert client.get(url, headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    assert statements == []
+
+
+def test_edits_unsharing_and_deletes_are_seen_at_once(client, make_user):
+    user, headers = make_user('Ann Lee')
+    task, token = share(client, headers, user)
+    url = f'/api/tasks/shared/{token}'
+    assert client.get(url).status_code == 200
+
+    task.title = 'Roadmap v2'
+    db.session.commit()
+    assert client.get(url).get_json()['title'] == 'Roadmap v2'
+
+    client.post(f'/api/tasks/{task.id}/share', json={'share_type': 'private'}, headers=headers)
+    assert client.get(url).status_code == 404
+
+    task, token = share(client, headers, user)
+    url = f'/api/tasks/shared/{token}'
+    assert client.get(url).status_code == 200
+    client.post('/api/tasks/bulk', json={'operations': [{'op': 'delete', 'id': task.id}]}, headers=headers)
+    assert client.get(url).status_code == 404
+
+
+def test_unknown_tokens_are_404(client):
+    assert client.get('/api/tasks/shared/not-a-token').status_code == 404
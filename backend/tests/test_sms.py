@@ -0,0 +1,71 @@
+import pytest
+from twilio.base.exceptions import TwilioRestException
+
+from app.config import Config
+from app.notifications import sms_service
+from app.notifications.sms_service import TokenBucket, _RecentMessages, send_sms_many
+
+
+class FakeMessages:
+    """Stands in for client.messages; numbers in `errors` get that exception once."""
+    def __init__(self):
+        self.sent = []
+        self.errors = {}
+
+    def create(self, body, from_, to):
+        error = self.errors.pop(to, None)
+        if error is not None:
+            raise error
+        self.sent.append((to, body))
+
+
+class FakeClient:
+    def __init__(self):
+        self.messages = FakeMessages()
+
+
+@pytest.fixture
+def twilio(monkeypatch):
+    client = FakeClient()
+    monkeypatch.setattr(Config, 'TWILIO_ACCOUNT_SID', 'AC123')
+    monkeypatch.setattr(Config, 'TWILIO_AUTH_TOKEN', 'secret')
+    monkeypatch.setattr(Config, 'TWILIO_PHONE_NUMBER', '+15550000000')
+    monkeypatch.setattr(Config, 'SMS_DEDUP_SECONDS', 60)
+    monkeypatch.setattr(sms_service, 'get_client', lambda: client)
+    monkeypatch.setattr(sms_service, '_bucket', TokenBucket(rate=1000, burst=1000))
+    monkeypatch.setattr(sms_service, '_recent', _RecentMessages(60))
+    return client.messages
+
+
+def test_client_is_built_once_per_process(monkeypatch):
+    monkeypatch.setattr(sms_service, '_client', None)
+    monkeypatch.setattr(Config, 'TWILIO_ACCOUNT_SID', 'AC123')
+    monkeypatch.setattr(Config, 'TWILIO_AUTH_TOKEN', 'secret')
+    assert sms_service.get_client() is sms_service.get_client()
+
+
+def test_repeated_text_to_a_number_is_sent_once(twilio):
+    results = send_sms_many([('+15551111111', 'Task due'), ('+15551111111', 'Task due'), ('+15552222222', 'Task due')])
+    assert results == [(True, None)] * 3
+    assert twilio.sent == [('+15551111111', 'Task due'), ('+15552222222', 'Task due')]
+
+
+def test_failed_send_is_not_remembered_for_dedup(twilio):
+    twilio.errors['+15551111111'] = TwilioRestException(503, '/Messages', 'Service unavailable')
+    assert send_sms_many([('+15551111111', 'Task due')])[0][0] is False
+    assert send_sms_many([('+15551111111', 'Task due')]) == [(True, None)]
+
+
+def test_invalid_number_fails_permanently(twilio):
+    twilio.errors['+1555'] = TwilioRestException(400, '/Messages', 'Invalid To number', code=21211)
+    [(ok, error)] = send_sms_many([('+1555', 'Task due')])
+    assert ok is None and 'Invalid To number' in error
+
+
+def test_batch_beyond_the_rate_is_deferred(twilio, monkeypatch):
+    monkeypatch.setattr(sms_service, '_bucket', TokenBucket(rate=1, burst=2))
+    results = send_sms_many([(f'+1555000000{i}', 'Hi') for i in range(3)], max_wait=0)
+    assert results[:2] == [(True, None)] * 2
+    ok, error, retry_after = results[2]
+    assert ok is False and 0 < retry_after <= 1
+    assert len(twilio.sent) == 2
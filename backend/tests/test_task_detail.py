@@ -0,0 +1,52 @@
+from app import db
+from app.models import Task, Comment, TaskCollaborator
+
+from test_task_list import count_queries
+
+
+def add_comments(task_id, user_id, count):
+    db.session.add_all([Comment(task_id=task_id, user_id=user_id, content=f'Comment {i}') for i in range(count)])
+    db.session.commit()
+    db.session.expunge_all()
+
+
+def test_detail_runs_a_fixed_number_of_queries(client, make_user):
+    user, headers = make_user('Ann Lee')
+    other, _ = make_user('Bob Smith')
+    task = Task(title='Detail', assignee_id=user.id, created_by_id=other.id)
+    db.session.add(task)
+    db.session.flush()
+    db.session.add_all([
+        Task(title='Subtask', assignee_id=other.id, created_by_id=user.id, parent_task_id=task.id),
+        TaskCollaborator(task_id=task.id, user_id=other.id),
+    ])
+    task_id, other_id = task.id, other.id
+    url = f'/api/tasks/{task_id}'
+
+    add_comments(task_id, other_id, 1)
+    with count_queries() as small:
+        assert client.get(url, headers=headers).status_code == 200
+
+    add_comments(task_id, other_id, 30)
+    with count_queries() as large:
+        response = client.get(url, headers=headers)
+    assert len(response.get_json()['comments']) == 31
+    assert response.get_json()['collaborators'][0]['name'] == 'Bob Smith'
+    assert len(large) == len(small)
+
+
+def test_include_limits_the_sections(client, make_user):
+    user, headers = make_user('Ann Lee')
+    task = Task(title='Detail', assignee_id=user.id, created_by_id=user.id)
+    db.session.add(task)
+    db.session.commit()
+    url = f'/api/tasks/{task.id}'
+
+    body = client.get(f'{url}?include=comments', headers=headers).get_json()
+    assert body['comments'] == [] and 'subtasks' not in body and 'attachments' not in body
+    with count_queries() as everything:
+        client.get(url, headers=headers)
+    with count_queries() as nothing:
+        client.get(f'{url}?include=', headers=headers)
+    assert len(nothing) < len(everything)
+    assert client.get(f'{url}?include=history', headers=headers).status_code == 400
@@ -0,0 +1,54 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app import db
+from app.models import Task, Comment, TaskCollaborator
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def add_tasks(user_id, other_id, count):
+    for i in range(count):
+        task = Task(title=f'Task {i}', assignee_id=user_id, created_by_id=other_id)
+        db.session.add(task)
+        db.session.flush()
+        db.session.add_all([
+            Task(title=f'Subtask {i}', assignee_id=other_id, created_by_id=user_id, parent_task_id=task.id),
+            Comment(task_id=task.id, user_id=other_id, content='Looks good'),
+            TaskCollaborator(task_id=task.id, user_id=other_id),
+        ])
+    db.session.commit()
+    db.session.expunge_all()
+
+
+def test_task_list_runs_a_fixed_number_of_queries(client, make_user):
+    user, headers = make_user('Ann Lee')
+    other, _ = make_user('Bob Smith')
+    user_id, other_id = user.id, other.id
+
+    add_tasks(user_id, other_id, 2)
+    with count_queries() as small:
+        response = client.get('/api/tasks?paginate=false', headers=headers)
+    assert response.status_code == 200
+    assert len(response.get_json()) == 2
+
+    add_tasks(user_id, other_id, 20)
+    with count_queries() as large:
+        response = client.get('/api/tasks?paginate=false', headers=headers)
+    assert response.status_code == 200
+    assert len(response.get_json()) == 22
+
+    assert len(large) == len(small)
@@ -0,0 +1,39 @@
+from app import db
+from app.models import Task, TaskStatus
+
+
+def test_tree_rolls_up_nested_subtasks(client, make_user):
+    user, headers = make_user()
+    root = Task(title='Launch', assignee_id=user.id, created_by_id=user.id, estimated_hours=1)
+    db.session.add(root)
+    db.session.flush()
+    design = Task(title='Design', assignee_id=user.id, created_by_id=user.id, parent_task_id=root.id,
+                  status=TaskStatus.COMPLETED, estimated_hours=2)
+    build = Task(title='Build', assignee_id=user.id, created_by_id=user.id, parent_task_id=root.id, estimated_hours=3)
+    db.session.add_all([design, build])
+    db.session.flush()
+    db.session.add(Task(title='Tests', assignee_id=user.id, created_by_id=user.id, parent_task_id=build.id,
+                        status=TaskStatus.COMPLETED, estimated_hours=4))
+    db.session.commit()
+
+    response = client.get(f'/api/tasks/{root.id}/tree', headers=headers)
+    assert response.status_code == 200
+    tree = response.get_json()
+    assert tree['rollup']['subtasks'] == 3
+    assert tree['rollup']['completed_subtasks'] == 2
+    assert tree['rollup']['estimated_hours'] == 10.0
+    assert sorted(node['title'] for node in tree['subtasks']) == ['Build', 'Design']
+    build_node = next(node for node in tree['subtasks'] if node['title'] == 'Build')
+    assert [node['title'] for node in build_node['subtasks']] == ['Tests']
+    assert build_node['rollup']['percent_complete'] == 100.0
+
+
+def test_tree_requires_access_to_the_task(client, make_user):
+    owner, _ = make_user('Ann Lee')
+    _, stranger_headers = make_user('Bob Smith')
+    task = Task(title='Private', assignee_id=owner.id, created_by_id=owner.id)
+    db.session.add(task)
+    db.session.commit()
+
+    assert client.get(f'/api/tasks/{task.id}/tree', headers=stranger_headers).status_code == 403
+    assert client.get('/api/tasks/9999/tree', headers=stranger_headers).status_code == 404